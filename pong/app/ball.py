@@ -8,19 +8,24 @@ class Ball:
     Pong Ball
     """
 
-    def __init__(self):
+    __slots__ = ("pos", "vel", "prev")
+
+    def __init__(self, rng: random.Random = None):
         """
         Initialize Ball object
+        :param rng: Random generator the serve is drawn from (the global one by default)
         """
+        rng = rng or random
         self.pos = [WIDTH // 2, HEIGHT // 2]
-        horizontal_velocity = random.randrange(3, 6)
-        vertical_velocity = random.randrange(2, 5)
+        horizontal_velocity = rng.randrange(3, 6)
+        vertical_velocity = rng.randrange(2, 5)
         while horizontal_velocity == vertical_velocity:
-            vertical_velocity = random.randrange(2, 5)
+            vertical_velocity = rng.randrange(2, 5)
 
-        if random.randrange(0, 2) == 0:
+        if rng.randrange(0, 2) == 0:
             horizontal_velocity = -horizontal_velocity
-        if random.randrange(0, 2) == 0:
+        if rng.randrange(0, 2) == 0:
             vertical_velocity = -vertical_velocity
 
         self.vel = [horizontal_velocity, vertical_velocity]
+        self.prev = list(self.pos)
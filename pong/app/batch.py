@@ -0,0 +1,133 @@
+import numpy as np
+
+from .constants import (
+    BALL_RADIUS,
+    HALF_PAD_HEIGHT,
+    HEIGHT,
+    PAD_WIDTH,
+    WIDTH,
+    PaddleLocation,
+    PaddlePosition,
+)
+
+# Paddle slots, in PaddleLocation order
+LEFT, RIGHT, TOP, BOTTOM = range(4)
+LOCATIONS = [_loc.value for _loc in PaddleLocation]
+# Coordinate of each paddle along its edge and the arena size on that axis
+PADDLE_AXIS = [1, 1, 0, 0]
+PADDLE_LIMIT = [HEIGHT, HEIGHT, WIDTH, WIDTH]
+NEAR_EDGE = BALL_RADIUS + PAD_WIDTH
+FAR_EDGE_X = WIDTH + 1 - BALL_RADIUS - PAD_WIDTH
+FAR_EDGE_Y = HEIGHT + 1 - BALL_RADIUS - PAD_WIDTH
+# slot, ball axis checked, far edge ?, edge
+GUARDED_EDGES = [
+    (LEFT, 0, False, NEAR_EDGE),
+    (RIGHT, 0, True, FAR_EDGE_X),
+    (TOP, 1, False, NEAR_EDGE),
+    (BOTTOM, 1, True, FAR_EDGE_Y),
+]
+
+
+class BatchSimulation:
+    """
+    N Pong matches stepped at once with NumPy structure-of-arrays buffers.
+    Applies the same discrete rules as PongSimulation(swept=False) (paddle clamp, truncated ball moves, wall bounces,
+    paddle hits with the 1.1x speed-up, serve on miss); only the serve random stream differs.
+    """
+
+    def __init__(self, matches: int, players: int = 2, seed: int = None):
+        """
+        Initialize matches, players take the paddle slots in PaddleLocation order
+        :param matches: Number of matches
+        :param players: Players per match
+        :param seed: Serve random seed
+        """
+        self.matches = matches
+        self.rng = np.random.default_rng(seed)
+        self.tick = 0
+        self.running = np.ones(matches, dtype=bool)
+        self.ball_pos = np.empty((matches, 2), dtype=np.int64)
+        self.ball_vel = np.empty((matches, 2), dtype=np.float64)
+        self.present = np.zeros((matches, 4), dtype=bool)
+        self.present[:, :players] = True
+        self.paddle_pos = np.array(
+            [[_position.value[axis] for _position, axis in zip(PaddlePosition, PADDLE_AXIS)]] * matches,
+            dtype=np.int64,
+        )
+        self.paddle_vel = np.zeros((matches, 4), dtype=np.int64)
+        self.low = HALF_PAD_HEIGHT
+        self.high = np.array(PADDLE_LIMIT, dtype=np.int64) - HALF_PAD_HEIGHT
+        self.misses = np.zeros(matches, dtype=np.int64)
+        self.serve(np.ones(matches, dtype=bool))
+
+    @classmethod
+    def from_simulations(cls, simulations: list):
+        """
+        Copy the state of PongSimulation matches into a batch
+        :param simulations: PongSimulation objects
+        :return: BatchSimulation
+        """
+        batch = cls(len(simulations), players=0)
+        for index, simulation in enumerate(simulations):
+            batch.running[index] = simulation.running
+            batch.ball_pos[index] = simulation.ball.pos
+            batch.ball_vel[index] = simulation.ball.vel
+            for _paddle in simulation.paddles.values():
+                slot = LOCATIONS.index(_paddle.loc)
+                batch.present[index, slot] = True
+                batch.paddle_pos[index, slot] = _paddle.pos[PADDLE_AXIS[slot]]
+                batch.paddle_vel[index, slot] = _paddle.vel
+        return batch
+
+    def serve(self, mask: np.ndarray):
+        """
+        Serve a new ball (same distribution as Ball) in the masked matches
+        :param mask: Matches to serve in
+        """
+        count = int(mask.sum())
+        if not count:
+            return
+        horizontal = self.rng.integers(3, 6, count)
+        vertical = self.rng.integers(2, 5, count)
+        same = horizontal == vertical
+        while same.any():
+            vertical[same] = self.rng.integers(2, 5, int(same.sum()))
+            same = horizontal == vertical
+        signs = self.rng.integers(0, 2, (count, 2)) * 2 - 1
+        self.ball_pos[mask] = (WIDTH // 2, HEIGHT // 2)
+        self.ball_vel[mask] = np.stack([horizontal, vertical], axis=1) * signs
+
+    def step(self, paddle_vel: np.ndarray = None):
+        """
+        Advance every match by one tick
+        :param paddle_vel: Optional (matches, 4) paddle velocities
+        """
+        if paddle_vel is not None:
+            self.paddle_vel[:] = paddle_vel
+        self.tick += 1
+        np.clip(self.paddle_pos + self.paddle_vel, self.low, self.high, out=self.paddle_pos)
+        running = self.running
+        self.ball_pos[running] += self.ball_vel[running].astype(np.int64)
+        x, y = self.ball_pos[:, 0], self.ball_pos[:, 1]
+        vx, vy = self.ball_vel[:, 0], self.ball_vel[:, 1]
+        present = self.present
+        # Free edges
+        flip_x = (~present[:, LEFT] & (x <= NEAR_EDGE)) | (~present[:, RIGHT] & (x >= FAR_EDGE_X))
+        flip_y = (~present[:, TOP] & (y <= NEAR_EDGE)) | (~present[:, BOTTOM] & (y >= FAR_EDGE_Y))
+        flip_x &= running
+        flip_y &= running
+        vx[flip_x] = -vx[flip_x]
+        vy[flip_y] = -vy[flip_y]
+        # Guarded edges, resolved in paddle order like the scalar rules
+        for slot, axis, far, edge in GUARDED_EDGES:
+            coordinate = self.ball_pos[:, axis]
+            reached = running & present[:, slot] & ((coordinate >= edge) if far else (coordinate <= edge))
+            if not reached.any():
+                continue
+            along, center = self.ball_pos[:, 1 - axis], self.paddle_pos[:, slot]
+            hit = reached & (center - HALF_PAD_HEIGHT <= along) & (along < center + HALF_PAD_HEIGHT)
+            self.ball_vel[hit, axis] = -self.ball_vel[hit, axis]
+            self.ball_vel[hit] *= 1.1
+            miss = reached & ~hit
+            self.misses += miss
+            self.serve(miss)
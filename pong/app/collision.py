@@ -0,0 +1,81 @@
+from .ball import Ball
+from .constants import (
+    BALL_RADIUS,
+    HALF_PAD_HEIGHT,
+    HEIGHT,
+    PAD_WIDTH,
+    WIDTH,
+    PaddleLocation,
+)
+
+# Bounces resolved within one tick before the rest of the movement is dropped
+MAX_BOUNCES = 8
+
+# Ball center bounds per side, precomputed once: location -> (axis, direction towards the side, edge)
+SIDES = {
+    PaddleLocation.LEFT.value: (0, -1, BALL_RADIUS + PAD_WIDTH),
+    PaddleLocation.RIGHT.value: (0, 1, WIDTH + 1 - BALL_RADIUS - PAD_WIDTH),
+    PaddleLocation.TOP.value: (1, -1, BALL_RADIUS + PAD_WIDTH),
+    PaddleLocation.BOTTOM.value: (1, 1, HEIGHT + 1 - BALL_RADIUS - PAD_WIDTH),
+}
+# (axis, direction) -> (location, edge)
+BOUNDS = {(axis, direction): (loc, edge) for loc, (axis, direction, edge) in SIDES.items()}
+
+
+def time_of_impact(start: float, delta: float, axis: int) -> tuple:
+    """
+    Earliest time (fraction of the move) the ball center reaches the side it moves towards on one axis
+    :param start: Ball coordinate
+    :param delta: Ball movement on the axis
+    :param axis: Axis
+    :return: (time, location) or (None, None) if no side is reached
+    """
+    if not delta:
+        return None, None
+    loc, edge = BOUNDS[(axis, 1 if delta > 0 else -1)]
+    distance = edge - start
+    if (distance >= 0) if delta < 0 else (distance <= 0):
+        return 0.0, loc  # already at or past the edge
+    return distance / delta, loc
+
+
+def sweep_ball(ball: Ball, paddles: list, serve=Ball) -> Ball:
+    """
+    Move the ball for one tick with continuous collision detection: the movement segment is tested against
+    the side bounds, so a fast ball can't tunnel through a paddle, and several bounces are resolved per tick
+    :param ball: Ball object
+    :param paddles: Paddles in play
+    :param serve: Callable returning a newly served ball
+    :return: Same ball, or a newly served one if a paddle missed
+    """
+    guarded = {_paddle.loc: _paddle for _paddle in paddles}
+    pos = [float(ball.pos[0]), float(ball.pos[1])]
+    delta = [int(ball.vel[0]), int(ball.vel[1])]
+    remaining = 1.0
+    for _ in range(MAX_BOUNCES):
+        impacts = [time_of_impact(pos[axis], delta[axis], axis) for axis in (0, 1)]
+        hit_time, loc = min(
+            ((time, loc) for time, loc in impacts if time is not None and time <= remaining),
+            default=(None, None),
+            key=lambda impact: impact[0],
+        )
+        if hit_time is None:
+            break
+        pos[0] += delta[0] * hit_time
+        pos[1] += delta[1] * hit_time
+        remaining -= hit_time
+        axis = SIDES[loc][0]
+        paddle = guarded.get(loc)
+        if paddle is not None:
+            along, center = pos[1 - axis], paddle.pos[1 - axis]
+            if not center - HALF_PAD_HEIGHT <= along < center + HALF_PAD_HEIGHT:
+                return serve()
+            ball.vel[0] *= 1.1
+            ball.vel[1] *= 1.1
+        ball.vel[axis] = -ball.vel[axis]
+        delta[axis] = -delta[axis]
+    else:
+        remaining = 0.0
+    ball.pos[0] = round(pos[0] + delta[0] * remaining)
+    ball.pos[1] = round(pos[1] + delta[1] * remaining)
+    return ball
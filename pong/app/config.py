@@ -1,2 +1,21 @@
 SERVER_IP = "0.0.0.0"
 SERVER_PORT = 50090
+WIRE_CODEC = "BINARY"
+ROOM_ID = 0
+ROOM_MAX_PLAYERS = 0
+DELTA_UPDATES = True
+SPECTATE = False
+SEND_HIGH_WATER = 64 * 1024
+SEND_LIMIT = 1024 * 1024
+SLOW_CLIENT_TIMEOUT = 5.0
+MAX_CONNECTIONS = 4096
+ROOM_QUEUE_SIZE = 16
+HANDSHAKE_TIMEOUT = 5.0
+IDLE_TIMEOUT = 15.0
+RECONNECT_GRACE = 10.0
+RENDER_SCALE = "SMOOTH"
+SIM_RATE = 120
+MAX_FPS = 120
+VSYNC = False
+PROFILE = False
+PROFILE_DUMP = ""
@@ -0,0 +1,127 @@
+import socket
+import time
+from collections import deque
+from itertools import islice
+
+from .constants import SEND_CHUNK_SIZE
+from .protocol import MessageStream
+
+
+class Connection:
+    """
+    Server side client connection.
+    Outgoing frames are queued, then written without blocking, coalesced, when the socket is writable.
+    """
+
+    def __init__(self, sock: socket.socket, addr: tuple, session: int):
+        """
+        Initialize connection
+        :param sock: Client socket (non blocking)
+        :param addr: Client address
+        :param session: Session id, unique on the server, the player id
+        """
+        self.sock = sock
+        self.addr = addr
+        self.player_id = session
+        self.token = ""
+        self.stream = MessageStream()
+        self.room = None
+        self.waiting = None
+        self.greeted = False
+        self.last_seen = time.monotonic()
+        self.timer = None
+        self.heartbeat = None
+        self.deltas = None
+        self.input_seq = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.spectating = False
+        self.synced = False
+        self.outbox = deque()
+        self.head_sent = 0
+        self.queued = 0
+        self.writing = False
+        self.stalled_since = None
+
+    def queue(self, frame: bytes, replaceable: bool = False):
+        """
+        Queue a frame
+        :param frame: Frame
+        :param replaceable: Is it a state frame (snapshot, world, delta) a newer one makes stale ?
+        """
+        self.outbox.append((frame, replaceable))
+        self.queued += len(frame)
+
+    def drop_stale(self) -> int:
+        """
+        Drop the queued state frames nothing was written of yet, the next state frame replaces them
+        :return: Number of frames dropped
+        """
+        kept = deque()
+        dropped = 0
+        for index, (frame, replaceable) in enumerate(self.outbox):
+            if replaceable and not (index == 0 and self.head_sent):
+                self.queued -= len(frame)
+                dropped += 1
+            else:
+                kept.append((frame, replaceable))
+        if dropped:
+            self.outbox = kept
+            self.stream.resync()
+        return dropped
+
+    def offer(self, frame: bytes, keyframe: bytes) -> bool:
+        """
+        Queue a shared frame (spectators), dropped while the previous one is still being written.
+        A receiver that missed a frame gets the keyframe variant next.
+        :param frame: Frame of the shared stream
+        :param keyframe: Keyframe variant (the same frame for stateless codecs, None if nobody needed it)
+        :return: False if the frame was dropped
+        """
+        if self.outbox:
+            self.synced = False
+            return False
+        self.queue(frame if self.synced else keyframe)
+        self.synced = True
+        return True
+
+    def flush(self) -> int:
+        """
+        Write the queued frames, coalesced into one send of up to SEND_CHUNK_SIZE bytes
+        :return: Bytes written
+        :raises OSError: If the connection is broken
+        """
+        if not self.outbox:
+            return 0
+        head, start = self.outbox[0][0], self.head_sent
+        if len(self.outbox) == 1 or len(head) - start >= SEND_CHUNK_SIZE:
+            data = memoryview(head)[start:] if start else head
+        else:
+            chunks, size = [memoryview(head)[start:]], len(head) - start
+            for frame, _ in islice(self.outbox, 1, None):
+                if size >= SEND_CHUNK_SIZE:
+                    break
+                chunks.append(frame)
+                size += len(frame)
+            data = b"".join(chunks)
+        sent = self.write(data)
+        self.queued -= sent
+        written = self.head_sent + sent
+        while self.outbox and written >= len(self.outbox[0][0]):
+            written -= len(self.outbox.popleft()[0])
+        self.head_sent = written
+        return sent
+
+    def write(self, data) -> int:
+        """
+        Write what the socket buffer takes
+        :param data: Bytes
+        :return: Bytes written
+        :raises OSError: If the connection is broken
+        """
+        try:
+            sent = self.sock.send(data)
+        except BlockingIOError:
+            return 0
+        self.bytes_out += sent
+        return sent
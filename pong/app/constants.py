@@ -2,6 +2,13 @@ from enum import Enum
 
 DONT_WRITE_BYTE_CODE = True
 BUFFER_SIZE = 2000
+PROTOCOL_VERSION = 1
+# Largest frame payload accepted from a peer (game messages are a few hundred bytes)
+MAX_FRAME_SIZE = 64 * 1024
+# Binary string ids are 16 bits: past this many strings the table starts over, before the next message
+STRING_TABLE_LIMIT = 0x8000
+DEFAULT_ROOM = 0
+MAX_PLAYERS = 4
 WIDTH = 720
 HEIGHT = 720
 BALL_RADIUS = 15
@@ -9,6 +16,37 @@ PAD_WIDTH = 10
 PAD_HEIGHT = 150
 HALF_PAD_WIDTH = PAD_WIDTH // 2
 HALF_PAD_HEIGHT = PAD_HEIGHT // 2
+HEARTBEAT_INTERVAL = 1.0
+INTERPOLATION_DELAY = 0.1
+EXTRAPOLATION_LIMIT = 0.25
+SNAPSHOT_BUFFER_SIZE = 32
+TELEPORT_DISTANCE = WIDTH // 4
+RECONCILE_RATE = 0.2
+# Predicted paddle ticks kept to replay the inputs the server has not applied yet
+PREDICTION_HISTORY = 240
+DELTA_HISTORY = 64
+KEYFRAME_INTERVAL = 120
+FONT_SIZE = 14
+TEXT_CACHE_SIZE = 64
+MAX_FRAME_TICKS = 5
+SPIN_MARGIN = 0.001
+PROFILE_WINDOW = 600
+PROFILE_DUMP_INTERVAL = 5.0
+PROFILE_HUD_INTERVAL = 0.5
+REPLAY_KEYFRAME_INTERVAL = 600
+REPLAY_BUFFER_SIZE = 65536
+SEND_CHUNK_SIZE = 65536
+# Session ids are fixed width (players are ordered by their id as strings)
+SESSION_BASE = 100000000
+# Random bytes of the token a player resumes its session with (the session id is public)
+RESUME_TOKEN_SIZE = 16
+# File descriptors kept out of the connection budget (listener, metrics, replay logs, selector...)
+FD_RESERVE = 32
+ACCEPT_BATCH = 64
+# Timer wheel: 1 ms ticks, 4 wheels of 64 slots (timers up to ~4.6 hours ahead without moving them again)
+TIMER_RESOLUTION = 0.001
+TIMER_WHEEL_BITS = 6
+TIMER_WHEEL_LEVELS = 4
 
 
 class Color(Enum):
@@ -46,3 +84,52 @@ class PaddleLocation(Enum):
     RIGHT = "right"
     TOP = "top"
     BOTTOM = "bottom"
+
+
+class ScaleMode(Enum):
+    """
+    How the arena is scaled to the window (once per resize)
+    """
+
+    SMOOTH = "smooth"
+    NEAREST = "nearest"
+    INTEGER = "integer"
+
+
+class Codec(Enum):
+    """
+    Wire codec (sent in every frame header)
+    """
+
+    JSON = 0
+    BINARY = 1
+
+
+class MessageType(Enum):
+    """
+    Wire message type
+    """
+
+    STATE = 1
+    WORLD = 2
+    SNAPSHOT = 3
+    JOIN = 4
+    DELTA = 5
+    ACK = 6
+    INPUT = 7
+    HEARTBEAT = 8
+    WELCOME = 9
+    QUEUED = 10
+    REJECT = 11
+
+
+class RejectReason(Enum):
+    """
+    Why the server turned a connection away
+    """
+
+    SERVER_FULL = 1
+    QUEUE_FULL = 2
+    NO_SPECTATING = 3
+    HANDSHAKE_TIMEOUT = 4
+    IDLE_TIMEOUT = 5
@@ -0,0 +1,125 @@
+from collections import deque
+
+from .constants import DELTA_HISTORY, KEYFRAME_INTERVAL, MessageType
+
+PATH_SEPARATOR = "/"
+MISSING = object()
+
+
+def flatten(message: dict, prefix: str = "", flat: dict = None) -> dict:
+    """
+    Flatten a nested message into {path: leaf}, lists are copied into tuples so later in place updates
+    of the source (e.g. ball.pos) don't leak into stored baselines
+    :param message: Message
+    :param prefix: Path of message
+    :param flat: Output dict
+    :return: {path: leaf}
+    """
+    flat = {} if flat is None else flat
+    for key, value in message.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flatten(value, path + PATH_SEPARATOR, flat)
+        else:
+            flat[path] = tuple(value) if isinstance(value, list) else value
+    return flat
+
+
+def unflatten(flat: dict) -> dict:
+    """
+    Rebuild a nested message from {path: leaf}
+    :param flat: {path: leaf}
+    :return: Message
+    """
+    message = {}
+    for path, value in flat.items():
+        *parents, key = path.split(PATH_SEPARATOR)
+        node = message
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[key] = list(value) if isinstance(value, tuple) else value
+    return message
+
+
+class DeltaEncoder:
+    """
+    Per client delta state: each message only carries the leaves changed since the last baseline
+    acknowledged by the client, with a full keyframe every KEYFRAME_INTERVAL messages or when no baseline is known
+    """
+
+    def __init__(self):
+        """
+        Initialize encoder
+        """
+        self.seq = 0
+        self.sent = deque(maxlen=DELTA_HISTORY)
+        self.baseline_seq = 0
+        self.baseline = None
+        self.since_keyframe = 0
+
+    def ack(self, seq: int):
+        """
+        Client has applied message seq, it becomes the baseline
+        :param seq: Sequence number
+        """
+        if seq <= self.baseline_seq:
+            return
+        while self.sent and self.sent[0][0] < seq:
+            self.sent.popleft()
+        if self.sent and self.sent[0][0] == seq:
+            self.baseline_seq, self.baseline = self.sent.popleft()
+
+    def encode(self, msg_type: MessageType, flat: dict) -> dict:
+        """
+        Build delta message
+        :param msg_type: Type of the full message
+        :param flat: Flattened full message
+        :return: Delta message
+        """
+        self.seq += 1
+        self.since_keyframe += 1
+        if self.baseline is None or self.since_keyframe >= KEYFRAME_INTERVAL:
+            base, changed, removed = 0, flat, []
+            self.since_keyframe = 0
+        else:
+            base, baseline = self.baseline_seq, self.baseline
+            changed = {path: value for path, value in flat.items() if baseline.get(path, MISSING) != value}
+            removed = [path for path in baseline if path not in flat]
+        self.sent.append((self.seq, flat))
+        return {"seq": self.seq, "base": base, "kind": msg_type.value, "set": changed, "del": removed}
+
+
+class DeltaDecoder:
+    """
+    Client side delta state: rebuilds full messages from keyframes and deltas
+    """
+
+    def __init__(self):
+        """
+        Initialize decoder
+        """
+        self.states = {}
+
+    def apply(self, delta: dict):
+        """
+        Apply delta message
+        :param delta: Delta message
+        :return: (message type, full message) or None if its baseline is unknown
+        """
+        if delta["base"]:
+            baseline = self.states.get(delta["base"])
+            if baseline is None:
+                return None
+            flat = dict(baseline)
+        else:
+            flat = {}
+        for path in delta["del"]:
+            flat.pop(path, None)
+        for path, value in delta["set"].items():
+            flat[path] = tuple(value) if isinstance(value, list) else value
+        for seq in [seq for seq in self.states if seq < delta["base"]]:
+            del self.states[seq]
+        self.states[delta["seq"]] = flat
+        while len(self.states) > DELTA_HISTORY:
+            del self.states[next(iter(self.states))]
+        return MessageType(delta["kind"]), unflatten(flat)
@@ -1,19 +1,34 @@
-import json
 import socket
 import sys
+import time
+from collections import deque
 
 from .ball import Ball
-from .config import SERVER_IP, SERVER_PORT
+from .collision import sweep_ball
+from .config import (
+    DELTA_UPDATES,
+    IDLE_TIMEOUT,
+    ROOM_ID,
+    ROOM_MAX_PLAYERS,
+    SERVER_IP,
+    SERVER_PORT,
+    SPECTATE,
+    WIRE_CODEC,
+)
 from .constants import (
-    BALL_RADIUS,
-    HALF_PAD_HEIGHT,
-    HEIGHT,
-    PAD_WIDTH,
-    WIDTH,
+    HEARTBEAT_INTERVAL,
+    PREDICTION_HISTORY,
+    RECONCILE_RATE,
+    TELEPORT_DISTANCE,
+    Codec,
+    MessageType,
     PaddleLocation,
     PaddlePosition,
 )
+from .network import NetworkClient
 from .paddle import Paddle
+from .registry import EntityRegistry
+from .simulation import move_paddle
 
 
 class Game:
@@ -25,30 +40,85 @@ class Game:
         """
         Initialize pong game
         """
-        self.me, self.conn = self.connect()
+        self.me = None
+        self.token = ""
+        self.network = self.join()
         self.max_players = 0
         self.paddle = None
-        self.other_paddles = []
+        self.registry = EntityRegistry()
         self.primary = False
         self.running = False
         self.server_data = {}
+        self.position = 0
+        self.authoritative = False
+        self.tick = 0
+        self.input_seq = 0
+        self.pending = deque()
+        self.acked = (0, 0)
+        self.frame = 0
+        self.history = deque(maxlen=PREDICTION_HISTORY)
+        self.last_sent_at = 0.0
         self.ball = Ball()
 
+    @property
+    def other_paddles(self) -> list:
+        """
+        Remote paddles (persistent list, rebuilt on join/leave only)
+        """
+        return self.registry.others
+
+    @property
+    def paddles(self) -> list:
+        """
+        Remote paddles and the own paddle (persistent list, rebuilt on join/leave only)
+        """
+        return self.registry.everyone
+
     @staticmethod
-    def connect():
+    def connect() -> socket.socket:
         """
-        Create connection with server
+        Create connection with server (the player id is the session id the server welcomes the client with)
         """
         try:
             conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             conn.connect((SERVER_IP, SERVER_PORT))
-            me = str(conn.getsockname()[1])
-            print(f"Client connected to {SERVER_IP}:{SERVER_PORT} with id: {me}")
-            return [me, conn]
+            print(f"Client connected to {SERVER_IP}:{SERVER_PORT}")
+            return conn
         except socket.error:
             print(f"Couldn't connect to game server in: {SERVER_IP}:{SERVER_PORT}")
             sys.exit(1)
 
+    def join(self) -> NetworkClient:
+        """
+        Connect and join the room, resuming the session if the client was already playing
+        :return: Network client
+        """
+        network = NetworkClient(self.connect(), Codec[WIRE_CODEC])
+        network.send(
+            MessageType.JOIN,
+            {
+                "room": ROOM_ID,
+                "max_players": ROOM_MAX_PLAYERS,
+                "delta": DELTA_UPDATES,
+                "spectate": SPECTATE,
+                "token": self.token,
+            },
+        )
+        return network
+
+    def reconnect(self) -> bool:
+        """
+        Connect again after losing the server, it holds the paddle of a player of a server simulated match
+        for RECONNECT_GRACE seconds
+        :return: False if the connection was closed on purpose, or there is no match to resume
+        """
+        if self.network.rejected or self.me is None or not self.authoritative or SPECTATE:
+            return False
+        print("Connection to game server lost, reconnecting")
+        self.network.close()
+        self.network = self.join()
+        return True
+
     def run(self):
         """
         Start game (can only be done by primary client)
@@ -69,6 +139,8 @@ class Game:
         Start/Pause game (can only be done by primary client)
         Game will start as soon as required number of players join
         """
+        if self.authoritative:
+            return
         if len(self.server_data.keys()) == self.max_players:
             self.run()
         else:
@@ -78,24 +150,74 @@ class Game:
         """
         Initialize player
         """
+        if self.me is None:
+            return
         if self.server_data:
             if self.me == sorted(self.server_data.keys())[0]:  # the first client connection
                 self.primary = True
-        if not self.paddle:
+        if not self.paddle and not self.authoritative:
             if self.primary or self.other_paddles:
                 other_loc = [_paddle.loc for _paddle in self.other_paddles]
                 if PaddleLocation.LEFT.value not in other_loc:
-                    self.paddle = Paddle(PaddlePosition.LEFT.value, PaddleLocation.LEFT.value, f"Player {self.me}")
+                    self.paddle = Paddle(
+                        list(PaddlePosition.LEFT.value), PaddleLocation.LEFT.value, f"Player {self.me}"
+                    )
                 elif PaddleLocation.RIGHT.value not in other_loc:
-                    self.paddle = Paddle(PaddlePosition.RIGHT.value, PaddleLocation.RIGHT.value, f"Player {self.me}")
+                    self.paddle = Paddle(
+                        list(PaddlePosition.RIGHT.value), PaddleLocation.RIGHT.value, f"Player {self.me}"
+                    )
                 elif PaddleLocation.TOP.value not in other_loc:
-                    self.paddle = Paddle(PaddlePosition.TOP.value, PaddleLocation.TOP.value, f"Player {self.me}")
+                    self.paddle = Paddle(list(PaddlePosition.TOP.value), PaddleLocation.TOP.value, f"Player {self.me}")
                 elif PaddleLocation.BOTTOM.value not in other_loc:
-                    self.paddle = Paddle(PaddlePosition.BOTTOM.value, PaddleLocation.BOTTOM.value, f"Player {self.me}")
+                    self.paddle = Paddle(
+                        list(PaddlePosition.BOTTOM.value), PaddleLocation.BOTTOM.value, f"Player {self.me}"
+                    )
+                self.registry.set_own(self.paddle)
+
+    def send_input(self, direction: int, pressed: bool):
+        """
+        Send a sequenced paddle command to the server simulation (the paddle state is only sent when clients simulate)
+        :param direction: -1 (up/left) or 1 (down/right)
+        :param pressed: Key press or release
+        """
+        if self.authoritative:
+            self.input_seq += 1
+            self.pending.append((self.input_seq, self.frame))
+            self.network.send(
+                MessageType.INPUT,
+                {"seq": self.input_seq, "tick": self.tick, "direction": direction, "pressed": pressed},
+            )
+            self.last_sent_at = time.monotonic()
+
+    def sync(self):
+        """
+        Exchange data with the server and take the players it reports
+        """
+        self.store_previous()
+        self.update_server_data()
+        self.update_multiplayer_data()
+        self.define_player()
+        self.run_pause()
+
+    def simulate(self):
+        """
+        Move the locally simulated entities by one tick
+        """
+        self.update_paddle_pos()
+        self.update_ball_pos()
+
+    def store_previous(self):
+        """
+        Remember the positions at the start of the tick, the render interpolates from them
+        """
+        self.ball.prev[0], self.ball.prev[1] = self.ball.pos
+        for _paddle in self.paddles:
+            _paddle.prev[0], _paddle.prev[1] = _paddle.pos
 
     def update_server_data(self):
         """
-        Send and receive server data
+        Queue player state (or a heartbeat when the server simulates) and take the latest server data
+        received by the network pump (never blocks)
         """
         data = {}
         if self.paddle:
@@ -111,199 +233,147 @@ class Game:
                 "primary": self.primary,
                 "name": self.paddle.name,
             }
-        self.conn.send(json.dumps(data).encode("utf-8"))
-        server_data = json.loads(self.conn.recv(2000).decode("utf-8"))
+        if not self.network.closed and time.monotonic() - self.network.heard > IDLE_TIMEOUT:
+            self.network.closed = True
+        if self.network.closed and not self.reconnect():
+            if self.network.rejected:
+                print(f"Game server rejected the connection: {self.network.rejected.name.lower()}")
+            else:
+                print("Game server closed the connection")
+            sys.exit(1)
+        self.admission()
+        now = time.monotonic()
+        if not self.authoritative:
+            self.network.send(MessageType.STATE, data)
+        elif now - self.last_sent_at >= HEARTBEAT_INTERVAL:
+            self.network.send(MessageType.HEARTBEAT, {})
+            self.last_sent_at = now
+        latest = self.network.poll()
+        if latest is None:
+            return
+        msg_type, server_data = latest
+        if msg_type == MessageType.SNAPSHOT:
+            self.apply_snapshot(server_data)
         self.max_players = (
             server_data["max_players"] if server_data and "max_players" in server_data else self.max_players
         )
         self.server_data = server_data["players"] if server_data and "players" in server_data else self.server_data
 
+    def admission(self):
+        """
+        Take the session id (and the token to resume it with) once the server welcomed the client, report the wait
+        queue position until then. A client reconnecting too late is welcomed with a new session id, and a new paddle.
+        """
+        if self.network.session is not None and self.network.session != self.me:
+            if self.me is not None:
+                self.paddle = None
+                self.registry.set_own(None)
+            self.me, self.token = self.network.session, self.network.token
+            print(f"Joined room {ROOM_ID} with id: {self.me}")
+        elif self.network.position != self.position:
+            self.position = self.network.position
+            if self.position:
+                print(f"Room {ROOM_ID} is full, waiting for a free slot: position {self.position}")
+
+    def apply_snapshot(self, snapshot: dict):
+        """
+        Take ball and match state from a server simulation snapshot
+        :param snapshot: Server snapshot
+        """
+        self.authoritative = True
+        self.tick = snapshot["tick"]
+        self.running = snapshot["running"]
+        self.ball.vel = snapshot["ball"]["vel"]
+        if self.me in snapshot["players"]:
+            paddle_data = snapshot["players"][self.me]["paddle"]
+            if not self.paddle:
+                self.paddle = Paddle(list(paddle_data["pos"]), paddle_data["loc"], paddle_data["name"])
+                self.registry.set_own(self.paddle)
+            else:
+                self.reconcile(snapshot["tick"], snapshot["players"][self.me])
+
+    def reconcile(self, tick: int, player: dict):
+        """
+        Rebase the predicted paddle on the server position, then replay the ticks predicted since that position
+        with the velocities used then (they hold the inputs the server has not applied yet).
+        The last input the server applied maps its tick to a local frame, both advance at the same rate.
+        Without such an input (or past the history), the paddle is pulled towards the server position instead,
+        once the server applied every input sent.
+        :param tick: Server tick of the snapshot
+        :param player: Own player in the snapshot
+        """
+        input_seq = player.get("input_seq", 0)
+        while self.pending and self.pending[0][0] <= input_seq:
+            self.acked = self.pending.popleft()
+        server_pos = player["paddle"]["pos"]
+        seq, frame = self.acked
+        replayed = self.frame - frame - (tick - player.get("input_tick", 0))
+        if input_seq and seq == input_seq and 0 <= replayed <= len(self.history):
+            vel = self.paddle.vel
+            self.paddle.pos[0], self.paddle.pos[1] = server_pos
+            for index in range(len(self.history) - replayed, len(self.history)):
+                self.paddle.vel = self.history[index]
+                move_paddle(self.paddle)
+            self.paddle.vel = vel
+            return
+        if self.pending:
+            return
+        axis = 1 if self.paddle.loc in [PaddleLocation.LEFT.value, PaddleLocation.RIGHT.value] else 0
+        error = server_pos[axis] - self.paddle.pos[axis]
+        if abs(error) > TELEPORT_DISTANCE:
+            self.paddle.pos[axis] = server_pos[axis]
+        else:
+            self.paddle.pos[axis] += round(error * RECONCILE_RATE)
+
+    def interpolate(self):
+        """
+        Place the ball and remote paddles at their interpolated positions (server simulation only),
+        they are drawn as sampled instead of being blended between ticks
+        """
+        if not self.authoritative:
+            return
+        sample = self.network.snapshots.sample(time.monotonic())
+        if sample:
+            self.ball.pos, paddles = sample
+            self.ball.prev[0], self.ball.prev[1] = self.ball.pos
+            for _paddle in self.other_paddles:
+                pos = paddles.get(_paddle.loc)
+                if pos:
+                    _paddle.pos[0], _paddle.pos[1] = pos
+                    _paddle.prev[0], _paddle.prev[1] = pos
+
     def update_multiplayer_data(self):
         """
-        Update other players data
+        Update other players data (in place, nothing is done until new server data arrives)
         """
-        self.other_paddles = []
-        for player_id in self.server_data.keys():
+        if self.server_data is self.registry.synced:
+            return
+        self.registry.sync(self.server_data, self.me)
+        for player_id, player_data in self.server_data.items():
             if player_id != self.me:
-                player_data = self.server_data[player_id]
                 if "primary" in player_data and player_data["primary"] and "running" in player_data:
                     self.running = player_data["running"]
-                if "paddle" in player_data:
-                    self.other_paddles.append(
-                        Paddle(
-                            player_data["paddle"]["pos"],
-                            player_data["paddle"]["loc"],
-                            player_data["paddle"]["name"],
-                            player_data["paddle"]["vel"],
-                        )
-                    )
                 if not self.primary and "primary" in player_data and player_data["primary"] and "ball" in player_data:
                     self.ball.pos = player_data["ball"]["pos"]
                     self.ball.vel = player_data["ball"]["vel"]
 
-    @classmethod
-    def validate_left_paddle_pos(cls, paddle: Paddle):
-        """
-        Validate left paddle position
-        :param paddle: Paddle object
-        """
-        if paddle.pos[1] < HALF_PAD_HEIGHT:
-            paddle.pos[1] = HALF_PAD_HEIGHT
-        elif paddle.pos[1] > HEIGHT - HALF_PAD_HEIGHT:
-            paddle.pos[1] = HEIGHT - HALF_PAD_HEIGHT
-
-    @classmethod
-    def validate_right_paddle_pos(cls, paddle: Paddle):
-        """
-        Validate right paddle position
-        :param paddle: Paddle object
-        """
-        if paddle.pos[1] < HALF_PAD_HEIGHT:
-            paddle.pos[1] = HALF_PAD_HEIGHT
-        elif paddle.pos[1] > HEIGHT - HALF_PAD_HEIGHT:
-            paddle.pos[1] = HEIGHT - HALF_PAD_HEIGHT
-
-    @classmethod
-    def validate_top_paddle_pos(cls, paddle: Paddle):
-        """
-        Validate top paddle position
-        :param paddle: Paddle object
-        """
-        if paddle.pos[0] < HALF_PAD_HEIGHT:
-            paddle.pos[0] = HALF_PAD_HEIGHT
-        elif paddle.pos[0] > WIDTH - HALF_PAD_HEIGHT:
-            paddle.pos[0] = HEIGHT - HALF_PAD_HEIGHT
-
-    @classmethod
-    def validate_bottom_paddle_pos(cls, paddle: Paddle):
-        """
-        Validate bottom paddle position
-        :param paddle: Paddle object
-        """
-        if paddle.pos[0] < HALF_PAD_HEIGHT:
-            paddle.pos[0] = HALF_PAD_HEIGHT
-        elif paddle.pos[0] > WIDTH - HALF_PAD_HEIGHT:
-            paddle.pos[0] = HEIGHT - HALF_PAD_HEIGHT
-
     def update_paddle_pos(self):
         """
-        Update paddle position
+        Update paddle position (only the own paddle is predicted when the server runs the simulation)
         """
-        for _paddle in self.other_paddles + [self.paddle]:
-            if _paddle.loc in [PaddleLocation.LEFT.value, PaddleLocation.RIGHT.value]:
-                _paddle.pos[1] += _paddle.vel
-            else:
-                _paddle.pos[0] += _paddle.vel
-            getattr(Game, f"validate_{_paddle.loc}_paddle_pos")(_paddle)
+        if not self.authoritative:
+            for _paddle in self.other_paddles:
+                move_paddle(_paddle)
+        if self.paddle:
+            move_paddle(self.paddle)
+            self.frame += 1
+            self.history.append(self.paddle.vel)
 
     def update_ball_pos(self):
         """
-        Update ball position (Can be done only by primary client)
-        """
-        if self.running and self.primary:
-            self.ball.pos[0] += int(self.ball.vel[0])
-            self.ball.pos[1] += int(self.ball.vel[1])
-
-    def check_ball_collision_left_pos(self, paddle: Paddle):
-        """
-        Check ball collision on left edge
-        :param paddle: Paddle object
-        """
-        if int(self.ball.pos[0]) <= BALL_RADIUS + PAD_WIDTH and int(self.ball.pos[1]) in range(
-            paddle.pos[1] - HALF_PAD_HEIGHT, paddle.pos[1] + HALF_PAD_HEIGHT, 1
-        ):
-            self.ball.vel[0] = -self.ball.vel[0]
-            self.ball.vel[0] *= 1.1
-            self.ball.vel[1] *= 1.1
-        elif int(self.ball.pos[0]) <= BALL_RADIUS + PAD_WIDTH:
-            self.ball = Ball()
-
-    def check_ball_collision_right_pos(self, paddle: Paddle):
-        """
-        Check ball collision on right edge
-        :param paddle: Paddle object
-        """
-        if int(self.ball.pos[0]) >= WIDTH + 1 - BALL_RADIUS - PAD_WIDTH and int(self.ball.pos[1]) in range(
-            paddle.pos[1] - HALF_PAD_HEIGHT, paddle.pos[1] + HALF_PAD_HEIGHT, 1
-        ):
-            self.ball.vel[0] = -self.ball.vel[0]
-            self.ball.vel[0] *= 1.1
-            self.ball.vel[1] *= 1.1
-        elif int(self.ball.pos[0]) >= WIDTH + 1 - BALL_RADIUS - PAD_WIDTH:
-            self.ball = Ball()
-
-    def check_ball_collision_top_pos(self, paddle: Paddle):
-        """
-        Check ball collision on top edge
-        :param paddle: Paddle object
-        """
-        if int(self.ball.pos[1]) <= BALL_RADIUS + PAD_WIDTH and int(self.ball.pos[0]) in range(
-            paddle.pos[0] - HALF_PAD_HEIGHT, paddle.pos[0] + HALF_PAD_HEIGHT, 1
-        ):
-            self.ball.vel[1] = -self.ball.vel[1]
-            self.ball.vel[0] *= 1.1
-            self.ball.vel[1] *= 1.1
-        elif int(self.ball.pos[1]) <= BALL_RADIUS + PAD_WIDTH:
-            self.ball = Ball()
-
-    def check_ball_collision_bottom_pos(self, paddle: Paddle):
-        """
-        Check ball collision on bottom edge
-        :param paddle: Paddle object
-        """
-        if int(self.ball.pos[1]) >= HEIGHT + 1 - BALL_RADIUS - PAD_WIDTH and int(self.ball.pos[0]) in range(
-            paddle.pos[0] - HALF_PAD_HEIGHT, paddle.pos[0] + HALF_PAD_HEIGHT, 1
-        ):
-            self.ball.vel[1] = -self.ball.vel[1]
-            self.ball.vel[0] *= 1.1
-            self.ball.vel[1] *= 1.1
-        elif int(self.ball.pos[1]) >= HEIGHT + 1 - BALL_RADIUS - PAD_WIDTH:
-            self.ball = Ball()
-
-    def check_left_collision(self):
-        """
-        Check if ball can bounce from left edge
-        """
-        loc = [_paddle.loc for _paddle in self.other_paddles + [self.paddle]]
-        if PaddleLocation.LEFT.value not in loc:
-            if int(self.ball.pos[0]) <= PAD_WIDTH + BALL_RADIUS:
-                self.ball.vel[0] = -self.ball.vel[0]
-
-    def check_right_collision(self):
-        """
-        Check if ball can bounce from right edge
-        """
-        loc = [_paddle.loc for _paddle in self.other_paddles + [self.paddle]]
-        if PaddleLocation.RIGHT.value not in loc:
-            if int(self.ball.pos[0]) >= WIDTH + 1 - PAD_WIDTH - BALL_RADIUS:
-                self.ball.vel[0] = -self.ball.vel[0]
-
-    def check_top_collision(self):
-        """
-        Check if ball can bounce from top edge
-        """
-        loc = [_paddle.loc for _paddle in self.other_paddles + [self.paddle]]
-        if PaddleLocation.TOP.value not in loc:
-            if int(self.ball.pos[1]) <= PAD_WIDTH + BALL_RADIUS:
-                self.ball.vel[1] = -self.ball.vel[1]
-
-    def check_bottom_collision(self):
-        """
-        Check if ball can bounce from bottom edge
-        """
-        loc = [_paddle.loc for _paddle in self.other_paddles + [self.paddle]]
-        if PaddleLocation.BOTTOM.value not in loc:
-            if int(self.ball.pos[1]) >= HEIGHT + 1 - PAD_WIDTH - BALL_RADIUS:
-                self.ball.vel[1] = -self.ball.vel[1]
-
-    def check_ball_collision(self):
-        """
-        Check ball collisions with paddle or edges (Can be checked by primary client only)
+        Move the ball and resolve its collisions with paddles and edges, swept like the server simulation
+        so a fast ball can't tunnel through a paddle (Can be done only by primary client, unless the server runs
+        the simulation)
         """
-        if self.primary:
-            self.check_left_collision()
-            self.check_right_collision()
-            self.check_top_collision()
-            self.check_bottom_collision()
-            for _paddle in self.other_paddles + [self.paddle]:
-                getattr(self, f"check_ball_collision_{_paddle.loc}_pos")(_paddle)
+        if self.running and self.primary and not self.authoritative:
+            self.ball = sweep_ball(self.ball, self.paddles)
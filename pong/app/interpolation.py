@@ -0,0 +1,74 @@
+import threading
+from collections import deque
+
+from .constants import (
+    EXTRAPOLATION_LIMIT,
+    INTERPOLATION_DELAY,
+    SNAPSHOT_BUFFER_SIZE,
+    TELEPORT_DISTANCE,
+)
+
+
+def lerp(start: list, end: list, fraction: float) -> list:
+    """
+    Linear interpolation between two positions
+    :param start: Start position
+    :param end: End position
+    :param fraction: 0 returns start, 1 returns end, above 1 extrapolates
+    :return: Position
+    """
+    if abs(end[0] - start[0]) + abs(end[1] - start[1]) > TELEPORT_DISTANCE:
+        return list(end)  # served again or re-joined, don't slide across the arena
+    return [round(start[0] + (end[0] - start[0]) * fraction), round(start[1] + (end[1] - start[1]) * fraction)]
+
+
+class SnapshotBuffer:
+    """
+    Timestamped server snapshots, sampled slightly in the past so remote entities can be interpolated
+    """
+
+    def __init__(self, delay: float = INTERPOLATION_DELAY, size: int = SNAPSHOT_BUFFER_SIZE):
+        """
+        Initialize buffer
+        :param delay: Render delay behind the newest snapshot in seconds
+        :param size: Number of snapshots kept
+        """
+        self.delay = delay
+        self.snapshots = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def push(self, received_at: float, snapshot: dict):
+        """
+        Store snapshot entity positions
+        :param received_at: Monotonic receive time
+        :param snapshot: Server snapshot
+        """
+        paddles = {player["paddle"]["loc"]: player["paddle"]["pos"] for player in snapshot["players"].values()}
+        with self.lock:
+            self.snapshots.append((received_at, snapshot["ball"]["pos"], paddles))
+
+    def sample(self, now: float):
+        """
+        Entity positions at render time (now - delay), extrapolated for a short while when snapshots are late
+        :param now: Monotonic time
+        :return: (ball position, {paddle location: position}) or None
+        """
+        with self.lock:
+            snapshots = list(self.snapshots)
+        if not snapshots:
+            return None
+        render_time = now - self.delay
+        if len(snapshots) == 1 or render_time <= snapshots[0][0]:
+            return snapshots[0][1], snapshots[0][2]
+        older, newer = snapshots[-2], snapshots[-1]
+        for index in range(len(snapshots) - 1, 0, -1):
+            if snapshots[index - 1][0] <= render_time:
+                older, newer = snapshots[index - 1], snapshots[index]
+                break
+        span = newer[0] - older[0]
+        if span <= 0:
+            return newer[1], newer[2]
+        render_time = min(render_time, newer[0] + EXTRAPOLATION_LIMIT)
+        fraction = (render_time - older[0]) / span
+        paddles = {loc: lerp(older[2][loc], pos, fraction) if loc in older[2] else pos for loc, pos in newer[2].items()}
+        return lerp(older[1], newer[1], fraction), paddles
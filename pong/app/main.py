@@ -3,6 +3,8 @@ import pygame
 from .game_window import GameWindow
 from .movement import Movement
 
+PROFILER_KEY = pygame.K_F3
+
 
 class Main:
     """
@@ -23,7 +25,9 @@ class Main:
         while is_open:
             self.game_window.draw()
             for event in self.game_window.window.update():
-                if event.type == pygame.KEYDOWN:
+                if event.type == pygame.KEYDOWN and event.key == PROFILER_KEY:
+                    self.game_window.profiler.toggle_hud()
+                elif event.type == pygame.KEYDOWN:
                     Movement.key_down(event, self.game_window.game)
                 elif event.type == pygame.KEYUP:
                     Movement.key_up(event, self.game_window.game)
@@ -0,0 +1,342 @@
+import selectors
+import socket
+import time
+from bisect import bisect_left
+
+# Histogram upper bounds in seconds (Prometheus "le"), the last bucket is +Inf
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+REQUEST_LIMIT = 8192
+SCRAPE_TIMEOUT = 1.0
+
+
+def format_labels(labels: tuple, extra: str = "") -> str:
+    """
+    Prometheus label set
+    :param labels: ((name, value), ...)
+    :param extra: Already formatted label appended to the set (histogram "le")
+    :return: {name="value",...} or "" without labels
+    """
+    pairs = [f'{name}="{value}"' for name, value in labels]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """
+    Monotonic counter, one value per label set
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        """
+        Initialize counter
+        :param name: Metric name
+        :param help_text: Metric description
+        """
+        self.name = name
+        self.help = help_text
+        self.values = {}
+
+    def inc(self, amount: float = 1, labels: tuple = ()):
+        """
+        Increment counter
+        :param amount: Increment
+        :param labels: ((name, value), ...), pass prebuilt tuples on hot paths
+        """
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def snapshot(self):
+        """
+        Current value(s)
+        :return: Value, or {label set: value} when labelled
+        """
+        if all(not labels for labels in self.values):
+            return self.values.get((), 0)
+        return {format_labels(labels): value for labels, value in self.values.items()}
+
+    def lines(self) -> list:
+        """
+        Prometheus samples
+        :return: Text lines
+        """
+        if not self.values:
+            return [f"{self.name} 0"]
+        return [f"{self.name}{format_labels(labels)} {value}" for labels, value in self.values.items()]
+
+
+class Gauge:
+    """
+    Value read when metrics are collected (room/player counts, per connection totals...)
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, read):
+        """
+        Initialize gauge
+        :param name: Metric name
+        :param help_text: Metric description
+        :param read: Callable returning a value, or {labels tuple: value}
+        """
+        self.name = name
+        self.help = help_text
+        self.read = read
+
+    def snapshot(self):
+        """
+        Current value(s)
+        :return: Value, or {label set: value} when labelled
+        """
+        value = self.read()
+        if isinstance(value, dict):
+            return {format_labels(labels): sample for labels, sample in value.items()}
+        return value
+
+    def lines(self) -> list:
+        """
+        Prometheus samples
+        :return: Text lines
+        """
+        value = self.read()
+        if isinstance(value, dict):
+            return [f"{self.name}{format_labels(labels)} {sample}" for labels, sample in value.items()]
+        return [f"{self.name} {value}"]
+
+
+class Histogram:
+    """
+    Distribution over fixed buckets, one series per label set
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS):
+        """
+        Initialize histogram
+        :param name: Metric name
+        :param help_text: Metric description
+        :param buckets: Sorted bucket upper bounds
+        """
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, value: float, labels: tuple = ()):
+        """
+        Record a value
+        :param value: Observed value
+        :param labels: ((name, value), ...), pass prebuilt tuples on hot paths
+        """
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Count and sum of every series
+        :return: {label set: {"count": n, "sum": total}}
+        """
+        return {
+            format_labels(labels): {"count": count, "sum": total} for labels, (_, total, count) in self.series.items()
+        }
+
+    def lines(self) -> list:
+        """
+        Prometheus samples (cumulative buckets)
+        :return: Text lines
+        """
+        lines = []
+        for labels, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{format_labels(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {count}")
+        return lines
+
+
+class Metrics:
+    """
+    Metric registry: updated in process, read with snapshot() or scraped in Prometheus text format
+    """
+
+    def __init__(self):
+        """
+        Initialize registry
+        """
+        self.metrics = []
+        self.started = time.time()
+        self.gauge("process_start_time_seconds", "Start time of the process since unix epoch", lambda: self.started)
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        """
+        Register a counter
+        :param name: Metric name
+        :param help_text: Metric description
+        :return: Counter
+        """
+        self.metrics.append(Counter(name, help_text))
+        return self.metrics[-1]
+
+    def gauge(self, name: str, help_text: str, read) -> Gauge:
+        """
+        Register a gauge
+        :param name: Metric name
+        :param help_text: Metric description
+        :param read: Callable returning a value, or {labels tuple: value}
+        :return: Gauge
+        """
+        self.metrics.append(Gauge(name, help_text, read))
+        return self.metrics[-1]
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Register a histogram
+        :param name: Metric name
+        :param help_text: Metric description
+        :param buckets: Sorted bucket upper bounds
+        :return: Histogram
+        """
+        self.metrics.append(Histogram(name, help_text, buckets))
+        return self.metrics[-1]
+
+    def snapshot(self) -> dict:
+        """
+        Current values, without formatting the Prometheus text
+        :return: {metric name: value}
+        """
+        return {metric.name: metric.snapshot() for metric in self.metrics}
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4)
+        :return: Text
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.lines())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsEndpoint:
+    """
+    Minimal HTTP endpoint serving GET /metrics, driven by the game server selector:
+    requests are read and replies written without blocking, a reply is buffered and written as the scraper reads it,
+    a scraper not done within SCRAPE_TIMEOUT is disconnected
+    """
+
+    def __init__(self, metrics: Metrics, host: str, port: int):
+        """
+        Initialize endpoint
+        :param metrics: Metric registry
+        :param host: Listen host
+        :param port: Listen port
+        """
+        self.metrics = metrics
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((host, port))
+        self.listener.listen(socket.SOMAXCONN)
+        self.listener.setblocking(False)
+        self.selector = None
+        self.timers = None
+        # scraper socket -> [request bytes, reply left to write (None until the request is complete), timeout timer]
+        self.scrapers = {}
+
+    def register(self, selector: selectors.BaseSelector, timers):
+        """
+        Listen through the server selector, its events carry the endpoint as data
+        :param selector: Server selector
+        :param timers: Server timer wheel
+        """
+        self.selector = selector
+        self.timers = timers
+        selector.register(self.listener, selectors.EVENT_READ, data=self)
+
+    def on_event(self, conn: socket.socket, mask: int):
+        """
+        Accept a scraper, read its request or write its reply
+        :param conn: Ready socket
+        :param mask: Selector events
+        """
+        if conn is self.listener:
+            try:
+                client, _ = self.listener.accept()
+            except OSError:
+                return
+            client.setblocking(False)
+            self.scrapers[client] = [b"", None, self.timers.call_later(SCRAPE_TIMEOUT, self.close, client)]
+            self.selector.register(client, selectors.EVENT_READ, data=self)
+            return
+        scraper = self.scrapers[conn]
+        if mask & selectors.EVENT_WRITE:
+            self.write(conn, scraper)
+            return
+        try:
+            data = conn.recv(REQUEST_LIMIT)
+        except OSError:
+            data = b""
+        if not data:
+            self.close(conn)
+            return
+        request = scraper[0] = scraper[0] + data
+        if b"\r\n\r\n" not in request and len(request) < REQUEST_LIMIT:
+            return
+        scraper[1] = memoryview(self.reply(request))
+        self.selector.modify(conn, selectors.EVENT_WRITE, data=self)
+        self.write(conn, scraper)
+
+    def write(self, conn: socket.socket, scraper: list):
+        """
+        Write as much of a reply as the socket takes, the scraper is disconnected once it is all written
+        :param conn: Scraper socket
+        :param scraper: Scraper state
+        """
+        try:
+            sent = conn.send(scraper[1])
+        except BlockingIOError:
+            return
+        except OSError:
+            sent = len(scraper[1])
+        scraper[1] = scraper[1][sent:]
+        if not scraper[1]:
+            self.close(conn)
+
+    def close(self, conn: socket.socket):
+        """
+        Disconnect a scraper (no op if it is already disconnected)
+        :param conn: Scraper socket
+        """
+        scraper = self.scrapers.pop(conn, None)
+        if scraper is None:
+            return
+        scraper[2].cancel()
+        self.selector.unregister(conn)
+        conn.close()
+
+    def reply(self, request: bytes) -> bytes:
+        """
+        Build the answer to a request
+        :param request: Request bytes
+        :return: HTTP response
+        """
+        parts = request.split(b" ", 2)
+        if len(parts) > 1 and parts[0] == b"GET" and parts[1].split(b"?")[0] == b"/metrics":
+            status, body = "200 OK", self.metrics.render().encode()
+        else:
+            status, body = "404 Not Found", b"GET /metrics\n"
+        head = (
+            f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+        )
+        return head.encode() + body
@@ -16,16 +16,10 @@ class Movement:
         :param event: Event
         :param game: Game object
         """
-        if game.paddle.loc in [PaddleLocation.LEFT.value, PaddleLocation.RIGHT.value]:
-            if event.key == pygame.K_UP:
-                game.paddle.vel = -Velocity.PADDLE.value
-            elif event.key == pygame.K_DOWN:
-                game.paddle.vel = Velocity.PADDLE.value
-        else:
-            if event.key == pygame.K_LEFT:
-                game.paddle.vel = -Velocity.PADDLE.value
-            elif event.key == pygame.K_RIGHT:
-                game.paddle.vel = Velocity.PADDLE.value
+        direction = cls.direction(event, game)
+        if direction:
+            game.paddle.vel = direction * Velocity.PADDLE.value
+            game.send_input(direction, True)
 
     @classmethod
     def key_up(cls, event: pygame.event, game: Game):
@@ -34,13 +28,24 @@ class Movement:
         :param event: Event
         :param game: Game object
         """
-        if game.paddle.loc in [PaddleLocation.LEFT.value, PaddleLocation.RIGHT.value]:
-            if (event.key == pygame.K_UP and game.paddle.vel == -Velocity.PADDLE.value) or (
-                event.key == pygame.K_DOWN and game.paddle.vel == Velocity.PADDLE.value
-            ):
+        direction = cls.direction(event, game)
+        if direction:
+            if game.paddle.vel == direction * Velocity.PADDLE.value:
                 game.paddle.vel = 0
+            game.send_input(direction, False)
+
+    @classmethod
+    def direction(cls, event: pygame.event, game: Game) -> int:
+        """
+        Paddle direction of a key
+        :param event: Event
+        :param game: Game object
+        :return: -1 (up/left), 1 (down/right) or 0 if the key doesn't move the paddle
+        """
+        if game.paddle is None:
+            return 0
+        if game.paddle.loc in [PaddleLocation.LEFT.value, PaddleLocation.RIGHT.value]:
+            keys = {pygame.K_UP: -1, pygame.K_DOWN: 1}
         else:
-            if (event.key == pygame.K_LEFT and game.paddle.vel == -Velocity.PADDLE.value) or (
-                event.key == pygame.K_RIGHT and game.paddle.vel == Velocity.PADDLE.value
-            ):
-                game.paddle.vel = 0
+            keys = {pygame.K_LEFT: -1, pygame.K_RIGHT: 1}
+        return keys.get(event.key, 0)
@@ -0,0 +1,119 @@
+import queue
+import socket
+import threading
+import time
+
+from .constants import BUFFER_SIZE, Codec, MessageType, RejectReason
+from .delta import DeltaDecoder
+from .interpolation import SnapshotBuffer
+from .protocol import MessageStream, ProtocolError
+
+
+class NetworkClient:
+    """
+    Background network pump.
+    Frames are written by a sender thread from an outbound queue and read by a receiver thread that keeps only
+    the most recent server state, so the render loop never blocks on the socket.
+    """
+
+    def __init__(self, conn: socket.socket, codec: Codec):
+        """
+        Initialize and start network threads
+        :param conn: Connected server socket
+        :param codec: Wire codec
+        """
+        self.conn = conn
+        self.stream = MessageStream(codec)
+        self.outbound = queue.Queue()
+        self.send_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.deltas = DeltaDecoder()
+        self.latest = None
+        self.snapshots = SnapshotBuffer()
+        self.session = None
+        self.token = ""
+        self.position = 0
+        self.rejected = None
+        self.heard = time.monotonic()
+        self.closed = False
+        threading.Thread(target=self.receive_loop, name="pong-receive", daemon=True).start()
+        threading.Thread(target=self.send_loop, name="pong-send", daemon=True).start()
+
+    def send(self, msg_type: MessageType, message: dict):
+        """
+        Queue message (encoded right away, so later changes to the message do not race with the sender)
+        :param msg_type: Message type
+        :param message: Message
+        """
+        with self.send_lock:
+            self.outbound.put(self.stream.encode(msg_type, message))
+
+    def poll(self):
+        """
+        Most recent server state received since the last poll
+        :return: (message type, message) or None
+        """
+        with self.lock:
+            latest, self.latest = self.latest, None
+        return latest
+
+    def close(self):
+        """
+        Close the connection and wake both threads up so they stop (shutting the socket down interrupts the
+        receiver blocked in recv, closing it does not)
+        """
+        self.closed = True
+        self.outbound.put(None)
+        try:
+            self.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.conn.close()
+
+    def send_loop(self):
+        """
+        Write queued frames, coalescing everything pending into one syscall, until closed
+        """
+        while not self.closed:
+            frames = [self.outbound.get()]
+            while not self.outbound.empty():
+                frames.append(self.outbound.get_nowait())
+            if None in frames:
+                return
+            try:
+                self.conn.sendall(b"".join(frames))
+            except OSError:
+                self.closed = True
+
+    def receive_loop(self):
+        """
+        Read frames, keep the latest world/snapshot message and the admission replies
+        """
+        while not self.closed:
+            try:
+                received = self.conn.recv(BUFFER_SIZE)
+                messages = self.stream.feed(received) if received else None
+            except (OSError, ProtocolError):
+                messages = None
+            if messages is None:
+                self.closed = True
+                return
+            self.heard = time.monotonic()
+            for msg_type, message in messages:
+                if msg_type == MessageType.DELTA:
+                    seq, full = message["seq"], self.deltas.apply(message)
+                    if full is None:
+                        continue
+                    self.send(MessageType.ACK, {"seq": seq})
+                    msg_type, message = full
+                if msg_type == MessageType.SNAPSHOT:
+                    self.snapshots.push(time.monotonic(), message)
+                if msg_type in (MessageType.WORLD, MessageType.SNAPSHOT):
+                    with self.lock:
+                        self.latest = (msg_type, message)
+                elif msg_type == MessageType.WELCOME:
+                    self.position, self.session, self.token = 0, str(message["session"]), message.get("token", "")
+                elif msg_type == MessageType.QUEUED:
+                    self.position = message["position"]
+                elif msg_type == MessageType.REJECT:
+                    self.rejected = RejectReason(message["reason"])
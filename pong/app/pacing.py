@@ -0,0 +1,79 @@
+import time
+
+from .constants import MAX_FRAME_TICKS, SPIN_MARGIN
+
+
+class FixedTimestep:
+    """
+    Accumulator running the simulation at a fixed rate whatever the frame rate:
+    each frame runs the ticks that became due, and the leftover fraction of a tick is used to interpolate the render
+    """
+
+    def __init__(self, rate: int, max_ticks: int = MAX_FRAME_TICKS):
+        """
+        Initialize timestep
+        :param rate: Simulation ticks per second
+        :param max_ticks: Maximum ticks run in one frame, time beyond that is dropped (slow machines slow down
+        instead of spiralling)
+        """
+        self.interval = 1 / rate
+        self.max_ticks = max_ticks
+        self.accumulator = 0.0
+        self.last = None
+
+    def ticks(self) -> int:
+        """
+        Number of ticks due since the previous frame
+        :return: Ticks to run
+        """
+        now = time.perf_counter()
+        if self.last is None:
+            self.last = now - self.interval
+        self.accumulator += now - self.last
+        self.last = now
+        ticks = int(self.accumulator // self.interval)
+        if ticks > self.max_ticks:
+            ticks = self.max_ticks
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= ticks * self.interval
+        return ticks
+
+    @property
+    def alpha(self) -> float:
+        """
+        Fraction of the next tick already elapsed
+        :return: 0 <= alpha < 1
+        """
+        return min(self.accumulator / self.interval, 1.0)
+
+
+class FramePacer:
+    """
+    Frame budget: sleeps until the next frame is due and only spins for the last SPIN_MARGIN,
+    so a capped frame rate neither oversleeps nor burns a core
+    """
+
+    def __init__(self, fps: int):
+        """
+        Initialize pacer
+        :param fps: Maximum frames per second (0 doesn't wait)
+        """
+        self.budget = 1 / fps if fps else 0
+        self.deadline = None
+
+    def wait(self):
+        """
+        Wait for the end of the current frame budget
+        """
+        if not self.budget:
+            return
+        now = time.perf_counter()
+        if self.deadline is None or now - self.deadline > self.budget:
+            self.deadline = now
+        self.deadline += self.budget
+        remaining = self.deadline - now
+        if remaining > SPIN_MARGIN:
+            time.sleep(remaining - SPIN_MARGIN)
+        while time.perf_counter() < self.deadline:
+            pass
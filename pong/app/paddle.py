@@ -3,8 +3,11 @@ class Paddle:
     Pong Paddle
     """
 
+    __slots__ = ("pos", "loc", "name", "vel", "prev")
+
     def __init__(self, pos, loc, name, vel=0):
         self.pos = pos
         self.loc = loc
         self.name = name
         self.vel = vel
+        self.prev = list(pos)
@@ -0,0 +1,124 @@
+import csv
+import json
+import os
+import time
+from collections import deque
+
+from .constants import PROFILE_DUMP_INTERVAL, PROFILE_HUD_INTERVAL, PROFILE_WINDOW
+
+PHASES = ("network", "simulation", "interpolate", "render", "present", "events", "wait", "frame")
+PERCENTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Nearest rank percentile
+    :param values: Sorted values
+    :param fraction: Percentile as a fraction
+    :return: Value
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+
+class FrameProfiler:
+    """
+    Per phase client frame timings: phases are timed back to back with mark(), their per frame totals are kept
+    for the last PROFILE_WINDOW frames, summarized as rolling p50/p95/p99 on the HUD and in periodic dumps.
+    Disabled, every call returns straight away
+    """
+
+    def __init__(self, enabled: bool = False, dump_path: str = "", dump_interval: float = PROFILE_DUMP_INTERVAL):
+        """
+        Initialize profiler
+        :param enabled: Collect timings
+        :param dump_path: File the summary is appended to (.csv for CSV rows, JSON lines otherwise), "" to disable
+        :param dump_interval: Seconds between dumps
+        """
+        self.enabled = enabled
+        self.hud = False
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self.samples = {phase: deque(maxlen=PROFILE_WINDOW) for phase in PHASES}
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.frame_started = self.last = time.perf_counter()
+        self.dumped_at = self.hud_at = self.last
+        self.hud_lines = []
+
+    def toggle_hud(self):
+        """
+        Show/Hide the timing overlay (timings are collected while it is shown)
+        """
+        self.hud = not self.hud
+        self.hud_lines = []
+        if self.hud and not self.enabled:
+            self.enabled = True
+            self.frame_started = self.last = time.perf_counter()
+
+    def mark(self, phase: str):
+        """
+        Close a phase: the time since the previous mark is added to it
+        :param phase: Phase name
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        """
+        Store the frame phase totals, refresh the HUD and dump when due
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current["frame"] = now - self.frame_started
+        for phase, elapsed in self.current.items():
+            self.samples[phase].append(elapsed * 1000)
+            self.current[phase] = 0.0
+        self.frame_started = self.last = now
+        if self.hud and now - self.hud_at >= PROFILE_HUD_INTERVAL:
+            self.hud_at = now
+            self.hud_lines = self.format()
+        if self.dump_path and now - self.dumped_at >= self.dump_interval:
+            self.dumped_at = now
+            self.dump()
+
+    def summary(self) -> dict:
+        """
+        Rolling percentiles of every phase
+        :return: {phase: {"p50": ms, "p95": ms, "p99": ms}}
+        """
+        summary = {}
+        for phase, samples in self.samples.items():
+            values = sorted(samples)
+            summary[phase] = {name: round(percentile(values, fraction), 3) for name, fraction in PERCENTILES}
+        return summary
+
+    def format(self) -> list:
+        """
+        HUD lines
+        :return: One line per phase
+        """
+        lines = [f"{'ms':<12}" + "".join(f"{name:>8}" for name, _ in PERCENTILES)]
+        for phase, values in self.summary().items():
+            lines.append(f"{phase:<12}" + "".join(f"{values[name]:>8.2f}" for name, _ in PERCENTILES))
+        return lines
+
+    def dump(self):
+        """
+        Append the current summary to the dump file
+        """
+        summary = self.summary()
+        stamp = round(time.time(), 3)
+        if self.dump_path.endswith(".csv"):
+            new = not os.path.exists(self.dump_path)
+            with open(self.dump_path, "a", newline="") as dump:
+                writer = csv.writer(dump)
+                if new:
+                    writer.writerow(["time", "phase"] + [name for name, _ in PERCENTILES])
+                for phase, values in summary.items():
+                    writer.writerow([stamp, phase] + [values[name] for name, _ in PERCENTILES])
+        else:
+            with open(self.dump_path, "a") as dump:
+                dump.write(json.dumps({"time": stamp, "frames": len(self.samples["frame"]), "phases": summary}) + "\n")
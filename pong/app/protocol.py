@@ -0,0 +1,783 @@
+import json
+import math
+import struct
+
+from .constants import (
+    MAX_FRAME_SIZE,
+    PROTOCOL_VERSION,
+    RESUME_TOKEN_SIZE,
+    STRING_TABLE_LIMIT,
+    Codec,
+    MessageType,
+    PaddleLocation,
+)
+
+# length, version, codec, message type
+HEADER = struct.Struct("!IBBB")
+STRING_COUNT = struct.Struct("!H")
+STRING_ENTRY = struct.Struct("!HB")
+# flags, ball pos (x, y), ball vel (x, y), paddle pos (x, y), paddle loc, paddle vel, paddle name id, name id
+PLAYER = struct.Struct("!BhhffhhBhHH")
+PLAYER_ENTRY = struct.Struct("!I" + PLAYER.format[1:])
+WORLD = struct.Struct("!BH")
+# tick, flags, max players, ball pos (x, y), ball vel (x, y), player count
+SNAPSHOT = struct.Struct("!IBBhhffH")
+# player id, paddle pos (x, y), paddle loc, paddle vel, name id, last input applied (seq, tick)
+SNAPSHOT_PADDLE = struct.Struct("!IhhBhHII")
+# room id, max players, flags, resume token (zeros for a new session)
+JOIN = struct.Struct(f"!IBB{RESUME_TOKEN_SIZE}s")
+# seq, base seq, full message type, changed count, removed count
+DELTA = struct.Struct("!IIBHH")
+ACK = struct.Struct("!I")
+# seq, tick, direction, flags
+INPUT = struct.Struct("!IIbB")
+# session id, room id, resume token (zeros for a spectator)
+WELCOME = struct.Struct(f"!II{RESUME_TOKEN_SIZE}s")
+# wait queue position
+QUEUED = struct.Struct("!H")
+# reject reason
+REJECT = struct.Struct("!B")
+PATH_ID = struct.Struct("!H")
+TAG = struct.Struct("!B")
+INT = struct.Struct("!i")
+FLOAT = struct.Struct("!f")
+COUNT = struct.Struct("!B")
+
+FLAG_DELTA = 1
+FLAG_SPECTATE = 2
+FLAG_PRESSED = 1
+
+# Delta leaf value tags
+TAG_NONE = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_FLOAT = 4
+TAG_STRING = 5
+TAG_INTS = 6
+TAG_FLOATS = 7
+TAG_EMPTY = 8
+
+FLAG_BALL = 1
+FLAG_PADDLE = 2
+FLAG_STATUS = 4
+FLAG_RUNNING = 8
+FLAG_PRIMARY = 16
+
+LOCATIONS = [None] + [_loc.value for _loc in PaddleLocation]
+LOCATION_IDS = {_loc: _id for _id, _loc in enumerate(LOCATIONS)}
+HEX_DIGITS = frozenset("0123456789abcdef")
+# Enum(value) lookups are slow, resolve header fields through plain dicts
+CODECS = {_codec.value: _codec for _codec in Codec}
+MESSAGE_TYPES = {_type.value: _type for _type in MessageType}
+
+
+class ProtocolError(Exception):
+    """
+    Raised when the byte stream can not be decoded
+    """
+
+
+def is_count(value, limit: int = 0xFFFFFFFF) -> bool:
+    """
+    Check an unsigned integer field
+    :param value: Field value
+    :param limit: Largest value the binary layout holds
+    :return: True if valid
+    """
+    return isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= limit
+
+
+def is_coordinate(value) -> bool:
+    """
+    Check a position or velocity component (a signed short in the binary layouts)
+    :param value: Field value
+    :return: True if valid
+    """
+    return (
+        isinstance(value, (int, float))
+        and not isinstance(value, bool)
+        and math.isfinite(value)
+        and -32768 <= value <= 32767
+    )
+
+
+def is_vector(value) -> bool:
+    """
+    Check an (x, y) field
+    :param value: Field value
+    :return: True if valid
+    """
+    return isinstance(value, list) and len(value) == 2 and all(is_coordinate(item) for item in value)
+
+
+def is_name(value) -> bool:
+    """
+    Check a name field
+    :param value: Field value
+    :return: True if valid
+    """
+    return value is None or isinstance(value, str)
+
+
+def is_location(value) -> bool:
+    """
+    Check a paddle location field
+    :param value: Field value
+    :return: True if valid
+    """
+    return isinstance(value, str) and value in LOCATION_IDS
+
+
+def is_direction(value) -> bool:
+    """
+    Check a paddle command direction
+    :param value: Field value
+    :return: True if -1 (up/left) or 1 (down/right)
+    """
+    return isinstance(value, int) and not isinstance(value, bool) and value in (-1, 1)
+
+
+def is_token(value) -> bool:
+    """
+    Check a resume token field
+    :param value: Field value
+    :return: True if "" or RESUME_TOKEN_SIZE bytes in hex
+    """
+    return isinstance(value, str) and len(value) in (0, 2 * RESUME_TOKEN_SIZE) and all(c in HEX_DIGITS for c in value)
+
+
+def is_bool(value) -> bool:
+    """
+    Check a flag field
+    :param value: Field value
+    :return: True if valid
+    """
+    return isinstance(value, bool)
+
+
+def has_fields(value, fields: dict) -> bool:
+    """
+    Check an object against its fields
+    :param value: Object
+    :param fields: {field: (check, required)}
+    :return: True if valid
+    """
+    if not isinstance(value, dict):
+        return False
+    for field, (check, required) in fields.items():
+        if field in value:
+            if not check(value[field]):
+                return False
+        elif required:
+            return False
+    return True
+
+
+BALL_FIELDS = {"pos": (is_vector, True), "vel": (is_vector, True)}
+PADDLE_FIELDS = {
+    "pos": (is_vector, True),
+    "loc": (is_location, True),
+    "vel": (lambda value: isinstance(value, int) and is_coordinate(value), True),
+    "name": (is_name, True),
+}
+
+# Fields of the messages sent by clients, the server relies on them (checked after decoding, whatever the codec)
+MESSAGE_FIELDS = {
+    MessageType.STATE: {
+        "ball": (lambda value: has_fields(value, BALL_FIELDS), False),
+        "paddle": (lambda value: has_fields(value, PADDLE_FIELDS), False),
+        "running": (is_bool, False),
+        "primary": (is_bool, False),
+        "name": (is_name, False),
+    },
+    MessageType.JOIN: {
+        "room": (is_count, True),
+        "max_players": (lambda value: is_count(value, 0xFF), True),
+        "delta": (is_bool, False),
+        "spectate": (is_bool, False),
+        "token": (is_token, False),
+    },
+    MessageType.ACK: {"seq": (is_count, True)},
+    MessageType.INPUT: {
+        "seq": (is_count, True),
+        "tick": (is_count, True),
+        "direction": (is_direction, True),
+        # Coerced to a bool when applied
+        "pressed": (lambda value: value in (0, 1), True),
+    },
+}
+
+
+def validate(msg_type: MessageType, message) -> dict:
+    """
+    Check a decoded message: every message is an object, the fields of the messages sent by clients are checked
+    :param msg_type: Message type
+    :param message: Decoded message
+    :return: Message
+    """
+    if not has_fields(message, MESSAGE_FIELDS.get(msg_type, {})):
+        raise ProtocolError(f"Invalid {msg_type.name} message")
+    return message
+
+
+class JsonCodec:
+    """
+    JSON payload codec
+    """
+
+    codec = Codec.JSON
+
+    @staticmethod
+    def encode(msg_type: MessageType, message: dict) -> bytes:
+        """
+        Encode message
+        :param msg_type: Message type
+        :param message: Message
+        :return: Payload
+        """
+        try:
+            return json.dumps(message).encode("utf-8")
+        except (TypeError, ValueError) as e:
+            raise ProtocolError(f"Can not encode {msg_type.name} message: {e}")
+
+    @staticmethod
+    def decode(msg_type: MessageType, payload: bytes) -> dict:
+        """
+        Decode message
+        :param msg_type: Message type
+        :param payload: Payload
+        :return: Message
+        """
+        try:
+            message = json.loads(payload.decode("utf-8"))
+        except (UnicodeDecodeError, json.decoder.JSONDecodeError) as e:
+            raise ProtocolError(f"Invalid json data: {e}")
+        return validate(msg_type, message)
+
+
+class BinaryCodec:
+    """
+    Fixed layout binary payload codec.
+    Strings are interned per connection: a string is sent once, with its id, and referenced by id afterwards.
+    Once STRING_TABLE_LIMIT strings are known, the table starts over and the next messages define the strings
+    they use again, under new ids the peer overwrites its old ones with.
+    """
+
+    codec = Codec.BINARY
+
+    def __init__(self):
+        """
+        Initialize codec string tables
+        """
+        self.out_ids = {}
+        self.pending = []
+        self.in_strings = {0: None}
+
+    def intern(self, value) -> int:
+        """
+        Get string id, scheduling its definition if it is new
+        :param value: String
+        :return: String id
+        """
+        if value is None:
+            return 0
+        string_id = self.out_ids.get(value)
+        if string_id is None:
+            string_id = self.out_ids[value] = len(self.out_ids) + 1
+            self.pending.append((string_id, value))
+        return string_id
+
+    def pack_strings(self, known: bool = False) -> bytes:
+        """
+        Pack new string definitions
+        :param known: Pack every string defined so far instead, for a peer joining a shared stream
+        :return: String block
+        """
+        strings = [(string_id, value) for value, string_id in self.out_ids.items()] if known else self.pending
+        chunks = [STRING_COUNT.pack(len(strings))]
+        for string_id, value in strings:
+            raw = value.encode("utf-8")[:255]
+            chunks.append(STRING_ENTRY.pack(string_id, len(raw)))
+            chunks.append(raw)
+        if not known:
+            self.pending = []
+        return b"".join(chunks)
+
+    def resync(self):
+        """
+        Define every string again with the next message (frames carrying definitions were dropped)
+        """
+        self.pending = [(string_id, value) for value, string_id in self.out_ids.items()]
+
+    def reset(self):
+        """
+        Forget every string sent so far, ids are given from 1 again
+        """
+        self.out_ids = {}
+        self.pending = []
+
+    def unpack_strings(self, payload: bytes) -> int:
+        """
+        Read string definitions
+        :param payload: Payload
+        :return: Offset of the message body
+        """
+        (count,) = STRING_COUNT.unpack_from(payload, 0)
+        offset = STRING_COUNT.size
+        for _ in range(count):
+            string_id, length = STRING_ENTRY.unpack_from(payload, offset)
+            offset += STRING_ENTRY.size
+            start, offset = offset, offset + length
+            self.in_strings[string_id] = bytes(payload[start:offset]).decode("utf-8")
+        return offset
+
+    def pack_player(self, player: dict) -> tuple:
+        """
+        Flatten player data into PLAYER fields
+        :param player: Player data
+        :return: PLAYER fields
+        """
+        flags = 0
+        ball_pos, ball_vel, paddle_pos, paddle_loc, paddle_vel, paddle_name, name = (0, 0), (0, 0), (0, 0), 0, 0, 0, 0
+        if "ball" in player:
+            flags |= FLAG_BALL
+            ball_pos, ball_vel = player["ball"]["pos"], player["ball"]["vel"]
+        if "paddle" in player:
+            flags |= FLAG_PADDLE
+            paddle = player["paddle"]
+            paddle_pos, paddle_vel = paddle["pos"], paddle["vel"]
+            paddle_loc, paddle_name = LOCATION_IDS[paddle["loc"]], self.intern(paddle["name"])
+        if "running" in player:
+            flags |= FLAG_STATUS
+            flags |= FLAG_RUNNING if player["running"] else 0
+            flags |= FLAG_PRIMARY if player.get("primary") else 0
+            name = self.intern(player.get("name"))
+        return (
+            flags,
+            int(ball_pos[0]),
+            int(ball_pos[1]),
+            ball_vel[0],
+            ball_vel[1],
+            int(paddle_pos[0]),
+            int(paddle_pos[1]),
+            paddle_loc,
+            paddle_vel,
+            paddle_name,
+            name,
+        )
+
+    def unpack_player(self, fields: tuple) -> dict:
+        """
+        Rebuild player data from PLAYER fields
+        :param fields: PLAYER fields
+        :return: Player data
+        """
+        flags, ball_x, ball_y, ball_vx, ball_vy, paddle_x, paddle_y, paddle_loc, paddle_vel, paddle_name, name = fields
+        player = {}
+        if flags & FLAG_BALL:
+            player["ball"] = {"pos": [ball_x, ball_y], "vel": [ball_vx, ball_vy]}
+        if flags & FLAG_PADDLE:
+            player["paddle"] = {
+                "pos": [paddle_x, paddle_y],
+                "loc": LOCATIONS[paddle_loc],
+                "vel": paddle_vel,
+                "name": self.in_strings.get(paddle_name),
+            }
+        if flags & FLAG_STATUS:
+            player["running"] = bool(flags & FLAG_RUNNING)
+            player["primary"] = bool(flags & FLAG_PRIMARY)
+            player["name"] = self.in_strings.get(name)
+        return player
+
+    def pack_snapshot(self, snapshot: dict) -> bytes:
+        """
+        Pack server simulation snapshot
+        :param snapshot: Snapshot
+        :return: Snapshot body
+        """
+        ball, players = snapshot["ball"], snapshot["players"]
+        chunks = [
+            SNAPSHOT.pack(
+                snapshot["tick"],
+                FLAG_RUNNING if snapshot["running"] else 0,
+                snapshot["max_players"],
+                int(ball["pos"][0]),
+                int(ball["pos"][1]),
+                ball["vel"][0],
+                ball["vel"][1],
+                len(players),
+            )
+        ]
+        for player_id, player in players.items():
+            paddle = player["paddle"]
+            chunks.append(
+                SNAPSHOT_PADDLE.pack(
+                    int(player_id),
+                    int(paddle["pos"][0]),
+                    int(paddle["pos"][1]),
+                    LOCATION_IDS[paddle["loc"]],
+                    paddle["vel"],
+                    self.intern(paddle["name"]),
+                    player.get("input_seq", 0),
+                    player.get("input_tick", 0),
+                )
+            )
+        return b"".join(chunks)
+
+    def unpack_snapshot(self, payload: bytes, offset: int) -> dict:
+        """
+        Unpack server simulation snapshot
+        :param payload: Payload
+        :param offset: Offset of the snapshot body
+        :return: Snapshot
+        """
+        tick, flags, max_players, ball_x, ball_y, ball_vx, ball_vy, count = SNAPSHOT.unpack_from(payload, offset)
+        offset += SNAPSHOT.size
+        players = {}
+        for _ in range(count):
+            fields = SNAPSHOT_PADDLE.unpack_from(payload, offset)
+            player_id, paddle_x, paddle_y, paddle_loc, paddle_vel, name, input_seq, input_tick = fields
+            offset += SNAPSHOT_PADDLE.size
+            name = self.in_strings.get(name)
+            players[str(player_id)] = {
+                "paddle": {"pos": [paddle_x, paddle_y], "loc": LOCATIONS[paddle_loc], "vel": paddle_vel, "name": name},
+                "name": name,
+                "input_seq": input_seq,
+                "input_tick": input_tick,
+            }
+        return {
+            "tick": tick,
+            "running": bool(flags & FLAG_RUNNING),
+            "max_players": max_players,
+            "ball": {"pos": [ball_x, ball_y], "vel": [ball_vx, ball_vy]},
+            "players": players,
+        }
+
+    def pack_value(self, value) -> bytes:
+        """
+        Pack a tagged delta leaf value
+        :param value: Leaf value
+        :return: Packed value
+        """
+        if value is None:
+            return TAG.pack(TAG_NONE)
+        if isinstance(value, bool):
+            return TAG.pack(TAG_TRUE if value else TAG_FALSE)
+        if isinstance(value, int):
+            return TAG.pack(TAG_INT) + INT.pack(value)
+        if isinstance(value, float):
+            return TAG.pack(TAG_FLOAT) + FLOAT.pack(value)
+        if isinstance(value, str):
+            return TAG.pack(TAG_STRING) + PATH_ID.pack(self.intern(value))
+        if isinstance(value, dict):
+            return TAG.pack(TAG_EMPTY)
+        if all(isinstance(item, int) for item in value):
+            return TAG.pack(TAG_INTS) + COUNT.pack(len(value)) + struct.pack(f"!{len(value)}i", *value)
+        return TAG.pack(TAG_FLOATS) + COUNT.pack(len(value)) + struct.pack(f"!{len(value)}f", *value)
+
+    def unpack_value(self, payload: bytes, offset: int) -> tuple:
+        """
+        Unpack a tagged delta leaf value
+        :param payload: Payload
+        :param offset: Value offset
+        :return: (value, offset after the value)
+        """
+        (tag,) = TAG.unpack_from(payload, offset)
+        offset += TAG.size
+        if tag == TAG_NONE:
+            return None, offset
+        if tag in (TAG_FALSE, TAG_TRUE):
+            return tag == TAG_TRUE, offset
+        if tag == TAG_INT:
+            return INT.unpack_from(payload, offset)[0], offset + INT.size
+        if tag == TAG_FLOAT:
+            return FLOAT.unpack_from(payload, offset)[0], offset + FLOAT.size
+        if tag == TAG_STRING:
+            return self.in_strings[PATH_ID.unpack_from(payload, offset)[0]], offset + PATH_ID.size
+        if tag == TAG_EMPTY:
+            return {}, offset
+        (count,) = COUNT.unpack_from(payload, offset)
+        offset += COUNT.size
+        kind = "i" if tag == TAG_INTS else "f"
+        return list(struct.unpack_from(f"!{count}{kind}", payload, offset)), offset + count * 4
+
+    def pack_delta(self, delta: dict) -> bytes:
+        """
+        Pack delta message, paths are interned strings
+        :param delta: Delta message
+        :return: Delta body
+        """
+        changed, removed = delta["set"], delta["del"]
+        chunks = [DELTA.pack(delta["seq"], delta["base"], delta["kind"], len(changed), len(removed))]
+        for path, value in changed.items():
+            chunks.append(PATH_ID.pack(self.intern(path)))
+            chunks.append(self.pack_value(value))
+        for path in removed:
+            chunks.append(PATH_ID.pack(self.intern(path)))
+        return b"".join(chunks)
+
+    def unpack_delta(self, payload: bytes, offset: int) -> dict:
+        """
+        Unpack delta message
+        :param payload: Payload
+        :param offset: Offset of the delta body
+        :return: Delta message
+        """
+        seq, base, kind, changed_count, removed_count = DELTA.unpack_from(payload, offset)
+        offset += DELTA.size
+        changed, removed = {}, []
+        for _ in range(changed_count):
+            path = self.in_strings[PATH_ID.unpack_from(payload, offset)[0]]
+            changed[path], offset = self.unpack_value(payload, offset + PATH_ID.size)
+        for _ in range(removed_count):
+            removed.append(self.in_strings[PATH_ID.unpack_from(payload, offset)[0]])
+            offset += PATH_ID.size
+        return {"seq": seq, "base": base, "kind": kind, "set": changed, "del": removed}
+
+    def encode(self, msg_type: MessageType, message: dict) -> bytes:
+        """
+        Encode message
+        :param msg_type: Message type
+        :param message: Message
+        :return: Payload
+        """
+        body = self.encode_body(msg_type, message)
+        return self.pack_strings() + body
+
+    def encode_body(self, msg_type: MessageType, message: dict) -> bytes:
+        """
+        Encode message without the string definitions it needs (interned, pending until packed)
+        :param msg_type: Message type
+        :param message: Message
+        :return: Message body
+        """
+        if len(self.out_ids) >= STRING_TABLE_LIMIT:
+            self.reset()
+        try:
+            return self.pack_body(msg_type, message)
+        except (struct.error, KeyError, ValueError, TypeError) as e:
+            raise ProtocolError(f"Can not encode {msg_type.name} message: {e}")
+
+    def pack_body(self, msg_type: MessageType, message: dict) -> bytes:
+        """
+        Pack message body by message type
+        :param msg_type: Message type
+        :param message: Message
+        :return: Message body
+        """
+        if msg_type == MessageType.STATE:
+            body = PLAYER.pack(*self.pack_player(message))
+        elif msg_type == MessageType.WORLD:
+            players = message.get("players", {})
+            chunks = [WORLD.pack(message.get("max_players", 0), len(players))]
+            for player_id, player in players.items():
+                chunks.append(PLAYER_ENTRY.pack(int(player_id), *self.pack_player(player)))
+            body = b"".join(chunks)
+        elif msg_type == MessageType.SNAPSHOT:
+            body = self.pack_snapshot(message)
+        elif msg_type == MessageType.JOIN:
+            flags = (FLAG_DELTA if message.get("delta") else 0) | (FLAG_SPECTATE if message.get("spectate") else 0)
+            token = bytes.fromhex(message.get("token", ""))
+            body = JOIN.pack(message["room"], message.get("max_players", 0), flags, token)
+        elif msg_type == MessageType.DELTA:
+            body = self.pack_delta(message)
+        elif msg_type == MessageType.ACK:
+            body = ACK.pack(message["seq"])
+        elif msg_type == MessageType.INPUT:
+            flags = FLAG_PRESSED if message["pressed"] else 0
+            body = INPUT.pack(message["seq"], message["tick"], message["direction"], flags)
+        elif msg_type == MessageType.HEARTBEAT:
+            body = b""
+        elif msg_type == MessageType.WELCOME:
+            body = WELCOME.pack(message["session"], message["room"], bytes.fromhex(message.get("token", "")))
+        elif msg_type == MessageType.QUEUED:
+            body = QUEUED.pack(message["position"])
+        elif msg_type == MessageType.REJECT:
+            body = REJECT.pack(message["reason"])
+        else:
+            raise ProtocolError(f"Unsupported message type: {msg_type}")
+        return body
+
+    def decode(self, msg_type: MessageType, payload: bytes) -> dict:
+        """
+        Decode message, the messages sent by clients are checked like JSON ones
+        :param msg_type: Message type
+        :param payload: Payload
+        :return: Message
+        """
+        try:
+            offset = self.unpack_strings(payload)
+            message = self.unpack_body(msg_type, payload, offset)
+        except (struct.error, UnicodeDecodeError, IndexError, KeyError) as e:
+            raise ProtocolError(f"Invalid binary data: {e}")
+        return validate(msg_type, message)
+
+    def unpack_body(self, msg_type: MessageType, payload: bytes, offset: int) -> dict:
+        """
+        Unpack message body by message type
+        :param msg_type: Message type
+        :param payload: Payload
+        :param offset: Offset of the message body
+        :return: Message
+        """
+        if msg_type == MessageType.STATE:
+            return self.unpack_player(PLAYER.unpack_from(payload, offset))
+        if msg_type == MessageType.WORLD:
+            max_players, count = WORLD.unpack_from(payload, offset)
+            offset += WORLD.size
+            players = {}
+            for _ in range(count):
+                player_id, *fields = PLAYER_ENTRY.unpack_from(payload, offset)
+                offset += PLAYER_ENTRY.size
+                players[str(player_id)] = self.unpack_player(fields)
+            return {"max_players": max_players, "players": players}
+        if msg_type == MessageType.SNAPSHOT:
+            return self.unpack_snapshot(payload, offset)
+        if msg_type == MessageType.JOIN:
+            room, max_players, flags, token = JOIN.unpack_from(payload, offset)
+            return {
+                "room": room,
+                "max_players": max_players,
+                "delta": bool(flags & FLAG_DELTA),
+                "spectate": bool(flags & FLAG_SPECTATE),
+                "token": token.hex() if any(token) else "",
+            }
+        if msg_type == MessageType.DELTA:
+            return self.unpack_delta(payload, offset)
+        if msg_type == MessageType.ACK:
+            return {"seq": ACK.unpack_from(payload, offset)[0]}
+        if msg_type == MessageType.INPUT:
+            seq, tick, direction, flags = INPUT.unpack_from(payload, offset)
+            return {"seq": seq, "tick": tick, "direction": direction, "pressed": bool(flags & FLAG_PRESSED)}
+        if msg_type == MessageType.HEARTBEAT:
+            return {}
+        if msg_type == MessageType.WELCOME:
+            session, room, token = WELCOME.unpack_from(payload, offset)
+            return {"session": session, "room": room, "token": token.hex() if any(token) else ""}
+        if msg_type == MessageType.QUEUED:
+            return {"position": QUEUED.unpack_from(payload, offset)[0]}
+        if msg_type == MessageType.REJECT:
+            return {"reason": REJECT.unpack_from(payload, offset)[0]}
+        raise ProtocolError(f"Unsupported message type: {msg_type}")
+
+
+class FrameReader:
+    """
+    Split a TCP byte stream into length prefixed frames, a frame declared over MAX_FRAME_SIZE is refused
+    as soon as its header arrives (it would be buffered without bound)
+    """
+
+    def __init__(self):
+        """
+        Initialize receive buffer
+        """
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> list:
+        """
+        Append received bytes and return the completed frames
+        :param data: Received bytes
+        :return: List of (codec, message type, payload)
+        """
+        self.buffer += data
+        frames = []
+        offset = 0
+        while len(self.buffer) - offset >= HEADER.size:
+            length, version, codec, msg_type = HEADER.unpack_from(self.buffer, offset)
+            if version != PROTOCOL_VERSION:
+                raise ProtocolError(f"Unsupported protocol version: {version}")
+            if codec not in CODECS or msg_type not in MESSAGE_TYPES:
+                raise ProtocolError(f"Unknown codec {codec} or message type {msg_type}")
+            if length > MAX_FRAME_SIZE:
+                raise ProtocolError(f"Frame of {length} bytes over the {MAX_FRAME_SIZE} bytes limit")
+            start = offset + HEADER.size
+            end = start + length
+            if len(self.buffer) < end:
+                break
+            frames.append((CODECS[codec], MESSAGE_TYPES[msg_type], bytes(self.buffer[start:end])))
+            offset = end
+        del self.buffer[:offset]
+        return frames
+
+
+class MessageStream:
+    """
+    Per connection framing and codec state.
+    The codec is negotiated by the peer: once a frame arrives, replies are encoded with the same codec.
+    """
+
+    def __init__(self, codec: Codec = Codec.JSON):
+        """
+        Initialize stream
+        :param codec: Codec used until the peer picks one
+        """
+        self.codec = codec
+        self.codecs = {Codec.JSON: JsonCodec(), Codec.BINARY: BinaryCodec()}
+        self.reader = FrameReader()
+
+    def encode(self, msg_type: MessageType, message: dict) -> bytes:
+        """
+        Encode message into a frame
+        :param msg_type: Message type
+        :param message: Message
+        :return: Frame
+        """
+        payload = self.codecs[self.codec].encode(msg_type, message)
+        return HEADER.pack(len(payload), PROTOCOL_VERSION, self.codec.value, msg_type.value) + payload
+
+    def resync(self):
+        """
+        Repeat the codec state carried by dropped frames in the next one
+        """
+        self.codecs[Codec.BINARY].resync()
+
+    def feed(self, data: bytes) -> list:
+        """
+        Decode received bytes
+        :param data: Received bytes
+        :return: List of (message type, message)
+        """
+        messages = []
+        for codec, msg_type, payload in self.reader.feed(data):
+            self.codec = codec
+            messages.append((msg_type, self.codecs[codec].decode(msg_type, payload)))
+        return messages
+
+
+class Broadcast:
+    """
+    Frames encoded once and shared by many connections (spectators): every frame is built once per tick,
+    whatever the number of receivers.
+    Binary frames only define the strings new to the stream, the keyframe variant defines all of them
+    for receivers that joined late or missed frames.
+    """
+
+    def __init__(self, codec: Codec):
+        """
+        Initialize broadcast stream
+        :param codec: Codec of the receivers
+        """
+        self.codec = codec
+        self.encoder = BinaryCodec() if codec == Codec.BINARY else JsonCodec()
+
+    def encode(self, msg_type: MessageType, message: dict, keyframe: bool = False) -> tuple:
+        """
+        Encode message into a shared frame
+        :param msg_type: Message type
+        :param message: Message
+        :param keyframe: Also build the keyframe variant
+        :return: (frame, keyframe frame, or None if not asked for)
+        """
+        header = HEADER.pack
+        if self.codec != Codec.BINARY:
+            payload = self.encoder.encode(msg_type, message)
+            frame = header(len(payload), PROTOCOL_VERSION, self.codec.value, msg_type.value) + payload
+            return frame, frame if keyframe else None
+        body = self.encoder.encode_body(msg_type, message)
+        payload = self.encoder.pack_strings() + body
+        frame = header(len(payload), PROTOCOL_VERSION, self.codec.value, msg_type.value) + payload
+        if not keyframe:
+            return frame, None
+        payload = self.encoder.pack_strings(known=True) + body
+        return frame, header(len(payload), PROTOCOL_VERSION, self.codec.value, msg_type.value) + payload
@@ -0,0 +1,67 @@
+from .paddle import Paddle
+
+
+class EntityRegistry:
+    """
+    Client side paddles keyed by player id: records are created on join, removed on leave and
+    updated in place otherwise, so a frame with no membership change allocates nothing
+    """
+
+    def __init__(self):
+        """
+        Initialize registry
+        """
+        self.paddles = {}
+        self.others = []
+        self.everyone = []
+        self.own = None
+        self.synced = None
+
+    def set_own(self, paddle: Paddle):
+        """
+        Register the local player paddle
+        :param paddle: Paddle object
+        """
+        if paddle is not self.own:
+            self.own = paddle
+            self.rebuild()
+
+    def rebuild(self):
+        """
+        Refresh the paddle lists (join/leave only)
+        """
+        self.others = list(self.paddles.values())
+        self.everyone = self.others + [self.own] if self.own else list(self.others)
+
+    def sync(self, players: dict, me: str):
+        """
+        Apply the latest players data to the remote paddles, skipped when the data was already applied
+        :param players: {player id: player data}
+        :param me: Local player id
+        """
+        if players is self.synced:
+            return
+        self.synced = players
+        joined = False
+        present = 0
+        for player_id, player_data in players.items():
+            if player_id == me or "paddle" not in player_data:
+                continue
+            present += 1
+            data = player_data["paddle"]
+            paddle = self.paddles.get(player_id)
+            if paddle is None:
+                self.paddles[player_id] = Paddle(list(data["pos"]), data["loc"], data["name"], data["vel"])
+                joined = True
+                continue
+            paddle.pos[0] = data["pos"][0]
+            paddle.pos[1] = data["pos"][1]
+            paddle.loc = data["loc"]
+            paddle.name = data["name"]
+            paddle.vel = data["vel"]
+        if present != len(self.paddles):
+            for player_id in [player_id for player_id in self.paddles if "paddle" not in players.get(player_id, {})]:
+                del self.paddles[player_id]
+            joined = True
+        if joined:
+            self.rebuild()
@@ -0,0 +1,230 @@
+import pygame
+
+from .ball import Ball
+from .constants import (
+    FONT_SIZE,
+    HALF_PAD_HEIGHT,
+    HALF_PAD_WIDTH,
+    HEIGHT,
+    PAD_HEIGHT,
+    PAD_WIDTH,
+    WIDTH,
+    Color,
+    PaddleLocation,
+    ScaleMode,
+)
+from .paddle import Paddle
+from .text import TextCache
+
+# Radius the ball is drawn with (larger than the collision radius, as it always was)
+BALL_SPRITE_RADIUS = 20
+LABEL_MARGIN = 10
+
+
+def blend(entity, alpha: float) -> tuple:
+    """
+    Position between the previous and current tick
+    :param entity: Ball or Paddle object
+    :param alpha: Fraction of the tick elapsed
+    :return: (x, y)
+    """
+    prev, pos = entity.prev, entity.pos
+    return prev[0] + (pos[0] - prev[0]) * alpha, prev[1] + (pos[1] - prev[1]) * alpha
+
+
+class Renderer:
+    """
+    Layered renderer drawing straight into the window at its resolution: the static arena is rendered once,
+    ball and paddles are pre-rasterized sprites, all of them are scaled once per resize,
+    and each frame only restores and redraws the rectangles the sprites covered
+    """
+
+    def __init__(self, text: TextCache, scale_mode: ScaleMode = ScaleMode.SMOOTH):
+        """
+        Initialize renderer (needs the display mode to be set)
+        :param text: Text cache of the player name labels
+        :param scale_mode: How the arena is scaled when the window is not 720x720
+        """
+        self.text = text
+        self.scale_mode = scale_mode
+        self.arena = self.render_arena()
+        self.native_ball = self.render_ball()
+        vertical = self.render_paddle((PAD_WIDTH + 1, PAD_HEIGHT + 1))
+        horizontal = self.render_paddle((PAD_HEIGHT + 1, PAD_WIDTH + 1))
+        self.native_paddles = {
+            PaddleLocation.LEFT.value: vertical,
+            PaddleLocation.RIGHT.value: vertical,
+            PaddleLocation.TOP.value: horizontal,
+            PaddleLocation.BOTTOM.value: horizontal,
+        }
+        self.size = None
+        self.scale_x = self.scale_y = 1
+        self.offset_x = self.offset_y = 0
+        self.background = self.ball = None
+        self.paddles = {}
+        self.labels = []
+        self.labelled = None
+        self.drawn = []
+        self.full = True
+
+    @staticmethod
+    def render_arena() -> pygame.Surface:
+        """
+        Render the static arena
+        :return: Arena surface
+        """
+        arena = pygame.Surface((WIDTH, HEIGHT)).convert()
+        arena.fill(Color.BLACK.value)
+        pygame.draw.circle(arena, Color.WHITE.value, [WIDTH // 2, HEIGHT // 2], HEIGHT // 6, 1)
+        pygame.draw.line(arena, Color.WHITE.value, [PAD_WIDTH, 0], [PAD_WIDTH, HEIGHT], 1)
+        pygame.draw.line(arena, Color.WHITE.value, [WIDTH - PAD_WIDTH, 0], [WIDTH - PAD_WIDTH, HEIGHT], 1)
+        pygame.draw.line(arena, Color.WHITE.value, [0, PAD_WIDTH], [WIDTH, PAD_WIDTH], 1)
+        pygame.draw.line(arena, Color.WHITE.value, [0, WIDTH - PAD_WIDTH], [WIDTH, WIDTH - PAD_WIDTH], 1)
+        return arena
+
+    @staticmethod
+    def render_ball() -> pygame.Surface:
+        """
+        Rasterize the ball once, black is transparent
+        :return: Ball sprite
+        """
+        size = 2 * BALL_SPRITE_RADIUS + 1
+        ball = pygame.Surface((size, size)).convert()
+        ball.fill(Color.BLACK.value)
+        ball.set_colorkey(Color.BLACK.value)
+        pygame.draw.circle(ball, Color.RED.value, (BALL_SPRITE_RADIUS, BALL_SPRITE_RADIUS), BALL_SPRITE_RADIUS, 0)
+        return ball
+
+    @staticmethod
+    def render_paddle(size: tuple) -> pygame.Surface:
+        """
+        Rasterize a paddle once
+        :param size: Paddle size (polygon edges included)
+        :return: Paddle sprite
+        """
+        paddle = pygame.Surface(size).convert()
+        paddle.fill(Color.GREEN.value)
+        return paddle
+
+    def resize(self, size: tuple):
+        """
+        Cache the arena to window transform and the scaled background and sprites
+        :param size: Window size
+        """
+        self.size = size
+        width, height = size
+        if self.scale_mode == ScaleMode.INTEGER:
+            self.scale_x = self.scale_y = max(1, min(width // WIDTH, height // HEIGHT))
+            self.offset_x = (width - WIDTH * self.scale_x) // 2
+            self.offset_y = (height - HEIGHT * self.scale_y) // 2
+        else:
+            self.scale_x, self.scale_y = width / WIDTH, height / HEIGHT
+            self.offset_x = self.offset_y = 0
+        self.background = pygame.Surface(size).convert()
+        self.background.fill(Color.BLACK.value)
+        self.background.blit(self.scaled(self.arena), (self.offset_x, self.offset_y))
+        self.ball = self.scaled(self.native_ball)
+        self.ball.set_colorkey(Color.BLACK.value)
+        self.paddles = {loc: self.scaled(sprite) for loc, sprite in self.native_paddles.items()}
+        self.labelled = None
+        self.full = True
+
+    def scaled(self, surface: pygame.Surface) -> pygame.Surface:
+        """
+        Scale an arena surface to the window (the same surface at 1:1)
+        :param surface: Surface at arena resolution
+        :return: Surface at window resolution
+        """
+        if self.scale_x == 1 and self.scale_y == 1:
+            return surface
+        width, height = surface.get_size()
+        size = (max(1, round(width * self.scale_x)), max(1, round(height * self.scale_y)))
+        if self.scale_mode == ScaleMode.SMOOTH:
+            return pygame.transform.smoothscale(surface, size)
+        return pygame.transform.scale(surface, size)
+
+    def to_window(self, x: int, y: int) -> tuple:
+        """
+        Map arena coordinates to window coordinates
+        :param x: Arena x
+        :param y: Arena y
+        :return: Window (x, y)
+        """
+        return self.offset_x + int(x * self.scale_x), self.offset_y + int(y * self.scale_y)
+
+    def invalidate(self):
+        """
+        Redraw the whole window on the next frame
+        """
+        self.full = True
+
+    def label(self, paddle: Paddle, own: bool) -> tuple:
+        """
+        Player name label at window resolution and where it goes
+        :param paddle: Paddle object
+        :param own: Is it the local player paddle ?
+        :return: (label surface, window position)
+        """
+        size = max(1, round(FONT_SIZE * min(self.scale_x, self.scale_y)))
+        name = self.text.render("Me" if own else paddle.name, size, Color.WHITE.value)
+        width, height = name.get_size()
+        if paddle.loc == PaddleLocation.LEFT.value:
+            x, y = self.to_window(PAD_WIDTH + LABEL_MARGIN, HEIGHT // 2)
+            return name, (x, y)
+        if paddle.loc == PaddleLocation.RIGHT.value:
+            x, y = self.to_window(WIDTH - PAD_WIDTH - LABEL_MARGIN, HEIGHT // 2)
+            return name, (x - width, y)
+        if paddle.loc == PaddleLocation.TOP.value:
+            x, y = self.to_window(WIDTH // 2, PAD_WIDTH + LABEL_MARGIN)
+            return name, (x - width // 2, y)
+        x, y = self.to_window(WIDTH // 2, HEIGHT - PAD_WIDTH - LABEL_MARGIN)
+        return name, (x - width // 2, y - height)
+
+    def layout(self, paddles: list, own: Paddle):
+        """
+        Precompute the labels of the paddles in play (on join/leave and resize only)
+        :param paddles: Paddles in play
+        :param own: Local player paddle
+        """
+        self.labels = [self.label(_paddle, _paddle is own) for _paddle in paddles]
+        self.labelled = paddles
+
+    def draw(
+        self, canvas: pygame.Surface, ball: Ball, paddles: list, own: Paddle, alpha: float = 1.0, overlay: list = ()
+    ) -> list:
+        """
+        Erase the sprites of the previous frame and draw the current ones
+        :param canvas: Window surface
+        :param ball: Ball object
+        :param paddles: Paddles in play
+        :param own: Local player paddle
+        :param alpha: Fraction of the tick elapsed, entities are drawn between their previous and current position
+        :param overlay: (surface, window position) drawn on top, e.g. the profiler HUD
+        :return: Dirty rectangles of the window
+        """
+        if canvas.get_size() != self.size:
+            self.resize(canvas.get_size())
+        if paddles is not self.labelled:
+            self.layout(paddles, own)
+        if self.full:
+            canvas.blit(self.background, (0, 0))
+        else:
+            for rect in self.drawn:
+                canvas.blit(self.background, rect, rect)
+        to_window = self.to_window
+        x, y = blend(ball, alpha)
+        drawn = [canvas.blit(self.ball, to_window(x - BALL_SPRITE_RADIUS, y - BALL_SPRITE_RADIUS))]
+        for _paddle, label in zip(paddles, self.labels):
+            sprite = self.paddles[_paddle.loc]
+            x, y = blend(_paddle, alpha)
+            if _paddle.loc in (PaddleLocation.LEFT.value, PaddleLocation.RIGHT.value):
+                drawn.append(canvas.blit(sprite, to_window(x - HALF_PAD_WIDTH, y - HALF_PAD_HEIGHT)))
+            else:
+                drawn.append(canvas.blit(sprite, to_window(x - HALF_PAD_HEIGHT, y - HALF_PAD_WIDTH)))
+            drawn.append(canvas.blit(*label))
+        for surface, position in overlay:
+            drawn.append(canvas.blit(surface, position))
+        dirty = [canvas.get_rect()] if self.full else self.drawn + drawn
+        self.drawn = drawn
+        self.full = False
+        return dirty
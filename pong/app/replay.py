@@ -0,0 +1,351 @@
+import mmap
+import struct
+from bisect import bisect_right
+
+from .ball import Ball
+from .constants import REPLAY_BUFFER_SIZE, REPLAY_KEYFRAME_INTERVAL
+from .paddle import Paddle
+from .protocol import LOCATION_IDS, LOCATIONS
+from .simulation import PongSimulation
+
+MAGIC = b"PONGRPL\0"
+VERSION = 1
+# magic, version, flags, serve seed, tick rate, keyframe interval
+HEADER = struct.Struct("!8sBBQHH")
+# kind, tick, payload length
+RECORD = struct.Struct("!BIH")
+# running, serves, ball pos (x, y), ball vel (x, y), paddle count
+KEYFRAME_STATE = struct.Struct("!BIiiddB")
+# player id, paddle loc, paddle pos (x, y), paddle vel, name length
+KEYFRAME_PADDLE = struct.Struct("!IBhhhB")
+PLAYER_ID = struct.Struct("!I")
+# player id, direction, pressed
+COMMAND = struct.Struct("!IbB")
+# player id, paddle velocity
+VELOCITY = struct.Struct("!Ih")
+RUNNING = struct.Struct("!B")
+# keyframe tick, keyframe offset
+INDEX_ENTRY = struct.Struct("!IQ")
+# index offset, magic
+FOOTER = struct.Struct("!Q4s")
+INDEX_MAGIC = b"PIDX"
+
+FLAG_SWEPT = 1
+
+# Record kinds
+KEYFRAME = 1
+JOIN = 2
+LEAVE = 3
+COMMAND_INPUT = 4
+VELOCITY_INPUT = 5
+RUNNING_STATE = 6
+END = 7
+
+
+class ReplayError(Exception):
+    """
+    Raised when a replay log can not be read
+    """
+
+
+def encode_keyframe(simulation: PongSimulation) -> bytes:
+    """
+    Full simulation state, enough to resume the match from this tick
+    :param simulation: Simulation object
+    :return: Keyframe payload
+    """
+    ball = simulation.ball
+    parts = [
+        KEYFRAME_STATE.pack(
+            simulation.running,
+            simulation.serves,
+            ball.pos[0],
+            ball.pos[1],
+            ball.vel[0],
+            ball.vel[1],
+            len(simulation.paddles),
+        )
+    ]
+    for player_id, _paddle in simulation.paddles.items():
+        name = _paddle.name.encode("utf-8")[:255]
+        parts.append(
+            KEYFRAME_PADDLE.pack(
+                player_id, LOCATION_IDS[_paddle.loc], _paddle.pos[0], _paddle.pos[1], _paddle.vel, len(name)
+            )
+        )
+        parts.append(name)
+    return b"".join(parts)
+
+
+class Recorder:
+    """
+    Append only match log written while a simulation runs: the inputs and membership changes of every tick,
+    and a full keyframe every few seconds, closed by an index of the keyframes.
+    Records are buffered and reach the file once per keyframe, the simulation calls it through hooks.
+    """
+
+    def __init__(self, path: str, simulation: PongSimulation, tick_rate: int, interval: int = REPLAY_KEYFRAME_INTERVAL):
+        """
+        Initialize recorder, and attach it to the simulation
+        :param path: Log file path
+        :param simulation: Recorded simulation (fresh, or the log starts from its first keyframe)
+        :param tick_rate: Simulation ticks per second
+        :param interval: Ticks between two keyframes
+        """
+        self.path = path
+        self.simulation = simulation
+        self.interval = interval
+        self.file = open(path, "wb", buffering=REPLAY_BUFFER_SIZE)
+        self.offset = self.file.write(
+            HEADER.pack(MAGIC, VERSION, FLAG_SWEPT if simulation.swept else 0, simulation.seed, tick_rate, interval)
+        )
+        self.keyframes = []
+        simulation.recorder = self
+
+    def write(self, kind: int, tick: int, payload: bytes):
+        """
+        Append a record
+        :param kind: Record kind
+        :param tick: Simulation tick
+        :param payload: Record payload
+        """
+        self.offset += self.file.write(RECORD.pack(kind, tick, len(payload)) + payload)
+
+    def keyframe(self, simulation: PongSimulation):
+        """
+        Append a keyframe and flush the log
+        :param simulation: Simulation object
+        """
+        self.keyframes.append((simulation.tick, self.offset))
+        self.write(KEYFRAME, simulation.tick, encode_keyframe(simulation))
+        self.file.flush()
+
+    def join(self, tick: int, player_id: int, name: str):
+        """
+        Record a player joining
+        :param tick: Simulation tick
+        :param player_id: Player id
+        :param name: Player name
+        """
+        self.write(JOIN, tick, PLAYER_ID.pack(player_id) + name.encode("utf-8"))
+
+    def leave(self, tick: int, player_id: int):
+        """
+        Record a player leaving
+        :param tick: Simulation tick
+        :param player_id: Player id
+        """
+        self.write(LEAVE, tick, PLAYER_ID.pack(player_id))
+
+    def command(self, tick: int, player_id: int, direction: int, pressed: bool):
+        """
+        Record a paddle command
+        :param tick: Simulation tick
+        :param player_id: Player id
+        :param direction: -1 (up/left) or 1 (down/right)
+        :param pressed: Key press or release
+        """
+        self.write(COMMAND_INPUT, tick, COMMAND.pack(player_id, direction, pressed))
+
+    def velocity(self, tick: int, player_id: int, vel: int):
+        """
+        Record a paddle velocity change
+        :param tick: Simulation tick
+        :param player_id: Player id
+        :param vel: Paddle velocity
+        """
+        self.write(VELOCITY_INPUT, tick, VELOCITY.pack(player_id, vel))
+
+    def running(self, tick: int, running: bool):
+        """
+        Record the match starting/pausing
+        :param tick: Simulation tick
+        :param running: Does the match run ?
+        """
+        self.write(RUNNING_STATE, tick, RUNNING.pack(running))
+
+    def close(self):
+        """
+        Append the end of the match and the keyframe index, and detach from the simulation
+        """
+        if self.file.closed:
+            return
+        self.write(END, self.simulation.tick, b"")
+        index_offset = self.offset
+        self.file.write(b"".join(INDEX_ENTRY.pack(tick, offset) for tick, offset in self.keyframes))
+        self.file.write(FOOTER.pack(index_offset, INDEX_MAGIC))
+        self.file.close()
+        self.simulation.recorder = None
+
+
+class Replay:
+    """
+    Replay log reader: the file is memory mapped, seeking restores the last keyframe before the tick (binary search
+    over the index) and re-simulates the recorded inputs from there
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a replay log
+        :param path: Log file path
+        """
+        with open(path, "rb") as file:
+            try:
+                self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ReplayError(f"{path} is empty")
+        if len(self.data) < HEADER.size:
+            raise ReplayError(f"{path} is not a replay log")
+        magic, version, flags, self.seed, self.tick_rate, self.interval = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError(f"{path} is not a version {VERSION} replay log")
+        self.swept = bool(flags & FLAG_SWEPT)
+        self.end = len(self.data)
+        self.ticks, self.offsets = self.load_index()
+
+    def close(self):
+        """
+        Unmap the log
+        """
+        self.data.close()
+
+    def load_index(self) -> tuple:
+        """
+        Read the keyframe index, or rebuild it if the log was not closed (e.g. the server was killed)
+        :return: (keyframe ticks, keyframe offsets)
+        """
+        size = len(self.data)
+        if size >= HEADER.size + FOOTER.size:
+            index_offset, magic = FOOTER.unpack_from(self.data, size - FOOTER.size)
+            index_size = size - FOOTER.size - index_offset
+            if magic == INDEX_MAGIC and HEADER.size <= index_offset and index_size % INDEX_ENTRY.size == 0:
+                self.end = index_offset
+                footer = size - FOOTER.size
+                entries = list(INDEX_ENTRY.iter_unpack(self.data[index_offset:footer]))
+                return [tick for tick, _ in entries], [offset for _, offset in entries]
+        ticks, offsets = [], []
+        for kind, tick, offset, _ in self.records(HEADER.size):
+            if kind == KEYFRAME:
+                ticks.append(tick)
+                offsets.append(offset - RECORD.size)
+        return ticks, offsets
+
+    def records(self, offset: int):
+        """
+        Iterate over the records, a truncated last record is ignored
+        :param offset: Offset of the first record
+        :return: Generator of (kind, tick, payload offset, payload length)
+        """
+        data, end = self.data, self.end
+        while offset + RECORD.size <= end:
+            kind, tick, length = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            if offset + length > end:
+                return
+            yield kind, tick, offset, length
+            offset += length
+
+    @property
+    def length(self) -> int:
+        """
+        Tick of the last record
+        """
+        last = 0
+        start = self.offsets[-1] if self.offsets else HEADER.size
+        for _, tick, _, _ in self.records(start):
+            last = tick
+        return last
+
+    def restore(self, offset: int) -> PongSimulation:
+        """
+        Simulation resumed from a keyframe
+        :param offset: Keyframe record offset
+        :return: Simulation object
+        """
+        data = self.data
+        _, tick, _ = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        running, serves, ball_x, ball_y, vel_x, vel_y, count = KEYFRAME_STATE.unpack_from(data, offset)
+        offset += KEYFRAME_STATE.size
+        simulation = PongSimulation(self.swept, self.seed)
+        simulation.tick = tick
+        simulation.running = bool(running)
+        simulation.serves = serves
+        simulation.ball = ball = Ball()
+        ball.pos = [ball_x, ball_y]
+        ball.vel = [vel_x, vel_y]
+        ball.prev = list(ball.pos)
+        for _ in range(count):
+            player_id, loc, paddle_x, paddle_y, vel, name_length = KEYFRAME_PADDLE.unpack_from(data, offset)
+            offset += KEYFRAME_PADDLE.size
+            start, offset = offset, offset + name_length
+            name = data[start:offset].decode("utf-8", "replace")
+            simulation.paddles[player_id] = Paddle([paddle_x, paddle_y], LOCATIONS[loc], name, vel)
+        return simulation
+
+    def apply(self, simulation: PongSimulation, kind: int, offset: int, length: int):
+        """
+        Apply a recorded event
+        :param simulation: Simulation object
+        :param kind: Record kind
+        :param offset: Payload offset
+        :param length: Payload length
+        """
+        data = self.data
+        if kind == COMMAND_INPUT:
+            player_id, direction, pressed = COMMAND.unpack_from(data, offset)
+            simulation.apply_command(player_id, direction, bool(pressed))
+        elif kind == VELOCITY_INPUT:
+            simulation.set_input(*VELOCITY.unpack_from(data, offset))
+        elif kind == RUNNING_STATE:
+            simulation.set_running(bool(RUNNING.unpack_from(data, offset)[0]))
+        elif kind == JOIN:
+            (player_id,) = PLAYER_ID.unpack_from(data, offset)
+            start, stop = offset + PLAYER_ID.size, offset + length
+            name = data[start:stop].decode("utf-8", "replace")
+            simulation.add_player(player_id, name)
+        elif kind == LEAVE:
+            simulation.remove_player(PLAYER_ID.unpack_from(data, offset)[0])
+
+    def timeline(self, tick: int):
+        """
+        Simulation at every tick from the last keyframe before a tick to the end of the match
+        :param tick: Tick to start around
+        :return: Generator of the simulation (the same object, advanced) with the events of each tick applied
+        """
+        index = bisect_right(self.ticks, tick) - 1
+        if index < 0:
+            simulation, offset = PongSimulation(self.swept, self.seed), HEADER.size
+        else:
+            simulation, offset = self.restore(self.offsets[index]), self.offsets[index]
+        for kind, record_tick, payload, length in self.records(offset):
+            while simulation.tick < record_tick:
+                yield simulation
+                simulation.advance()
+            if kind != KEYFRAME:
+                self.apply(simulation, kind, payload, length)
+        yield simulation
+
+    def seek(self, tick: int) -> PongSimulation:
+        """
+        Match state at a tick
+        :param tick: Tick (the end of the match if it is later)
+        :return: Simulation object at that tick
+        """
+        for simulation in self.timeline(tick):
+            if simulation.tick >= tick:
+                break
+        return simulation
+
+    def play(self, start: int = 0, end: int = None):
+        """
+        Play the match back tick by tick
+        :param start: First tick
+        :param end: Last tick (the end of the match by default)
+        :return: Generator of the simulation at each tick
+        """
+        for simulation in self.timeline(start):
+            if end is not None and simulation.tick > end:
+                return
+            if simulation.tick >= start:
+                yield simulation
@@ -0,0 +1,212 @@
+import os
+import time
+from collections import deque
+
+from .protocol import Broadcast
+from .replay import Recorder
+from .simulation import PongSimulation
+
+
+class Room:
+    """
+    Match room with its own player table, size, (optionally) simulation, read only spectators,
+    the players waiting for a free slot, and the disconnected players whose slot is held until they resume
+    """
+
+    def __init__(self, room_id: int, max_players: int, tick_rate: int = 0, record: str = ""):
+        """
+        Initialize room
+        :param room_id: Room id
+        :param max_players: Maximum number of players allowed
+        :param tick_rate: Server simulation ticks per second (0 lets the primary client simulate the match)
+        :param record: Directory the simulated matches are recorded to ("" doesn't record)
+        """
+        self.room_id = room_id
+        self.max_players = max_players
+        self.players = {}
+        self.connections = {}
+        self.spectators = {}
+        self.broadcasts = {}
+        self.waiting = deque()
+        self.suspended = {}
+        self.inputs = {}
+        self.timer = None
+        self.next_tick = 0.0
+        self.simulation = PongSimulation() if tick_rate else None
+        self.recorder = None
+        if self.simulation and record:
+            name = f"room-{room_id}-{time.strftime('%Y%m%d-%H%M%S')}-{self.simulation.seed:08x}.replay"
+            self.recorder = Recorder(os.path.join(record, name), self.simulation, tick_rate)
+
+    def is_full(self) -> bool:
+        """
+        Returns True if no more players can join
+        """
+        return len(self.players) >= self.max_players
+
+    def is_empty(self) -> bool:
+        """
+        Returns True if every player, spectator and waiting player has left
+        """
+        return not self.players and not self.spectators and not self.waiting
+
+    def join(self, connection):
+        """
+        Add player
+        :param connection: Client connection
+        """
+        self.players[connection.player_id] = {}
+        self.connections[connection.player_id] = connection
+        connection.room = self
+        if self.simulation:
+            self.simulation.add_player(connection.player_id, f"Player {connection.player_id}")
+
+    def wait(self, connection) -> int:
+        """
+        Queue a player until a slot frees up
+        :param connection: Client connection
+        :return: Position in the wait queue (from 1)
+        """
+        self.waiting.append(connection)
+        connection.waiting = self
+        return len(self.waiting)
+
+    def admit(self) -> list:
+        """
+        Let waiting players take the free slots, in arrival order
+        :return: Admitted connections
+        """
+        admitted = []
+        while self.waiting and not self.is_full():
+            connection = self.waiting.popleft()
+            connection.waiting = None
+            self.join(connection)
+            admitted.append(connection)
+        return admitted
+
+    def suspend(self, connection, timer):
+        """
+        Hold the slot of a disconnected player, its paddle stops until it resumes with its resume token
+        :param connection: Client connection
+        :param timer: Grace period timer, releasing the slot
+        """
+        self.connections.pop(connection.player_id, None)
+        self.suspended[connection.token] = (connection.player_id, timer)
+        connection.room = None
+        if self.simulation:
+            self.simulation.set_input(connection.player_id, 0)
+
+    def resume(self, connection, token: str) -> bool:
+        """
+        Give a held slot back to its player, reconnected
+        :param connection: New client connection
+        :param token: Resume token of the disconnected player
+        :return: False if no slot is held for that token
+        """
+        held = self.suspended.pop(token, None)
+        if held is None:
+            return False
+        player_id, timer = held
+        timer.cancel()
+        connection.player_id = player_id
+        connection.token = token
+        self.connections[player_id] = connection
+        connection.room = self
+        return True
+
+    def release(self, token: str) -> int:
+        """
+        Free the slot of a player that did not resume in time
+        :param token: Resume token of the disconnected player
+        :return: Player id
+        """
+        player_id, _ = self.suspended.pop(token)
+        self.players.pop(player_id, None)
+        self.inputs.pop(player_id, None)
+        if self.simulation:
+            self.simulation.remove_player(player_id)
+        return player_id
+
+    def watch(self, connection):
+        """
+        Add spectator, grouped with the spectators using the same codec (they share the broadcast frames)
+        :param connection: Client connection
+        """
+        codec = connection.stream.codec
+        self.spectators.setdefault(codec, {})[connection.player_id] = connection
+        if codec not in self.broadcasts:
+            self.broadcasts[codec] = Broadcast(codec)
+        connection.room = self
+        connection.spectating = True
+        connection.synced = False
+
+    def leave(self, connection):
+        """
+        Remove player, spectator or waiting player
+        :param connection: Client connection
+        """
+        if connection.waiting is self:
+            self.waiting.remove(connection)
+            connection.waiting = None
+            return
+        if connection.spectating:
+            for codec, spectators in list(self.spectators.items()):
+                spectators.pop(connection.player_id, None)
+                if not spectators:
+                    del self.spectators[codec]
+            connection.room = None
+            return
+        self.players.pop(connection.player_id, None)
+        self.connections.pop(connection.player_id, None)
+        self.inputs.pop(connection.player_id, None)
+        connection.room = None
+        if self.simulation:
+            self.simulation.remove_player(connection.player_id)
+
+    def update_player(self, player_id, message: dict):
+        """
+        Store player state when the clients simulate the match. The server simulation ignores it,
+        paddles only move by INPUT commands (a client sent velocity would be trusted as is)
+        :param player_id: Player id
+        :param message: Player state
+        """
+        if not self.simulation:
+            self.players[player_id] = message
+
+    def apply_input(self, player_id, command: dict):
+        """
+        Apply a paddle command to the simulation, its seq and the tick it applied at are acknowledged in the snapshots
+        :param player_id: Player id
+        :param command: Input command
+        """
+        if self.simulation:
+            self.inputs[player_id] = (command["seq"], self.simulation.tick)
+            self.simulation.apply_command(player_id, command["direction"], bool(command["pressed"]))
+
+    def close(self):
+        """
+        Finish the match recording, once every player has left
+        """
+        if self.recorder:
+            self.recorder.close()
+
+    def world(self) -> dict:
+        """
+        Room state replied to clients when they simulate the match
+        :return: World message
+        """
+        return {"max_players": self.max_players, "players": self.players}
+
+    def step(self, ticks: int) -> dict:
+        """
+        Advance the room simulation
+        :param ticks: Number of ticks to run
+        :return: Snapshot, with the last input applied for each player (seq and tick, for client reconciliation)
+        """
+        self.simulation.set_running(len(self.players) == self.max_players)
+        for _ in range(ticks):
+            self.simulation.advance()
+        snapshot = self.simulation.snapshot(self.max_players)
+        for player_id, player in snapshot["players"].items():
+            player["input_seq"], player["input_tick"] = self.inputs.get(player_id, (0, 0))
+        return snapshot
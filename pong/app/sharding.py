@@ -0,0 +1,172 @@
+import array
+import errno
+import os
+import selectors
+import socket
+import time
+
+from .config import HANDSHAKE_TIMEOUT
+from .constants import (
+    ACCEPT_BATCH,
+    BUFFER_SIZE,
+    DEFAULT_ROOM,
+    MAX_FRAME_SIZE,
+    MessageType,
+)
+from .protocol import HEADER, MessageStream, ProtocolError
+from .timers import TimerWheel
+
+# Largest handoff: a first frame short of its last byte, then a full read completing it
+HANDOFF_SIZE = HEADER.size + MAX_FRAME_SIZE + BUFFER_SIZE
+
+
+def worker_for_room(room_id: int, workers: int) -> int:
+    """
+    Worker owning a room, every player of a room lands on the same worker
+    :param room_id: Room id
+    :param workers: Number of workers
+    :return: Worker index
+    """
+    return room_id % workers
+
+
+def send_connection(channel: socket.socket, sock: socket.socket, pending: bytes):
+    """
+    Pass a client socket (SCM_RIGHTS) and the bytes already read from it to a worker
+    :param channel: Unix socket connected to the worker
+    :param sock: Client socket
+    :param pending: Bytes received before the handoff
+    """
+    channel.sendmsg([pending], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", [sock.fileno()]))])
+
+
+def receive_connection(channel: socket.socket) -> tuple:
+    """
+    Receive a client socket passed by the acceptor
+    :param channel: Unix socket connected to the acceptor
+    :return: (client socket or None if the acceptor is gone, bytes received before the handoff)
+    """
+    fds = array.array("i")
+    pending, ancdata, flags, _ = channel.recvmsg(HANDOFF_SIZE, socket.CMSG_LEN(fds.itemsize))
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(data[: len(data) - (len(data) % fds.itemsize)])
+    if not fds:
+        return None, pending
+    sock = socket.socket(fileno=fds[0])
+    if flags & socket.MSG_TRUNC:
+        sock.close()
+        raise ProtocolError(f"Handoff over {HANDOFF_SIZE} bytes")
+    return sock, pending
+
+
+class Acceptor:
+    """
+    Front acceptor: reads the first frame of every connection to learn its room,
+    then hands the socket over to the worker process owning that room.
+    Whatever goes wrong with a connection (bad first frame, no frame in time, worker gone) only closes that one.
+    """
+
+    def __init__(self, host: str, port: int, channels: list):
+        """
+        Initialize acceptor
+        :param host: Server host
+        :param port: Server port
+        :param channels: Unix sockets connected to the workers
+        """
+        self.selector = selectors.DefaultSelector()
+        self.channels = channels
+        for channel in channels:
+            channel.setblocking(False)
+        self.timers = TimerWheel()
+        # Freed to accept (and close) a connection when out of file descriptors
+        self.spare = open(os.devnull, "rb")
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((host, port))
+        self.server.listen(socket.SOMAXCONN)
+        self.server.setblocking(False)
+
+    def run(self):
+        """
+        Accept connections and dispatch them to workers
+        """
+        self.selector.register(self.server, selectors.EVENT_READ)
+        while 1:
+            wake = self.timers.next_expiry()
+            for key, _ in self.selector.select(None if wake is None else max(wake - time.monotonic(), 0)):
+                if key.fileobj is self.server:
+                    self.on_accept()
+                else:
+                    self.on_recv(key.fileobj, key.data)
+            self.timers.advance()
+
+    def on_accept(self):
+        """
+        Accept incoming client connections and wait for their first frame (HANDSHAKE_TIMEOUT at most)
+        """
+        for _ in range(ACCEPT_BATCH):
+            try:
+                client_sock, _ = self.server.accept()
+            except BlockingIOError:
+                return
+            except OSError as e:
+                if e.errno not in (errno.EMFILE, errno.ENFILE):
+                    return
+                self.shed()
+                continue
+            client_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            timer = self.timers.call_later(HANDSHAKE_TIMEOUT, self.drop, client_sock)
+            self.selector.register(client_sock, selectors.EVENT_READ, data=[MessageStream(), bytearray(), timer])
+
+    def shed(self):
+        """
+        Out of file descriptors: free the spare one to accept and close a pending connection,
+        otherwise it stays in the backlog and the listener keeps waking the loop up
+        """
+        print("Out of file descriptors, closing connections")
+        self.spare.close()
+        try:
+            self.server.accept()[0].close()
+        except OSError:
+            pass
+        self.spare = open(os.devnull, "rb")
+
+    def drop(self, conn: socket.socket):
+        """
+        Close a connection still waiting for its first frame
+        :param conn: Client socket connection
+        """
+        self.selector.unregister(conn)
+        conn.close()
+
+    def on_recv(self, conn: socket.socket, state: list):
+        """
+        Read until the first frame is complete, then hand the connection off
+        :param conn: Client socket connection
+        :param state: [message stream, bytes received so far, handshake timer]
+        """
+        stream, pending, timer = state
+        try:
+            data = conn.recv(BUFFER_SIZE)
+            messages = stream.feed(data) if data else None
+        except (OSError, ProtocolError):
+            messages = None
+        if messages is None:
+            timer.cancel()
+            self.drop(conn)
+            return
+        pending += data
+        if not messages:
+            return
+        timer.cancel()
+        self.selector.unregister(conn)
+        msg_type, message = messages[0]
+        # JOIN fields are checked when decoded
+        room_id = message["room"] if msg_type == MessageType.JOIN else DEFAULT_ROOM
+        worker = worker_for_room(room_id, len(self.channels))
+        try:
+            send_connection(self.channels[worker], conn, bytes(pending))
+        except OSError as e:
+            print(f"Handoff to worker {worker} failed: {e}")
+        conn.close()
@@ -0,0 +1,244 @@
+import random
+
+from .ball import Ball
+from .collision import sweep_ball
+from .constants import (
+    BALL_RADIUS,
+    HALF_PAD_HEIGHT,
+    HEIGHT,
+    PAD_WIDTH,
+    WIDTH,
+    PaddleLocation,
+    PaddlePosition,
+    Velocity,
+)
+from .paddle import Paddle
+
+VERTICAL = [PaddleLocation.LEFT.value, PaddleLocation.RIGHT.value]
+NEAR_EDGE = BALL_RADIUS + PAD_WIDTH
+FAR_EDGE_X = WIDTH + 1 - BALL_RADIUS - PAD_WIDTH
+FAR_EDGE_Y = HEIGHT + 1 - BALL_RADIUS - PAD_WIDTH
+# Serve n of a match draws from Random(seed * SERVE_STRIDE + n)
+SERVE_STRIDE = 1 << 32
+
+
+def move_paddle(paddle: Paddle):
+    """
+    Move paddle by its velocity, keeping it inside the arena
+    :param paddle: Paddle object
+    """
+    axis, size = (1, HEIGHT) if paddle.loc in VERTICAL else (0, WIDTH)
+    paddle.pos[axis] = min(max(paddle.pos[axis] + paddle.vel, HALF_PAD_HEIGHT), size - HALF_PAD_HEIGHT)
+
+
+def move_ball(ball: Ball):
+    """
+    Move ball by its velocity
+    :param ball: Ball object
+    """
+    ball.pos[0] += int(ball.vel[0])
+    ball.pos[1] += int(ball.vel[1])
+
+
+def hit_or_miss(ball: Ball, at_edge: bool, along: int, paddle_center: int, axis: int, serve=Ball) -> Ball:
+    """
+    Resolve the ball reaching an edge guarded by a paddle
+    :param ball: Ball object
+    :param at_edge: Has the ball reached the edge ?
+    :param along: Ball coordinate along the paddle
+    :param paddle_center: Paddle coordinate along the edge
+    :param axis: Velocity component reflected by the paddle
+    :param serve: Callable returning a newly served ball
+    :return: Same ball, or a newly served one if the paddle missed
+    """
+    if not at_edge:
+        return ball
+    if paddle_center - HALF_PAD_HEIGHT <= along < paddle_center + HALF_PAD_HEIGHT:
+        ball.vel[axis] = -ball.vel[axis]
+        ball.vel[0] *= 1.1
+        ball.vel[1] *= 1.1
+        return ball
+    return serve()
+
+
+def collide_ball(ball: Ball, paddles: list, serve=Ball) -> Ball:
+    """
+    Bounce the ball from free edges and paddles
+    :param ball: Ball object
+    :param paddles: Paddles in play
+    :param serve: Callable returning a newly served ball
+    :return: Same ball, or a newly served one if a paddle missed
+    """
+    taken = [_paddle.loc for _paddle in paddles]
+    x, y = int(ball.pos[0]), int(ball.pos[1])
+    if PaddleLocation.LEFT.value not in taken and x <= NEAR_EDGE:
+        ball.vel[0] = -ball.vel[0]
+    if PaddleLocation.RIGHT.value not in taken and x >= FAR_EDGE_X:
+        ball.vel[0] = -ball.vel[0]
+    if PaddleLocation.TOP.value not in taken and y <= NEAR_EDGE:
+        ball.vel[1] = -ball.vel[1]
+    if PaddleLocation.BOTTOM.value not in taken and y >= FAR_EDGE_Y:
+        ball.vel[1] = -ball.vel[1]
+    for _paddle in paddles:
+        x, y = int(ball.pos[0]), int(ball.pos[1])
+        if _paddle.loc == PaddleLocation.LEFT.value:
+            ball = hit_or_miss(ball, x <= NEAR_EDGE, y, _paddle.pos[1], 0, serve)
+        elif _paddle.loc == PaddleLocation.RIGHT.value:
+            ball = hit_or_miss(ball, x >= FAR_EDGE_X, y, _paddle.pos[1], 0, serve)
+        elif _paddle.loc == PaddleLocation.TOP.value:
+            ball = hit_or_miss(ball, y <= NEAR_EDGE, x, _paddle.pos[0], 1, serve)
+        else:
+            ball = hit_or_miss(ball, y >= FAR_EDGE_Y, x, _paddle.pos[0], 1, serve)
+    return ball
+
+
+class PongSimulation:
+    """
+    Headless Pong engine: no sockets, no pygame, one fixed tick per step.
+    Driven by the server rooms, the client (when it simulates the match), bots, replays and benchmarks.
+    """
+
+    def __init__(self, swept: bool = True, seed: int = None):
+        """
+        Initialize simulation
+        :param swept: Use continuous (swept) collisions instead of the discrete per tick checks
+        :param seed: Seed of the ball serves (random if not given), the same seed and inputs replay the same match
+        """
+        self.swept = swept
+        self.seed = random.randrange(SERVE_STRIDE) if seed is None else seed
+        self.serves = 0
+        self.recorder = None
+        self.tick = 0
+        self.running = False
+        self.ball = self.serve()
+        self.paddles = {}
+
+    def serve(self) -> Ball:
+        """
+        Serve a new ball, the n-th serve of a seed is always the same
+        :return: Ball object
+        """
+        self.serves += 1
+        return Ball(random.Random(self.seed * SERVE_STRIDE + self.serves))
+
+    def add_player(self, player_id, name: str) -> Paddle:
+        """
+        Give a new player the first free paddle location
+        :param player_id: Player id
+        :param name: Player name
+        :return: Paddle object
+        """
+        taken = [_paddle.loc for _paddle in self.paddles.values()]
+        for loc, position in zip(PaddleLocation, PaddlePosition):
+            if loc.value not in taken:
+                self.paddles[player_id] = Paddle(list(position.value), loc.value, name)
+                if self.recorder:
+                    self.recorder.join(self.tick, player_id, name)
+                return self.paddles[player_id]
+
+    def remove_player(self, player_id):
+        """
+        Remove player paddle
+        :param player_id: Player id
+        """
+        if self.paddles.pop(player_id, None) and self.recorder:
+            self.recorder.leave(self.tick, player_id)
+
+    def set_input(self, player_id, vel: int):
+        """
+        Apply player input
+        :param player_id: Player id
+        :param vel: Paddle velocity
+        """
+        paddle = self.paddles.get(player_id)
+        if paddle is not None and paddle.vel != vel:
+            if self.recorder:
+                self.recorder.velocity(self.tick, player_id, vel)
+            paddle.vel = vel
+
+    def apply_command(self, player_id, direction: int, pressed: bool):
+        """
+        Apply a key press/release command, a release only stops the paddle if it moves in that direction
+        :param player_id: Player id
+        :param direction: -1 (up/left) or 1 (down/right), any other direction is ignored
+        :param pressed: Key press or release
+        """
+        paddle = self.paddles.get(player_id)
+        if paddle is None or direction not in (-1, 1):
+            return
+        if self.recorder:
+            self.recorder.command(self.tick, player_id, direction, pressed)
+        vel = direction * Velocity.PADDLE.value
+        if pressed:
+            paddle.vel = vel
+        elif paddle.vel == vel:
+            paddle.vel = 0
+
+    def set_running(self, running: bool):
+        """
+        Start/Pause the match, the ball is served again on pause
+        :param running: Should the match run ?
+        """
+        if self.running == running:
+            return
+        if self.recorder:
+            self.recorder.running(self.tick, running)
+        if self.running:
+            self.ball = self.serve()
+        self.running = running
+
+    def advance(self):
+        """
+        Advance the match by one tick
+        """
+        if self.recorder and self.tick % self.recorder.interval == 0:
+            self.recorder.keyframe(self)
+        self.tick += 1
+        paddles = list(self.paddles.values())
+        for _paddle in paddles:
+            move_paddle(_paddle)
+        if self.running and self.swept:
+            self.ball = sweep_ball(self.ball, paddles, self.serve)
+        elif self.running:
+            move_ball(self.ball)
+            self.ball = collide_ball(self.ball, paddles, self.serve)
+
+    def step(self, inputs: dict = None) -> dict:
+        """
+        Apply inputs and advance the match by one tick
+        :param inputs: {player id: paddle velocity}
+        :return: Match state
+        """
+        if inputs:
+            for player_id, vel in inputs.items():
+                self.set_input(player_id, vel)
+        self.advance()
+        return self.state()
+
+    def state(self) -> dict:
+        """
+        Match state (lists are the live simulation lists, copy them to keep a state across steps)
+        :return: Match state
+        """
+        return {
+            "tick": self.tick,
+            "running": self.running,
+            "ball": {"pos": self.ball.pos, "vel": self.ball.vel},
+            "players": {
+                player_id: {
+                    "paddle": {"pos": _paddle.pos, "loc": _paddle.loc, "vel": _paddle.vel, "name": _paddle.name},
+                    "name": _paddle.name,
+                }
+                for player_id, _paddle in self.paddles.items()
+            },
+        }
+
+    def snapshot(self, max_players: int) -> dict:
+        """
+        Match state broadcast to clients
+        :param max_players: Maximum number of players allowed
+        :return: Snapshot
+        """
+        snapshot = self.state()
+        snapshot["max_players"] = max_players
+        return snapshot
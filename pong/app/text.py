@@ -0,0 +1,57 @@
+from collections import OrderedDict
+
+import pygame
+
+from .constants import FONT_SIZE, TEXT_CACHE_SIZE
+
+
+class TextCache:
+    """
+    Bounded LRU of rendered text surfaces keyed by (text, size, color, antialias), drawn with pygame's bundled
+    font so startup never scans the system fonts
+    """
+
+    def __init__(self, capacity: int = TEXT_CACHE_SIZE, size: int = FONT_SIZE):
+        """
+        Initialize cache (needs pygame.font to be initialized), the default size font is loaded up front
+        :param capacity: Maximum number of cached surfaces
+        :param size: Font size to preload
+        """
+        self.capacity = capacity
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.font(size)
+
+    def font(self, size: int) -> pygame.font.Font:
+        """
+        Bundled font at a size, loaded once
+        :param size: Font size
+        :return: Font object
+        """
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def render(self, text: str, size: int = FONT_SIZE, color: tuple = (255, 255, 255), antialias: bool = True):
+        """
+        Rendered text surface, only rasterized on a cache miss
+        :param text: Text
+        :param size: Font size
+        :param color: Text color
+        :param antialias: Antialiased text ?
+        :return: Surface object (shared, don't draw on it)
+        """
+        key = (text, size, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = self.font(size).render(text, antialias, color)
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
@@ -0,0 +1,193 @@
+import math
+import time
+
+from .constants import TIMER_RESOLUTION, TIMER_WHEEL_BITS, TIMER_WHEEL_LEVELS
+
+SLOTS = 1 << TIMER_WHEEL_BITS
+MASK = SLOTS - 1
+# Ticks covered by the wheels, later timers wait in the last slot of the top wheel and are placed again
+SPAN = 1 << (TIMER_WHEEL_BITS * TIMER_WHEEL_LEVELS)
+
+
+class Timer:
+    """
+    Scheduled callback, the handle returned by the wheel to cancel it
+    """
+
+    __slots__ = ("wheel", "expires", "callback", "args", "slot", "level")
+
+    def __init__(self, wheel, expires: int, callback, args: tuple):
+        """
+        Initialize timer
+        :param wheel: Timer wheel
+        :param expires: Wheel tick the timer fires at
+        :param callback: Called when the timer fires
+        :param args: Callback arguments
+        """
+        self.wheel = wheel
+        self.expires = expires
+        self.callback = callback
+        self.args = args
+        self.slot = None
+        self.level = 0
+
+    @property
+    def active(self) -> bool:
+        """
+        Returns True until the timer fires or is cancelled
+        """
+        return self.slot is not None
+
+    @property
+    def when(self) -> float:
+        """
+        Monotonic time the timer fires at (rounded up to the wheel resolution)
+        """
+        return self.expires * self.wheel.resolution
+
+    def cancel(self):
+        """
+        Cancel the timer (no op once it fired), O(1)
+        """
+        if self.slot is not None:
+            del self.slot[self]
+            self.slot = None
+            self.wheel.count -= 1
+            self.wheel.sizes[self.level] -= 1
+
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel: TIMER_WHEEL_LEVELS wheels of 2 ** TIMER_WHEEL_BITS slots, each slot of a wheel
+    spanning a whole turn of the wheel below. Scheduling and cancelling are O(1), whatever the number of timers,
+    a timer moves down a wheel at most once per level before it fires.
+    Slots are dicts (insertion ordered), timers due on the same tick fire in the order they were scheduled.
+    """
+
+    def __init__(self, resolution: float = TIMER_RESOLUTION, now: float = None):
+        """
+        Initialize wheel
+        :param resolution: Seconds per wheel tick, timers fire up to one resolution late, never early
+        :param now: Monotonic time the wheel starts at
+        """
+        self.resolution = resolution
+        self.tick = int((time.monotonic() if now is None else now) / resolution)
+        self.wheels = [[{} for _ in range(SLOTS)] for _ in range(TIMER_WHEEL_LEVELS)]
+        self.sizes = [0] * TIMER_WHEEL_LEVELS
+        self.count = 0
+
+    def __len__(self) -> int:
+        """
+        Number of pending timers
+        """
+        return self.count
+
+    def call_at(self, when: float, callback, *args) -> Timer:
+        """
+        Schedule a callback
+        :param when: Monotonic time, the callback runs on the first advance at or after it (next tick if past)
+        :param callback: Callback
+        :param args: Callback arguments
+        :return: Timer handle
+        """
+        timer = Timer(self, max(math.ceil(when / self.resolution), self.tick + 1), callback, args)
+        self.place(timer)
+        self.count += 1
+        return timer
+
+    def call_later(self, delay: float, callback, *args) -> Timer:
+        """
+        Schedule a callback after a delay
+        :param delay: Seconds from now
+        :param callback: Callback
+        :param args: Callback arguments
+        :return: Timer handle
+        """
+        return self.call_at(time.monotonic() + delay, callback, *args)
+
+    def place(self, timer: Timer):
+        """
+        Put a timer in the slot of the lowest wheel whose turn reaches its tick
+        :param timer: Timer
+        """
+        expires = min(timer.expires, self.tick + SPAN - 1)
+        delta = expires - self.tick
+        level = 0
+        while delta >= SLOTS << (TIMER_WHEEL_BITS * level) and level < TIMER_WHEEL_LEVELS - 1:
+            level += 1
+        slot = self.wheels[level][(expires >> (TIMER_WHEEL_BITS * level)) & MASK]
+        slot[timer] = None
+        timer.slot = slot
+        timer.level = level
+        self.sizes[level] += 1
+
+    def cascade(self, level: int):
+        """
+        Move the timers of the current slot of a wheel down to the wheels below
+        :param level: Wheel level (> 0)
+        """
+        wheel = self.wheels[level]
+        index = (self.tick >> (TIMER_WHEEL_BITS * level)) & MASK
+        slot, wheel[index] = wheel[index], {}
+        self.sizes[level] -= len(slot)
+        for timer in slot:
+            self.place(timer)
+
+    def advance(self, now: float = None) -> int:
+        """
+        Run the callbacks of every timer due by now, the turns of empty wheels are skipped
+        :param now: Monotonic time
+        :return: Number of timers fired
+        """
+        target = int((time.monotonic() if now is None else now) / self.resolution)
+        if not self.count:
+            self.tick = max(self.tick, target)
+            return 0
+        fired = 0
+        wheel = self.wheels[0]
+        sizes = self.sizes
+        while self.tick < target:
+            empty = 0
+            while not sizes[empty]:
+                empty += 1
+            if empty:
+                # Nothing fires or moves down before the next turn of the first wheel holding timers
+                self.tick = min(self.tick | ((1 << (TIMER_WHEEL_BITS * empty)) - 1), target)
+                if self.tick == target:
+                    break
+            self.tick += 1
+            tick = self.tick
+            if not tick & MASK:
+                levels = 1
+                while levels < TIMER_WHEEL_LEVELS - 1 and not tick & ((1 << (TIMER_WHEEL_BITS * (levels + 1))) - 1):
+                    levels += 1
+                for level in range(levels, 0, -1):
+                    self.cascade(level)
+            slot = wheel[tick & MASK]
+            if not slot:
+                continue
+            wheel[tick & MASK] = {}
+            # Callbacks may cancel the timers left in the slot
+            while slot:
+                timer = next(iter(slot))
+                del slot[timer]
+                timer.slot = None
+                self.count -= 1
+                sizes[0] -= 1
+                fired += 1
+                timer.callback(*timer.args)
+            if not self.count:
+                self.tick = target
+        return fired
+
+    def next_expiry(self) -> float:
+        """
+        Monotonic time of the next wheel tick with timers to fire or move down, to sleep until then
+        :return: Monotonic time (None without timers)
+        """
+        if not self.count:
+            return None
+        wheel = self.wheels[0]
+        for tick in range(self.tick + 1, self.tick + SLOTS + 1):
+            if wheel[tick & MASK] or not tick & MASK:
+                return tick * self.resolution
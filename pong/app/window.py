@@ -1,30 +1,45 @@
 import pygame
 
+from .pacing import FramePacer
+from .profiler import FrameProfiler
+
 
 class Window:
     """
     Window
     """
 
-    def __init__(self, size: tuple, name: str, fps: int = 120, resizable: bool = True):
+    def __init__(
+        self,
+        size: tuple,
+        name: str,
+        fps: int = 120,
+        resizable: bool = True,
+        vsync: bool = False,
+        profiler: FrameProfiler = None,
+    ):
         """
         Initialize window
         :param size: Window size
         :param name: Name
-        :param fps: FPS
+        :param fps: Maximum FPS (0 renders as fast as possible)
         :param resizable: Is the window resizeable ?
+        :param vsync: Wait for the display refresh (SDL then scales the window surface itself)
+        :param profiler: Frame profiler timing the event and wait phases, the frame ends here
         """
         self.resizable = resizable
+        self.vsync = vsync
         self.size = size
         self.width = size[0]
         self.height = size[1]
-        if self.resizable:
-            self.window = pygame.display.set_mode(self.size, pygame.RESIZABLE)
-        else:
-            self.window = pygame.display.set_mode(self.size)
+        self.flags = pygame.RESIZABLE if self.resizable else 0
+        if self.vsync:
+            self.flags |= pygame.SCALED
+        self.window = pygame.display.set_mode(self.size, self.flags, vsync=int(self.vsync))
         pygame.display.set_caption(name)
-        self.clock = pygame.time.Clock()
+        self.pacer = FramePacer(fps)
         self.fps = fps
+        self.profiler = profiler or FrameProfiler()
 
     def update(self):
         """
@@ -32,14 +47,16 @@ class Window:
         :return: Events list
         """
         if self.is_open():
-            pygame.display.flip()
             events = pygame.event.get()
             for event in events:
                 if event.type == pygame.QUIT:
                     pygame.display.quit()
                 elif event.type == pygame.VIDEORESIZE:
                     self.resize(event.size)
-            self.clock.tick(self.fps)
+            self.profiler.mark("events")
+            self.pacer.wait()
+            self.profiler.mark("wait")
+            self.profiler.end_frame()
             return events
 
     def blit(self, surface: pygame.Surface):
@@ -50,12 +67,14 @@ class Window:
         if self.is_open():
             self.window.blit(surface, (0, 0))
 
-    def smooth_scaled_blit(self, surface):
+    @staticmethod
+    def present(rects: list):
         """
-        Scale a surface to an arbitrary size smoothly
-        :param surface: Surface object
+        Push the dirty rectangles of the window surface to the screen
+        :param rects: Dirty rectangles
         """
-        pygame.transform.smoothscale(surface, (self.width, self.height), self.window)
+        if Window.is_open():
+            pygame.display.update(rects)
 
     @staticmethod
     def is_open():
@@ -70,13 +89,8 @@ class Window:
         Resize window
         :param new_size: New window size
         """
-        if self.is_open():
-            image = self.window.copy()
+        if self.is_open() and not self.vsync:
             self.size = new_size
             self.width = self.size[0]
             self.height = self.size[1]
-            if self.resizable:
-                self.window = pygame.display.set_mode(self.size, pygame.RESIZABLE)
-            else:
-                self.window = pygame.display.set_mode(self.size)
-            self.blit(pygame.transform.scale(image, self.size))
+            self.window = pygame.display.set_mode(self.size, self.flags)
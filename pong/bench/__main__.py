@@ -0,0 +1,40 @@
+"""
+Benchmark suite entry point.
+Run with "python -m pong.bench [suite] [options]", the suite defaults to the end to end load benchmark
+"""
+
+import importlib
+import sys
+
+SUITES = (
+    "load",
+    "micro",
+    "protocol",
+    "rooms",
+    "simulation",
+    "batch",
+    "registry",
+    "render",
+    "text",
+    "replay",
+    "spectators",
+    "timers",
+    "acceptor",
+)
+
+
+def main():
+    """
+    Run one benchmark suite, the remaining arguments are its own
+    """
+    suite = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].startswith("-") else "load"
+    if suite not in SUITES:
+        print(f"Unknown suite {suite}, expected one of: {', '.join(SUITES)}")
+        sys.exit(1)
+    arguments = sys.argv[2:] if len(sys.argv) > 1 and sys.argv[1] == suite else sys.argv[1:]
+    sys.argv = [f"pong.bench.{suite}"] + arguments
+    importlib.import_module(f".{suite}", __package__).main()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Acceptor core scaling benchmark: connection setup rate (connect, JOIN, WELCOME) against a local server subprocess
+as the number of worker processes grows, every connection joining its own room so they spread over the workers.
+One worker is the server without the front acceptor, the baseline the handoff cost shows against.
+Run with "python -m pong.bench acceptor --workers 1,2,4" (or "python -m pong.bench.acceptor")
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import socket
+import struct
+import time
+
+from ..app.constants import BUFFER_SIZE, Codec, MessageType
+from ..app.profiler import percentile
+from ..app.protocol import MessageStream
+from .load import HOST, cpu_seconds, start_server
+
+WARMUP = 1.0
+
+
+class Stats:
+    """
+    Counters shared by all connectors, only updated during the measurement window
+    """
+
+    def __init__(self):
+        """
+        Initialize counters
+        """
+        self.measuring = False
+        self.failed = 0
+        self.latencies = []
+
+
+async def handshake(room: int, port: int, codec: Codec) -> float:
+    """
+    Connect, join a room and wait for the welcome
+    :param room: Room id
+    :param port: Server port
+    :param codec: Wire codec
+    :return: Milliseconds until the welcome
+    """
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection(HOST, port)
+    stream = MessageStream(codec)
+    try:
+        writer.write(stream.encode(MessageType.JOIN, {"room": room, "max_players": 1}))
+        while True:
+            data = await reader.read(BUFFER_SIZE)
+            if not data:
+                raise ConnectionError("Closed before the welcome")
+            if any(msg_type == MessageType.WELCOME for msg_type, _ in stream.feed(data)):
+                return (time.perf_counter() - started) * 1000
+    finally:
+        # Reset instead of closing: thousands of client sockets in TIME_WAIT would exhaust the ephemeral ports
+        writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        writer.close()
+
+
+async def connector(rooms, port: int, codec: Codec, stats: Stats):
+    """
+    Set connections up one after the other until cancelled
+    :param rooms: Shared room id counter
+    :param port: Server port
+    :param codec: Wire codec
+    :param stats: Shared counters
+    """
+    while True:
+        try:
+            latency = await handshake(next(rooms), port, codec)
+        except OSError:
+            if stats.measuring:
+                stats.failed += 1
+            continue
+        if stats.measuring:
+            stats.latencies.append(latency)
+
+
+async def connect(concurrency: int, port: int, duration: float, codec: Codec, pid: int) -> dict:
+    """
+    Run the connectors against a started server
+    :param concurrency: Connections set up at the same time
+    :param port: Server port
+    :param duration: Measurement seconds (after WARMUP)
+    :param codec: Wire codec
+    :param pid: Server process id (the acceptor when sharded)
+    :return: Results
+    """
+    stats = Stats()
+    rooms = itertools.count(1)
+    connectors = [asyncio.ensure_future(connector(rooms, port, codec, stats)) for _ in range(concurrency)]
+    await asyncio.sleep(WARMUP)
+    cpu, started = cpu_seconds(pid), time.perf_counter()
+    stats.measuring = True
+    await asyncio.sleep(duration)
+    stats.measuring = False
+    elapsed = time.perf_counter() - started
+    cpu = cpu_seconds(pid) - cpu if cpu >= 0 else -1.0
+    for task in connectors:
+        task.cancel()
+    await asyncio.gather(*connectors, return_exceptions=True)
+    latencies = sorted(stats.latencies)
+    return {
+        "connections/s": len(latencies) / elapsed,
+        "failed": stats.failed,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "cpu%": cpu / elapsed * 100 if cpu >= 0 else -1.0,
+    }
+
+
+def main():
+    """
+    Print the benchmark table
+    """
+    parser = argparse.ArgumentParser(description="Pong acceptor core scaling benchmark")
+    parser.add_argument("--workers", default="1,2,4", help="Comma separated worker process counts")
+    parser.add_argument("--concurrency", type=int, default=32, help="Connections set up at the same time")
+    parser.add_argument("--duration", type=float, default=5.0, help="Measurement seconds per worker count")
+    parser.add_argument("--port", type=int, default=30191, help="Local port of the server subprocess")
+    parser.add_argument("--codec", default="BINARY", choices=[codec.name for codec in Codec], help="Wire codec")
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} cores, {args.concurrency} concurrent connections, codec {args.codec}")
+    print("latency: connect -> welcome, in milliseconds, cpu% of the acceptor (of the server with 1 worker)")
+    print(f"{'workers':>8}{'conn/s':>10}{'failed':>8}{'p50':>8}{'p99':>8}{'cpu%':>8}")
+    for workers in [int(count) for count in args.workers.split(",")]:
+        server = start_server(args.port, 0, workers)
+        try:
+            result = asyncio.run(connect(args.concurrency, args.port, args.duration, Codec[args.codec], server.pid))
+        finally:
+            server.terminate()
+            server.wait()
+        print(
+            f"{workers:>8}{result['connections/s']:>10.0f}{result['failed']:>8}{result['p50']:>8.2f}"
+            f"{result['p99']:>8.2f}{result['cpu%']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
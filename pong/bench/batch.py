@@ -0,0 +1,49 @@
+"""
+Batch simulation benchmark: match-steps per second for N matches stepped together.
+Needs NumPy, which the game itself doesn't ("pip install numpy==1.21.6").
+Run with "python -m pong.bench.batch"
+"""
+
+import sys
+import time
+
+try:
+    import numpy as np
+
+    from ..app.batch import BatchSimulation
+except ImportError:
+    np = None
+
+MATCH_STEPS = 2000000
+
+
+def measure(matches: int) -> float:
+    """
+    Match-steps per second
+    :param matches: Number of matches
+    :return: Match-steps per second
+    """
+    batch = BatchSimulation(matches, players=2, seed=0)
+    rng = np.random.default_rng(0)
+    inputs = rng.choice(np.array([-8, 0, 8]), size=(matches, 4))
+    steps = max(MATCH_STEPS // matches, 20)
+    started = time.perf_counter()
+    for _ in range(steps):
+        batch.step(inputs)
+    return steps * matches / (time.perf_counter() - started)
+
+
+def main():
+    """
+    Print the benchmark table
+    """
+    if np is None:
+        print("The batch benchmark needs NumPy: pip install numpy==1.21.6")
+        sys.exit(1)
+    print(f"{'matches':>8}{'match-steps/s':>16}")
+    for matches in (1, 10, 100, 1000, 10000, 100000):
+        print(f"{matches:>8}{measure(matches):>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
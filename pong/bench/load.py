@@ -0,0 +1,283 @@
+"""
+End to end load benchmark: a local server subprocess (server side simulation) against N headless bots
+speaking the real protocol over loopback, all bots held by one asyncio loop.
+Reports input to snapshot latency percentiles, messages per second and server CPU/RSS as the client count grows.
+Run with "python -m pong.bench load --clients 2,16,64" (or "python -m pong.bench.load")
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from ..app.constants import BUFFER_SIZE, Codec, MessageType, Velocity
+from ..app.delta import DeltaDecoder
+from ..app.profiler import percentile
+from ..app.protocol import MessageStream
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server.py")
+HOST = "127.0.0.1"
+PLAYERS_PER_ROOM = 2
+WARMUP = 1.0
+STARTUP_TIMEOUT = 5.0
+# Seconds between two paddle commands of a bot
+INPUT_DELAY = (0.05, 0.3)
+
+
+class Stats:
+    """
+    Counters shared by all bots, only updated during the measurement window
+    """
+
+    def __init__(self):
+        """
+        Initialize counters
+        """
+        self.measuring = False
+        self.received = 0
+        self.sent = 0
+        self.latencies = []
+
+
+class Bot:
+    """
+    Headless player: joins a room, presses/releases its paddle keys at random intervals, acks deltas,
+    and times each press until a snapshot shows the paddle moving that way
+    """
+
+    def __init__(self, index: int, codec: Codec, delta: bool, stats: Stats):
+        """
+        Initialize bot
+        :param index: Bot number (room = index // PLAYERS_PER_ROOM, random seed)
+        :param codec: Wire codec
+        :param delta: Ask for delta updates
+        :param stats: Shared counters
+        """
+        self.index = index
+        self.stream = MessageStream(codec)
+        self.delta = delta
+        self.deltas = DeltaDecoder()
+        self.stats = stats
+        self.random = random.Random(index)
+        self.writer = None
+        self.me = None
+        self.tick = 0
+        self.seq = 0
+        self.vel = 0
+        self.pending = None
+
+    def send(self, msg_type: MessageType, message: dict):
+        """
+        Queue a message on the transport
+        :param msg_type: Message type
+        :param message: Message
+        """
+        self.writer.write(self.stream.encode(msg_type, message))
+        if self.stats.measuring:
+            self.stats.sent += 1
+
+    async def run(self, port: int):
+        """
+        Play until cancelled
+        :param port: Server port
+        """
+        reader, self.writer = await asyncio.open_connection(HOST, port)
+        self.writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.send(
+            MessageType.JOIN,
+            {"room": self.index // PLAYERS_PER_ROOM, "max_players": PLAYERS_PER_ROOM, "delta": self.delta},
+        )
+        drive = asyncio.ensure_future(self.drive())
+        try:
+            await self.receive(reader)
+        finally:
+            drive.cancel()
+            self.writer.close()
+
+    async def drive(self):
+        """
+        Press a key, release it once the paddle moves, then press the other one, and so on
+        """
+        direction = 1
+        while True:
+            await asyncio.sleep(self.random.uniform(*INPUT_DELAY))
+            if self.pending:
+                continue
+            self.seq += 1
+            if self.vel:
+                self.send(
+                    MessageType.INPUT, {"seq": self.seq, "tick": self.tick, "direction": direction, "pressed": False}
+                )
+                direction = -direction
+            else:
+                self.pending = (direction * Velocity.PADDLE.value, time.perf_counter())
+                self.send(
+                    MessageType.INPUT, {"seq": self.seq, "tick": self.tick, "direction": direction, "pressed": True}
+                )
+
+    async def receive(self, reader: asyncio.StreamReader):
+        """
+        Apply server messages until the connection closes
+        :param reader: Stream reader
+        """
+        while True:
+            data = await reader.read(BUFFER_SIZE)
+            if not data:
+                return
+            for msg_type, message in self.stream.feed(data):
+                if msg_type == MessageType.DELTA:
+                    applied = self.deltas.apply(message)
+                    if applied is None:
+                        continue
+                    self.send(MessageType.ACK, {"seq": message["seq"]})
+                    msg_type, message = applied
+                if msg_type == MessageType.SNAPSHOT:
+                    self.on_snapshot(message)
+                elif msg_type == MessageType.WELCOME:
+                    self.me = str(message["session"])
+
+    def on_snapshot(self, snapshot: dict):
+        """
+        Count the snapshot and close the pending press once the server applied it
+        :param snapshot: Server snapshot
+        """
+        self.tick = snapshot["tick"]
+        player = snapshot["players"].get(self.me)
+        if self.stats.measuring:
+            self.stats.received += 1
+        if player is None:
+            return
+        self.vel = player["paddle"]["vel"]
+        if self.pending and self.vel == self.pending[0]:
+            if self.stats.measuring:
+                self.stats.latencies.append((time.perf_counter() - self.pending[1]) * 1000)
+            self.pending = None
+
+
+def cpu_seconds(pid: int) -> float:
+    """
+    User + system CPU time of a process (Linux /proc)
+    :param pid: Process id
+    :return: Seconds, or -1 when unavailable
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return -1.0
+
+
+def rss_megabytes(pid: int) -> float:
+    """
+    Resident set size of a process (Linux /proc)
+    :param pid: Process id
+    :return: Megabytes, or -1 when unavailable
+    """
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return -1.0
+
+
+def start_server(port: int, tick_rate: int, workers: int = 1) -> subprocess.Popen:
+    """
+    Start a server subprocess and wait until it accepts connections
+    :param port: Server port
+    :param tick_rate: Server simulation ticks per second
+    :param workers: Number of worker processes (more than one starts the front acceptor)
+    :return: Server process
+    """
+    arguments = ["--tick-rate", str(tick_rate), "--max-players", "2", "--port", str(port), "--workers", str(workers)]
+    server = subprocess.Popen(
+        [sys.executable, SERVER_SCRIPT] + arguments,
+        cwd=os.path.dirname(SERVER_SCRIPT),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError(f"Server didn't start on port {port}")
+
+
+async def load(clients: int, port: int, duration: float, codec: Codec, delta: bool, pid: int) -> dict:
+    """
+    Run the bots against a started server
+    :param clients: Number of bots
+    :param port: Server port
+    :param duration: Measurement seconds (after WARMUP)
+    :param codec: Wire codec
+    :param delta: Ask for delta updates
+    :param pid: Server process id
+    :return: Results
+    """
+    stats = Stats()
+    bots = [asyncio.ensure_future(Bot(index, codec, delta, stats).run(port)) for index in range(clients)]
+    await asyncio.sleep(WARMUP)
+    cpu, started = cpu_seconds(pid), time.perf_counter()
+    stats.measuring = True
+    await asyncio.sleep(duration)
+    stats.measuring = False
+    elapsed = time.perf_counter() - started
+    cpu = cpu_seconds(pid) - cpu if cpu >= 0 else -1.0
+    rss = rss_megabytes(pid)
+    for bot in bots:
+        bot.cancel()
+    await asyncio.gather(*bots, return_exceptions=True)
+    latencies = sorted(stats.latencies)
+    return {
+        "clients": clients,
+        "received/s": stats.received / elapsed,
+        "sent/s": stats.sent / elapsed,
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "cpu%": cpu / elapsed * 100 if cpu >= 0 else -1.0,
+        "rss": rss,
+    }
+
+
+def main():
+    """
+    Print the benchmark table
+    """
+    parser = argparse.ArgumentParser(description="Pong end to end load benchmark")
+    parser.add_argument("--clients", default="2,8,32,128", help="Comma separated bot counts")
+    parser.add_argument("--duration", type=float, default=5.0, help="Measurement seconds per bot count")
+    parser.add_argument("--tick-rate", type=int, default=120, help="Server simulation ticks per second")
+    parser.add_argument("--port", type=int, default=50190, help="Local port of the server subprocess")
+    parser.add_argument("--codec", default="BINARY", choices=[codec.name for codec in Codec], help="Wire codec")
+    parser.add_argument("--full", action="store_true", help="Ask for full snapshots instead of deltas")
+    args = parser.parse_args()
+    print(f"tick rate {args.tick_rate}, codec {args.codec}, {'full' if args.full else 'delta'} updates")
+    print("latency: input sent -> first snapshot showing it, in milliseconds")
+    print(f"{'clients':>8}{'recv/s':>10}{'sent/s':>10}{'p50':>8}{'p95':>8}{'p99':>8}{'cpu%':>8}{'rss MB':>8}")
+    for clients in [int(count) for count in args.clients.split(",")]:
+        server = start_server(args.port, args.tick_rate)
+        try:
+            result = asyncio.run(load(clients, args.port, args.duration, Codec[args.codec], not args.full, server.pid))
+        finally:
+            server.terminate()
+            server.wait()
+        print(
+            f"{result['clients']:>8}{result['received/s']:>10.0f}{result['sent/s']:>10.0f}{result['p50']:>8.2f}"
+            f"{result['p95']:>8.2f}{result['p99']:>8.2f}{result['cpu%']:>8.1f}{result['rss']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Microbenchmarks of the physics and serialization hot paths, one line per path.
+Run with "python -m pong.bench micro" (or "python -m pong.bench.micro")
+"""
+
+import timeit
+
+from ..app.collision import sweep_ball
+from ..app.constants import Codec, MessageType
+from ..app.delta import DeltaDecoder, DeltaEncoder, flatten
+from ..app.protocol import MessageStream
+from ..app.simulation import PongSimulation, collide_ball, move_ball, move_paddle
+
+ROUNDS = 20000
+PLAYERS = 4
+
+
+def build() -> PongSimulation:
+    """
+    Running four player match
+    :return: Simulation
+    """
+    simulation = PongSimulation()
+    for player_id in range(PLAYERS):
+        simulation.add_player(50001 + player_id, f"Player {50001 + player_id}")
+        simulation.set_input(50001 + player_id, 8)
+    simulation.set_running(True)
+    return simulation
+
+
+def cases() -> dict:
+    """
+    Hot paths to time (the serialization cases use their own match, the physics one keeps moving)
+    :return: {name: callable}
+    """
+    simulation, match = build(), build()
+    paddles = list(simulation.paddles.values())
+    ball = simulation.ball
+    snapshot = match.snapshot(PLAYERS)
+    flat = flatten(snapshot)
+    streams = {codec: MessageStream(codec) for codec in Codec}
+    frames = {codec: stream.encode(MessageType.SNAPSHOT, snapshot) for codec, stream in streams.items()}
+    encoder, decoder = DeltaEncoder(), DeltaDecoder()
+    keyframe = encoder.encode(MessageType.SNAPSHOT, flat)
+    decoder.apply(keyframe)
+    encoder.ack(keyframe["seq"])
+    match.advance()
+    delta = encoder.encode(MessageType.SNAPSHOT, flatten(match.snapshot(PLAYERS)))
+    result = {
+        "move_paddle": lambda: move_paddle(paddles[0]),
+        "move_ball": lambda: move_ball(ball),
+        "collide_ball": lambda: collide_ball(ball, paddles),
+        "sweep_ball": lambda: sweep_ball(ball, paddles),
+        "PongSimulation.advance": simulation.advance,
+        "PongSimulation.snapshot": lambda: simulation.snapshot(PLAYERS),
+        "flatten": lambda: flatten(snapshot),
+        "DeltaEncoder.encode": lambda: encoder.encode(MessageType.SNAPSHOT, flat),
+        "DeltaDecoder.apply": lambda: decoder.apply(delta),
+    }
+    for codec, stream in streams.items():
+        result[f"{codec.name.lower()} encode snapshot"] = lambda stream=stream: stream.encode(
+            MessageType.SNAPSHOT, snapshot
+        )
+        result[f"{codec.name.lower()} decode snapshot"] = lambda codec=codec: MessageStream(codec).feed(frames[codec])
+    return result
+
+
+def main():
+    """
+    Print the benchmark table
+    """
+    print(f"{PLAYERS} players, {ROUNDS} rounds")
+    print(f"{'path':<26}{'us/op':>10}{'ops/s':>12}")
+    for name, case in cases().items():
+        case()
+        elapsed = timeit.timeit(case, number=ROUNDS) / ROUNDS
+        print(f"{name:<26}{elapsed * 1e6:>10.2f}{1 / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
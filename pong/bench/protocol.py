@@ -0,0 +1,134 @@
+"""
+Wire protocol benchmark: bytes per tick and encode/decode time of each codec.
+Run with "python -m pong.bench.protocol"
+"""
+
+import json
+import timeit
+
+from ..app.constants import Codec, MessageType, PaddleLocation, PaddlePosition
+from ..app.delta import DeltaDecoder, DeltaEncoder, flatten
+from ..app.protocol import MessageStream
+
+ROUNDS = 20000
+
+
+def sample_player(player_id: int, loc: PaddleLocation, position: PaddlePosition) -> dict:
+    """
+    Build a player state as sent by Game.update_server_data
+    :param player_id: Player id
+    :param loc: Paddle location
+    :param position: Paddle position
+    :return: Player state
+    """
+    return {
+        "ball": {"pos": [412, 233], "vel": [4.4, -3.3000000000000003]},
+        "paddle": {"pos": list(position.value), "loc": loc.value, "vel": 8, "name": f"Player {player_id}"},
+        "running": True,
+        "primary": player_id == 50001,
+        "name": f"Player {player_id}",
+    }
+
+
+def sample_world(players: int) -> dict:
+    """
+    Build a world message as sent by GameServer.on_recv
+    :param players: Number of players
+    :return: World message
+    """
+    return {
+        "max_players": players,
+        "players": {
+            50001 + i: sample_player(50001 + i, loc, position)
+            for i, (loc, position) in enumerate(list(zip(PaddleLocation, PaddlePosition))[:players])
+        },
+    }
+
+
+def measure(encode, decode, message) -> tuple:
+    """
+    Measure one message
+    :param encode: Callable returning bytes for message
+    :param decode: Callable decoding those bytes
+    :param message: Message
+    :return: (bytes, encode us, decode us)
+    """
+    encode(message)  # warm up string tables
+    raw = encode(message)
+    encode_us = timeit.timeit(lambda: encode(message), number=ROUNDS) / ROUNDS * 1e6
+    decode_us = timeit.timeit(lambda: decode(raw), number=ROUNDS) / ROUNDS * 1e6
+    return len(raw), encode_us, decode_us
+
+
+def legacy_json(msg_type: MessageType, message: dict) -> tuple:
+    """
+    Unframed json.dumps/json.loads path used before the framed protocol
+    """
+    return measure(
+        lambda _message: json.dumps(_message).encode("utf-8"),
+        lambda raw: json.loads(raw.decode("utf-8")),
+        message,
+    )
+
+
+def framed(codec: Codec):
+    """
+    Build a measurement function for a framed codec
+    :param codec: Codec
+    """
+
+    def run(msg_type: MessageType, message: dict) -> tuple:
+        sender, receiver = MessageStream(codec), MessageStream(codec)
+        return measure(lambda _message: sender.encode(msg_type, _message), receiver.feed, message)
+
+    return run
+
+
+def delta(codec: Codec, players: int) -> tuple:
+    """
+    Steady state downlink delta where only the ball moved since the acknowledged baseline
+    :param codec: Codec
+    :param players: Number of players
+    :return: (keyframe bytes, delta bytes)
+    """
+    sender, receiver = MessageStream(codec), MessageStream(codec)
+    encoder, decoder = DeltaEncoder(), DeltaDecoder()
+    world = sample_world(players)
+    sizes = []
+    for tick in range(3):
+        for player in world["players"].values():
+            player["ball"]["pos"][0] += 4
+        frame = sender.encode(MessageType.DELTA, encoder.encode(MessageType.WORLD, flatten(world)))
+        for _, message in receiver.feed(frame):
+            decoder.apply(message)
+            encoder.ack(message["seq"])
+        sizes.append(len(frame))
+    return sizes[0], sizes[-1]
+
+
+def main():
+    """
+    Print the benchmark table
+    """
+    paths = [("json (legacy)", legacy_json), ("json", framed(Codec.JSON)), ("binary", framed(Codec.BINARY))]
+    print(f"{'codec':<14}{'players':>8}{'bytes/tick':>12}{'encode us':>11}{'decode us':>11}")
+    for players in (1, 2, 4):
+        uplink = sample_player(50001, PaddleLocation.LEFT, PaddlePosition.LEFT)
+        world = sample_world(players)
+        for name, path in paths:
+            up_bytes, up_enc, up_dec = path(MessageType.STATE, uplink)
+            down_bytes, down_enc, down_dec = path(MessageType.WORLD, world)
+            print(
+                f"{name:<14}{players:>8}{up_bytes + down_bytes:>12}"
+                f"{up_enc + down_enc:>11.2f}{up_dec + down_dec:>11.2f}"
+            )
+    print()
+    print(f"{'codec':<14}{'players':>8}{'keyframe':>10}{'delta':>8}   (downlink bytes, only the ball moved)")
+    for players in (1, 2, 4):
+        for codec in Codec:
+            keyframe, changed = delta(codec, players)
+            print(f"{codec.name.lower():<14}{players:>8}{keyframe:>10}{changed:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Client frame allocations: rebuilding the remote paddles every frame versus the in place entity registry,
+measured with tracemalloc.
+Run with "python -m pong.bench.registry"
+"""
+
+import time
+import tracemalloc
+
+from ..app.paddle import Paddle
+from ..app.registry import EntityRegistry
+from ..app.simulation import PongSimulation
+
+FRAMES = 20000
+ME = "0"
+
+
+def players_data(players: int) -> dict:
+    """
+    Players data as decoded from a server snapshot
+    :param players: Number of players
+    :return: {player id: player data}
+    """
+    simulation = PongSimulation()
+    for player_id in range(players):
+        simulation.add_player(str(player_id), f"Player {player_id}")
+    return simulation.snapshot(players)["players"]
+
+
+def rebuild(players: dict) -> list:
+    """
+    Former update_multiplayer_data: one new Paddle per remote player per frame
+    :param players: {player id: player data}
+    :return: Remote paddles
+    """
+    paddles = []
+    for player_id in players.keys():
+        if player_id != ME:
+            player_data = players[player_id]
+            if "paddle" in player_data:
+                paddles.append(
+                    Paddle(
+                        player_data["paddle"]["pos"],
+                        player_data["paddle"]["loc"],
+                        player_data["paddle"]["name"],
+                        player_data["paddle"]["vel"],
+                    )
+                )
+    return paddles
+
+
+def measure(players: int, registry, fresh: bool) -> tuple:
+    """
+    Run frames under tracemalloc
+    :param players: Number of players
+    :param registry: Use the entity registry instead of rebuilding paddles, None runs the bare loop
+    :param fresh: New server data every frame (otherwise the same data is seen again, as between two snapshots)
+    :return: (peak bytes allocated above the start of the loop, microseconds per frame)
+    """
+    frames = [players_data(players) for _ in range(64)] if fresh else [players_data(players)]
+    entities = EntityRegistry()
+    entities.sync(frames[0], ME)
+    paddles = rebuild(frames[0])
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    for frame in range(FRAMES):
+        data = frames[frame % len(frames)]
+        if registry:
+            entities.sync(data, ME)
+        elif registry is not None:
+            paddles = rebuild(data)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    del paddles
+    return peak, elapsed / FRAMES * 1e6
+
+
+def main():
+    """
+    Print the benchmark table
+    """
+    print("Peak bytes allocated by the frame loop, above the bare loop overhead")
+    print(f"{'players':>8}{'data':>7}{'rebuild B':>11}{'rebuild us':>12}{'registry B':>12}{'registry us':>13}")
+    for players in (2, 4):
+        for fresh in (False, True):
+            overhead = measure(players, None, fresh)[0]
+            rebuild_peak, rebuild_time = measure(players, False, fresh)
+            registry_peak, registry_time = measure(players, True, fresh)
+            rebuild_peak, registry_peak = rebuild_peak - overhead, registry_peak - overhead
+            print(
+                f"{players:>8}{'new' if fresh else 'same':>7}{rebuild_peak:>11}{rebuild_time:>12.2f}"
+                f"{registry_peak:>12}{registry_time:>13.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
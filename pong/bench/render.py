@@ -0,0 +1,110 @@
+"""
+Client frame rendering cost per window size: full canvas redraw (arena, polygons, circle, labels,
+smoothscale of the whole canvas and flip) versus the layered dirty rectangle renderer in each scale mode.
+Run with "python -m pong.bench.render" (headless, through the SDL dummy video driver unless one is set)
+"""
+
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+from ..app.ball import Ball  # noqa: E402
+from ..app.constants import (  # noqa: E402
+    HALF_PAD_HEIGHT,
+    HALF_PAD_WIDTH,
+    HEIGHT,
+    PAD_WIDTH,
+    WIDTH,
+    Color,
+    PaddleLocation,
+    ScaleMode,
+)
+from ..app.renderer import Renderer  # noqa: E402
+from ..app.simulation import PongSimulation  # noqa: E402
+from ..app.text import TextCache  # noqa: E402
+from ..app.window import Window  # noqa: E402
+
+FRAMES = 300
+SIZES = {"native": (WIDTH, HEIGHT), "720p": (1280, 720), "1080p": (1920, 1080), "4K": (3840, 2160)}
+
+
+def full_redraw(canvas: pygame.Surface, font: pygame.font.Font, ball: Ball, paddles: list, window: Window):
+    """
+    Former GameWindow.draw rendering: everything is redrawn and the whole canvas is scaled and flipped
+    :param canvas: Canvas surface
+    :param font: Label font
+    :param ball: Ball object
+    :param paddles: Paddles in play
+    :param window: Window object
+    """
+    canvas.fill(Color.BLACK.value)
+    pygame.draw.circle(canvas, Color.WHITE.value, [WIDTH // 2, HEIGHT // 2], HEIGHT // 6, 1)
+    pygame.draw.line(canvas, Color.WHITE.value, [PAD_WIDTH, 0], [PAD_WIDTH, HEIGHT], 1)
+    pygame.draw.line(canvas, Color.WHITE.value, [WIDTH - PAD_WIDTH, 0], [WIDTH - PAD_WIDTH, HEIGHT], 1)
+    pygame.draw.line(canvas, Color.WHITE.value, [0, PAD_WIDTH], [WIDTH, PAD_WIDTH], 1)
+    pygame.draw.line(canvas, Color.WHITE.value, [0, WIDTH - PAD_WIDTH], [WIDTH, WIDTH - PAD_WIDTH], 1)
+    pygame.draw.circle(canvas, Color.RED.value, ball.pos, 20, 0)
+    for _paddle in paddles:
+        x, y = _paddle.pos
+        half_x, half_y = (
+            (HALF_PAD_WIDTH, HALF_PAD_HEIGHT)
+            if _paddle.loc in (PaddleLocation.LEFT.value, PaddleLocation.RIGHT.value)
+            else (HALF_PAD_HEIGHT, HALF_PAD_WIDTH)
+        )
+        pygame.draw.polygon(
+            canvas,
+            Color.GREEN.value,
+            [[x - half_x, y - half_y], [x - half_x, y + half_y], [x + half_x, y + half_y], [x + half_x, y - half_y]],
+            0,
+        )
+        canvas.blit(font.render(_paddle.name, True, Color.WHITE.value), (x, y))
+    pygame.transform.smoothscale(canvas, (window.width, window.height), window.window)
+    pygame.display.flip()
+
+
+def measure(size: tuple, players: int, scale_mode) -> float:
+    """
+    Average frame cost while the match runs
+    :param size: Window size
+    :param players: Number of players
+    :param scale_mode: Renderer scale mode, None for the full redraw
+    :return: Milliseconds per frame
+    """
+    window = Window(size=size, name="Pong")
+    font = pygame.font.SysFont("Comic Sans MS", 10)
+    canvas = pygame.Surface((WIDTH, HEIGHT)).convert()
+    renderer = Renderer(TextCache(), scale_mode or ScaleMode.SMOOTH)
+    simulation = PongSimulation()
+    for player_id in range(players):
+        simulation.add_player(player_id, f"Player {player_id}")
+        simulation.set_input(player_id, 8 if player_id % 2 else -8)
+    simulation.set_running(True)
+    paddles = list(simulation.paddles.values())
+    started = time.perf_counter()
+    for _ in range(FRAMES):
+        simulation.advance()
+        if scale_mode:
+            window.present(renderer.draw(window.window, simulation.ball, paddles, paddles[0]))
+        else:
+            full_redraw(canvas, font, simulation.ball, paddles, window)
+    return (time.perf_counter() - started) / FRAMES * 1000
+
+
+def main():
+    """
+    Print the benchmark table
+    """
+    pygame.init()
+    print(f"video driver: {os.environ['SDL_VIDEODRIVER']}, 4 players, milliseconds per frame")
+    print(f"{'window':>16}{'full':>9}" + "".join(f"{mode.value:>9}" for mode in ScaleMode))
+    for name, size in SIZES.items():
+        row = [measure(size, 4, None)] + [measure(size, 4, mode) for mode in ScaleMode]
+        print(f"{name + ' ' + str(size[0]) + 'x' + str(size[1]):>16}" + "".join(f"{ms:>9.3f}" for ms in row))
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
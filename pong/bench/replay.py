@@ -0,0 +1,81 @@
+"""
+Replay log benchmark: per tick cost of recording a match with random inputs, log size,
+and seek time from the keyframe index, every seek checked against the states seen while recording.
+Run with "python -m pong.bench.replay"
+"""
+
+import copy
+import os
+import random
+import tempfile
+import time
+
+from ..app.replay import Recorder, Replay
+from ..app.simulation import PongSimulation
+
+TICKS = 120 * 60 * 10
+TICK_RATE = 120
+PLAYERS = 4
+SEEKS = 50
+# Chance a player sends a command on a tick
+INPUT_RATE = 0.02
+
+
+def play(simulation: PongSimulation, seed: int, states: dict = None) -> float:
+    """
+    Run a match with bot inputs
+    :param simulation: Simulation object
+    :param seed: Seed of the bot inputs
+    :param states: Ticks to collect the match states of (copied)
+    :return: Elapsed seconds
+    """
+    bots = random.Random(seed)
+    for player_id in range(PLAYERS):
+        simulation.add_player(player_id, f"Player {player_id}")
+    simulation.set_running(True)
+    started = time.perf_counter()
+    for _ in range(TICKS):
+        for player_id in range(PLAYERS):
+            if bots.random() < INPUT_RATE:
+                simulation.apply_command(player_id, bots.choice((-1, 1)), bots.random() < 0.7)
+        if states is not None and simulation.tick in states:
+            states[simulation.tick] = copy.deepcopy(simulation.state())
+        simulation.advance()
+    return time.perf_counter() - started
+
+
+def main():
+    """
+    Print the benchmark results
+    """
+    seed = 1234
+    plain = play(PongSimulation(seed=seed), seed)
+    checks = random.Random(seed)
+    states = {tick: None for tick in checks.sample(range(TICKS), SEEKS)}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "match.replay")
+        simulation = PongSimulation(seed=seed)
+        recorder = Recorder(path, simulation, TICK_RATE)
+        recorded = play(simulation, seed, states)
+        recorder.close()
+        size = os.path.getsize(path)
+        print(f"{TICKS} ticks ({TICKS // TICK_RATE} s at {TICK_RATE} Hz), {PLAYERS} players")
+        print(f"tick without recorder: {plain / TICKS * 1e6:.2f} us")
+        print(f"tick with recorder:    {recorded / TICKS * 1e6:.2f} us")
+        print(f"log size: {size / 1024:.1f} KiB ({size * 8 / (TICKS / TICK_RATE) / 1000:.2f} kbit/s)")
+        replay = Replay(path)
+        print(f"keyframes: {len(replay.ticks)} (every {replay.interval} ticks)")
+        timings = []
+        for tick, state in states.items():
+            started = time.perf_counter()
+            simulation = replay.seek(tick)
+            timings.append((time.perf_counter() - started) * 1000)
+            if simulation.state() != state:
+                raise AssertionError(f"Replay diverged at tick {tick}")
+        timings.sort()
+        print(f"seek: p50 {timings[len(timings) // 2]:.2f} ms, max {timings[-1]:.2f} ms, {SEEKS} states matched")
+        replay.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Per room server cost: simulation tick plus snapshot encoding for every player, as the room count grows.
+Run with "python -m pong.bench.rooms"
+"""
+
+import time
+
+from ..app.connection import Connection
+from ..app.constants import Codec, MessageType
+from ..app.room import Room
+
+TICKS = 200
+PLAYERS_PER_ROOM = 2
+
+
+def build_rooms(count: int) -> list:
+    """
+    Create full rooms with detached connections
+    :param count: Number of rooms
+    :return: Rooms
+    """
+    rooms = []
+    for room_id in range(count):
+        room = Room(room_id, PLAYERS_PER_ROOM, tick_rate=120)
+        for seat in range(PLAYERS_PER_ROOM):
+            session = room_id * PLAYERS_PER_ROOM + seat + 1
+            connection = Connection(None, ("127.0.0.1", session), session)
+            connection.stream.codec = Codec.BINARY
+            room.join(connection)
+        rooms.append(room)
+    return rooms
+
+
+def measure(count: int) -> float:
+    """
+    Average cost of one room tick
+    :param count: Number of rooms
+    :return: Microseconds per room per tick
+    """
+    rooms = build_rooms(count)
+    started = time.perf_counter()
+    for _ in range(TICKS):
+        for room in rooms:
+            snapshot = room.step(1)
+            for connection in room.connections.values():
+                connection.stream.encode(MessageType.SNAPSHOT, snapshot)
+    return (time.perf_counter() - started) / TICKS / count * 1e6
+
+
+def main():
+    """
+    Print the benchmark table
+    """
+    print(f"{'rooms':>8}{'us/room/tick':>14}{'rooms @120Hz/core':>20}")
+    for count in (1, 10, 100, 1000):
+        per_room = measure(count)
+        print(f"{count:>8}{per_room:>14.2f}{int(1e6 / 120 / per_room):>20}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Headless simulation benchmark: PongSimulation steps per millisecond.
+Run with "python -m pong.bench.simulation"
+"""
+
+import time
+
+from ..app.simulation import PongSimulation
+
+STEPS = 100000
+
+
+def build(players: int, swept: bool) -> PongSimulation:
+    """
+    Create a running match
+    :param players: Number of players
+    :param swept: Use swept collisions
+    :return: Simulation
+    """
+    simulation = PongSimulation(swept)
+    for player_id in range(players):
+        simulation.add_player(player_id, f"Player {player_id}")
+    simulation.set_running(True)
+    return simulation
+
+
+def measure(players: int, with_state: bool, swept: bool = True) -> float:
+    """
+    Steps per millisecond
+    :param players: Number of players
+    :param with_state: Use step() (inputs + state dict) instead of advance()
+    :param swept: Use swept collisions
+    :return: Steps per millisecond
+    """
+    simulation = build(players, swept)
+    inputs = {player_id: 8 for player_id in range(players)}
+    started = time.perf_counter()
+    if with_state:
+        for _ in range(STEPS):
+            simulation.step(inputs)
+    else:
+        for _ in range(STEPS):
+            simulation.advance()
+    return STEPS / (time.perf_counter() - started) / 1000
+
+
+def main():
+    """
+    Print the benchmark table
+    """
+    print(f"{'players':>8}{'advance()/ms':>14}{'step()/ms':>12}{'discrete/ms':>14}")
+    for players in (1, 2, 4):
+        print(
+            f"{players:>8}{measure(players, False):>14.0f}{measure(players, True):>12.0f}"
+            f"{measure(players, False, swept=False):>14.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
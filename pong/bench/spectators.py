@@ -0,0 +1,89 @@
+"""
+Spectator fan-out benchmark: server cost of sending one room snapshot to N spectators,
+encoded per connection and sent with sendall, versus encoded once and offered to every spectator.
+Run with "python -m pong.bench.spectators"
+"""
+
+import socket
+import time
+
+from ..app.connection import Connection
+from ..app.constants import Codec, MessageType
+from ..app.protocol import Broadcast, MessageStream
+from ..app.simulation import PongSimulation
+
+TICKS = 200
+COUNTS = (1, 10, 100, 500)
+
+
+def drain(readers: list):
+    """
+    Read everything the spectators received
+    :param readers: Reader sockets
+    """
+    for reader in readers:
+        try:
+            while reader.recv(1 << 16):
+                pass
+        except BlockingIOError:
+            pass
+
+
+def measure(spectators: int, codec: Codec, shared: bool) -> float:
+    """
+    Broadcast cost per tick
+    :param spectators: Number of spectators
+    :param codec: Wire codec
+    :param shared: Encode once and offer the frame instead of encoding and sending per connection
+    :return: Microseconds per tick
+    """
+    simulation = PongSimulation()
+    for player_id in range(4):
+        simulation.add_player(player_id, f"Player {player_id}")
+    simulation.set_running(True)
+    connections, readers = [], []
+    for index in range(spectators):
+        writer, reader = socket.socketpair()
+        writer.setblocking(False)
+        reader.setblocking(False)
+        connection = Connection(writer, ("spectator", index), index)
+        connection.stream = MessageStream(codec)
+        connections.append(connection)
+        readers.append(reader)
+    broadcast = Broadcast(codec)
+    elapsed = 0.0
+    for _ in range(TICKS):
+        simulation.advance()
+        snapshot = simulation.snapshot(4)
+        started = time.perf_counter()
+        if shared:
+            keyframe = not all(connection.synced for connection in connections)
+            frame, key = broadcast.encode(MessageType.SNAPSHOT, snapshot, keyframe)
+            for connection in connections:
+                if connection.offer(frame, key):
+                    connection.flush()
+        else:
+            for connection in connections:
+                connection.sock.sendall(connection.stream.encode(MessageType.SNAPSHOT, snapshot))
+        elapsed += time.perf_counter() - started
+        drain(readers)
+    for connection, reader in zip(connections, readers):
+        connection.sock.close()
+        reader.close()
+    return elapsed / TICKS * 1e6
+
+
+def main():
+    """
+    Print the benchmark table
+    """
+    print("microseconds per tick to send one snapshot to every spectator")
+    print(f"{'spectators':>11}{'codec':>8}{'per conn':>11}{'shared':>10}{'us/spec':>9}")
+    for codec in (Codec.BINARY, Codec.JSON):
+        for count in COUNTS:
+            separate, shared = measure(count, codec, False), measure(count, codec, True)
+            print(f"{count:>11}{codec.name:>8}{separate:>11.1f}{shared:>10.1f}{shared / count:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Label text cost: font lookup at startup and rendering a player name every frame,
+pygame.font.SysFont + Font.render versus the bundled font behind the LRU text cache.
+Run with "python -m pong.bench.text"
+"""
+
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+from ..app.constants import FONT_SIZE, Color  # noqa: E402
+from ..app.text import TextCache  # noqa: E402
+
+FRAMES = 20000
+LABELS = ("Me", "Player 50312", "Player 50318", "Player 50324")
+
+
+def startup() -> tuple:
+    """
+    Time to get a usable font
+    :return: (SysFont milliseconds, bundled font milliseconds)
+    """
+    started = time.perf_counter()
+    pygame.font.SysFont("Comic Sans MS", 10)
+    system = time.perf_counter() - started
+    started = time.perf_counter()
+    TextCache()
+    return system * 1000, (time.perf_counter() - started) * 1000
+
+
+def per_frame() -> tuple:
+    """
+    Cost of the four name labels of a frame
+    :return: (Font.render microseconds, cached microseconds)
+    """
+    font = pygame.font.Font(None, FONT_SIZE)
+    started = time.perf_counter()
+    for _ in range(FRAMES):
+        for label in LABELS:
+            font.render(label, True, Color.WHITE.value)
+    rendered = time.perf_counter() - started
+    text = TextCache()
+    started = time.perf_counter()
+    for _ in range(FRAMES):
+        for label in LABELS:
+            text.render(label, FONT_SIZE, Color.WHITE.value)
+    return rendered / FRAMES * 1e6, (time.perf_counter() - started) / FRAMES * 1e6
+
+
+def main():
+    """
+    Print the benchmark results
+    """
+    pygame.init()
+    system, bundled = startup()
+    print(f"font startup: SysFont {system:.2f} ms, bundled {bundled:.2f} ms")
+    rendered, cached = per_frame()
+    print(f"4 labels per frame: Font.render {rendered:.2f} us, text cache {cached:.2f} us")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
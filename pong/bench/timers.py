@@ -0,0 +1,74 @@
+"""
+Timer wheel benchmark: cost of scheduling, cancelling and advancing with N pending timers (one idle timer per
+connection, spread over the idle timeout), next to a scan of every connection as done by a periodic sweep.
+Run with "python -m pong.bench.timers"
+"""
+
+import random
+import time
+
+from ..app.config import IDLE_TIMEOUT
+from ..app.constants import TIMER_RESOLUTION
+from ..app.timers import TimerWheel
+
+COUNTS = (100, 1000, 10000, 100000)
+OPERATIONS = 20000
+# Simulated seconds of advancing, every timer fired is scheduled again (like an idle timer re-armed)
+ADVANCE_SECONDS = 5
+
+
+def noop(*_):
+    """
+    Timer callback
+    """
+
+
+def measure(count: int) -> tuple:
+    """
+    Timer costs with a number of pending timers
+    :param count: Pending timers
+    :return: (schedule + cancel us, advance us per wheel tick, advance us per timer fired, sweep us)
+    """
+    rng = random.Random(count)
+    now = 1000.0
+    wheel = TimerWheel(now=now)
+    for _ in range(count):
+        wheel.call_at(now + rng.uniform(0, IDLE_TIMEOUT), noop)
+    delays = [rng.uniform(0, IDLE_TIMEOUT) for _ in range(OPERATIONS)]
+    started = time.perf_counter()
+    for delay in delays:
+        wheel.call_at(now + delay, noop).cancel()
+    schedule = (time.perf_counter() - started) / OPERATIONS * 1e6
+
+    def rearm():
+        wheel.call_at(wheel.tick * TIMER_RESOLUTION + IDLE_TIMEOUT, rearm)
+
+    for _ in range(count // 10):
+        wheel.call_at(now + rng.uniform(0, ADVANCE_SECONDS), rearm)
+    ticks = int(ADVANCE_SECONDS / TIMER_RESOLUTION)
+    fired = 0
+    started = time.perf_counter()
+    for tick in range(1, ticks + 1):
+        fired += wheel.advance(now + tick * TIMER_RESOLUTION)
+    elapsed = time.perf_counter() - started
+    advance, per_timer = elapsed / ticks * 1e6, elapsed / max(fired, 1) * 1e6
+    last_seen = [now - rng.uniform(0, IDLE_TIMEOUT) for _ in range(count)]
+    started = time.perf_counter()
+    [seen for seen in last_seen if now - seen > IDLE_TIMEOUT]
+    sweep = (time.perf_counter() - started) * 1e6
+    return schedule, advance, per_timer, sweep
+
+
+def main():
+    """
+    Print the benchmark table
+    """
+    print(f"timers re-armed during the advance: 10% of the pending ones, over {ADVANCE_SECONDS} s")
+    print(f"{'timers':>8}{'sched+cancel us':>17}{'advance us/ms':>15}{'us/fired':>10}{'sweep us':>10}")
+    for count in COUNTS:
+        schedule, advance, per_timer, sweep = measure(count)
+        print(f"{count:>8}{schedule:>17.2f}{advance:>15.2f}{per_timer:>10.2f}{sweep:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
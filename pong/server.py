@@ -1,103 +1,795 @@
-import json
-import select
+import argparse
+import errno
+import itertools
+import multiprocessing
+import os
+import secrets
+import selectors
 import socket
 import sys
 import time
 
-from app.config import SERVER_IP, SERVER_PORT
-from app.constants import BUFFER_SIZE, DONT_WRITE_BYTE_CODE
+from app.config import (
+    HANDSHAKE_TIMEOUT,
+    IDLE_TIMEOUT,
+    MAX_CONNECTIONS,
+    RECONNECT_GRACE,
+    ROOM_QUEUE_SIZE,
+    SEND_HIGH_WATER,
+    SEND_LIMIT,
+    SERVER_IP,
+    SERVER_PORT,
+    SLOW_CLIENT_TIMEOUT,
+)
+from app.connection import Connection
+from app.constants import (
+    ACCEPT_BATCH,
+    BUFFER_SIZE,
+    DEFAULT_ROOM,
+    DONT_WRITE_BYTE_CODE,
+    FD_RESERVE,
+    HEARTBEAT_INTERVAL,
+    MAX_PLAYERS,
+    RESUME_TOKEN_SIZE,
+    SESSION_BASE,
+    Codec,
+    MessageType,
+    RejectReason,
+)
+from app.delta import DeltaEncoder, flatten
+from app.metrics import Metrics, MetricsEndpoint
+from app.protocol import MessageStream, ProtocolError
+from app.room import Room
+from app.sharding import Acceptor, receive_connection
+from app.timers import TimerWheel
+
+try:
+    import resource
+except ImportError:  # Windows has no file descriptor limit to read
+    resource = None
 
 sys.dont_write_bytecode = DONT_WRITE_BYTE_CODE
 
+# Ticks simulated without sleeping before the scheduler gives up catching up
+MAX_CATCH_UP_TICKS = 5
+METRICS_HOST = "127.0.0.1"
+MESSAGE_LABELS = {msg_type: (("type", msg_type.name.lower()),) for msg_type in MessageType}
+CODEC_LABELS = {codec: (("codec", codec.name.lower()),) for codec in Codec}
+REJECT_LABELS = {reason: (("reason", reason.name.lower()),) for reason in RejectReason}
+# Sent before a connection is registered, the codec of the peer is not known yet (clients decode both)
+REJECT_FRAMES = {
+    reason: MessageStream().encode(MessageType.REJECT, {"reason": reason.value}) for reason in RejectReason
+}
+
+
+def connection_capacity(recording: bool) -> int:
+    """
+    Client connections the process can hold: MAX_CONNECTIONS, within the open file limit
+    :param recording: Are matches recorded (one more file per room, a room has at least one client)
+    :return: Maximum number of client connections
+    """
+    if resource is None:
+        return MAX_CONNECTIONS
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return MAX_CONNECTIONS
+    available = (soft - FD_RESERVE) // (2 if recording else 1)
+    return max(1, min(MAX_CONNECTIONS, available))
+
 
 class GameServer:
     """
     Pong Game Server
     """
 
-    def __init__(self, host: str, port: int):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        tick_rate: int = 0,
+        handoff: socket.socket = None,
+        metrics_port: int = 0,
+        record: str = "",
+        shard: tuple = (0, 1),
+    ):
         """
         Initialize server
         :param host: Server host
         :param port: Server port
+        :param tick_rate: Server simulation ticks per second (0 lets the primary client simulate the match)
+        :param handoff: Unix socket the acceptor passes connections through (worker mode, host/port are not bound)
+        :param metrics_port: Local port serving the metrics in Prometheus text format (0 disables it)
+        :param record: Directory the simulated matches are recorded to ("" doesn't record)
+        :param shard: (worker index, worker count), session ids are interleaved to stay unique across workers
         """
-        self.input_list = []
+        self.selector = selectors.DefaultSelector()
         self.channel = {}
-        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.server.bind((host, port))
-        self.server.listen(0)
-        self.players = {}
+        self.handoff = handoff
+        self.server = None
+        if handoff is None:
+            self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.server.bind((host, port))
+            self.server.listen(socket.SOMAXCONN)
+            self.server.setblocking(False)
+        self.rooms = {}
+        self.outgoing = set()
+        self.tick_rate = tick_rate
+        self.interval = 1 / tick_rate if tick_rate else None
+        self.record = record
+        if record:
+            os.makedirs(record, exist_ok=True)
+        self.sessions = itertools.count(SESSION_BASE + shard[0], shard[1])
+        self.clients = 0
+        self.capacity = connection_capacity(bool(record))
+        self.spare = open(os.devnull, "rb")
+        self.timers = TimerWheel()
+        self.metrics = Metrics()
+        self.register_metrics()
+        self.endpoint = MetricsEndpoint(self.metrics, METRICS_HOST, metrics_port) if metrics_port else None
+
+    def register_metrics(self):
+        """
+        Create the server counters/histograms, and the gauges read from the live rooms and connections
+        """
+        metrics = self.metrics
+        self.accepted = metrics.counter("pong_connections_total", "Client connections accepted")
+        self.closed = metrics.counter("pong_disconnections_total", "Client connections closed")
+        self.rejected = metrics.counter("pong_rejected_connections_total", "Connections turned away by reason")
+        self.invalid = metrics.counter("pong_protocol_errors_total", "Connections closed for sending invalid data")
+        self.messages_in = metrics.counter("pong_messages_received_total", "Messages received by type")
+        self.messages_out = metrics.counter("pong_messages_sent_total", "Messages sent by type")
+        self.bytes_in = metrics.counter("pong_received_bytes_total", "Bytes received from clients")
+        self.bytes_out = metrics.counter("pong_sent_bytes_total", "Bytes sent to clients")
+        self.loop_time = metrics.histogram("pong_loop_seconds", "Time spent handling one selector wakeup")
+        self.tick_time = metrics.histogram("pong_tick_seconds", "Time spent stepping and broadcasting one room")
+        self.decode_time = metrics.histogram("pong_decode_seconds", "Time spent decoding received data by codec")
+        self.encode_time = metrics.histogram("pong_encode_seconds", "Time spent encoding one message by codec")
+        self.dropped = metrics.counter(
+            "pong_spectator_dropped_frames_total", "Snapshots skipped for spectators still receiving the previous one"
+        )
+        self.stale = metrics.counter(
+            "pong_stale_frames_total", "Queued snapshots dropped for clients over the send high-water mark"
+        )
+        self.slow = metrics.counter("pong_slow_disconnections_total", "Clients disconnected for not keeping up")
+        metrics.gauge("pong_rooms", "Open rooms", lambda: len(self.rooms))
+        metrics.gauge(
+            "pong_players", "Players in rooms", lambda: sum(len(room.players) for room in self.rooms.values())
+        )
+        metrics.gauge(
+            "pong_spectators",
+            "Spectators in rooms",
+            lambda: sum(len(group) for room in self.rooms.values() for group in room.spectators.values()),
+        )
+        metrics.gauge("pong_clients", "Connected clients", lambda: self.clients)
+        metrics.gauge(
+            "pong_timers", "Pending timers (timeouts, heartbeats, grace periods, room ticks)", lambda: len(self.timers)
+        )
+        metrics.gauge(
+            "pong_suspended_players",
+            "Disconnected players whose slot is held",
+            lambda: sum(len(room.suspended) for room in self.rooms.values()),
+        )
+        metrics.gauge("pong_client_capacity", "Client connections accepted at most", lambda: self.capacity)
+        metrics.gauge(
+            "pong_waiting", "Players waiting for a slot", lambda: sum(len(room.waiting) for room in self.rooms.values())
+        )
+        metrics.gauge(
+            "pong_queued_bytes",
+            "Bytes waiting in the client send buffers",
+            lambda: sum(connection.queued for connection in self.connections()),
+        )
+        metrics.gauge(
+            "pong_client_received_bytes",
+            "Bytes received per connected client",
+            lambda: {(("player", connection.player_id),): connection.bytes_in for connection in self.connections()},
+        )
+        metrics.gauge(
+            "pong_client_sent_bytes",
+            "Bytes sent per connected client",
+            lambda: {(("player", connection.player_id),): connection.bytes_out for connection in self.connections()},
+        )
+
+    def connections(self) -> list:
+        """
+        Connected clients
+        :return: Connection objects
+        """
+        return [key.data for key in self.selector.get_map().values() if isinstance(key.data, Connection)]
 
     def run(self, max_players: int):
         """
         Run server and listen for connections
-        :param max_players: Maximum number of players allowed
+        :param max_players: Maximum number of players allowed in rooms created without a size
+        """
+        self.selector.register(self.server or self.handoff, selectors.EVENT_READ)
+        if self.endpoint:
+            self.endpoint.register(self.selector, self.timers)
+        try:
+            self.loop(max_players)
+        finally:
+            for room in self.rooms.values():
+                room.close()
+
+    def loop(self, max_players: int):
+        """
+        Serve events and run the due timers (room ticks, timeouts, heartbeats) until stopped
+        :param max_players: Maximum number of players allowed in rooms created without a size
         """
-        self.input_list.append(self.server)
         while 1:
-            time.sleep(0.01)
-            input_r, output_r, except_r = select.select(self.input_list, [], [])
-            for conn in input_r:
-                if conn == self.server:
+            wake = self.timers.next_expiry()
+            events = self.selector.select(None if wake is None else max(wake - time.monotonic(), 0))
+            started = time.perf_counter()
+            for key, mask in events:
+                conn = key.fileobj
+                if self.endpoint and key.data is self.endpoint:
+                    self.endpoint.on_event(conn, mask)
+                    continue
+                if conn is self.server:
                     self.on_accept(max_players)
-                    break
-                else:
+                    continue
+                if conn is self.handoff:
+                    self.on_handoff(max_players)
+                    continue
+                if conn.fileno() == -1:
+                    continue
+                if mask & selectors.EVENT_WRITE:
+                    self.flush(key.data)
+                    if not mask & selectors.EVENT_READ or conn.fileno() == -1:
+                        continue
+                try:
                     data = conn.recv(BUFFER_SIZE)
+                except BlockingIOError:
+                    continue
+                except ConnectionError:
+                    data = b""
                 if len(data) == 0:
                     self.on_close(conn)
                 else:
                     self.on_recv(conn, data, max_players)
+            if not self.timers.advance() and not events:
+                continue
+            while self.outgoing:
+                self.flush(self.outgoing.pop())
+            self.loop_time.observe(time.perf_counter() - started)
+
+    def flush(self, connection: Connection):
+        """
+        Write the queued frames of a client, watch the socket writability while some are left,
+        and disconnect clients too slow to ever catch up
+        :param connection: Client connection
+        """
+        try:
+            sent = connection.flush()
+        except OSError:
+            self.on_close(connection.sock)
+            return
+        self.bytes_out.inc(sent)
+        if not connection.outbox:
+            connection.stalled_since = None
+            if connection.writing:
+                connection.writing = False
+                self.selector.modify(connection.sock, selectors.EVENT_READ, data=connection)
+            return
+        now = time.monotonic()
+        if connection.stalled_since is None:
+            connection.stalled_since = now
+        if connection.queued > SEND_LIMIT or now - connection.stalled_since > SLOW_CLIENT_TIMEOUT:
+            print(f"{connection.addr} is too slow, {connection.queued} bytes queued")
+            self.slow.inc()
+            self.on_close(connection.sock)
+            return
+        if not connection.writing:
+            connection.writing = True
+            self.selector.modify(connection.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, data=connection)
+
+    def on_idle(self, connection: Connection):
+        """
+        Idle timer: disconnect a client silent for IDLE_TIMEOUT, or wait for the rest of the timeout since it was
+        last heard from (receiving data only records the time, the timer is not rescheduled per message)
+        :param connection: Client connection
+        """
+        deadline = connection.last_seen + IDLE_TIMEOUT
+        if time.monotonic() < deadline:
+            connection.timer = self.timers.call_at(deadline, self.on_idle, connection)
+        else:
+            self.reject(connection, RejectReason.IDLE_TIMEOUT)
+
+    def on_heartbeat(self, connection: Connection):
+        """
+        Heartbeat timer: players waiting for a slot receive nothing else, keep telling them the server is alive
+        :param connection: Client connection
+        """
+        connection.heartbeat = None
+        if connection.waiting:
+            self.notify(connection, MessageType.HEARTBEAT, {})
+            connection.heartbeat = self.timers.call_later(HEARTBEAT_INTERVAL, self.on_heartbeat, connection)
+
+    def on_grace_expired(self, room: Room, token: str):
+        """
+        Grace period timer: the disconnected player did not resume, free its slot
+        :param room: Room object
+        :param token: Resume token of the player
+        """
+        player_id = room.release(token)
+        print(f"Player {player_id} did not reconnect, its slot in room {room.room_id} is freed")
+        if room.is_empty():
+            self.close_room(room)
+        else:
+            self.admit(room)
 
     def on_accept(self, max_players: int):
         """
-        Accept incoming client connection
-        :param max_players: Maximum number of players allowed
+        Accept incoming client connections (players are admitted once they join a room),
+        turning them away once the connection budget is spent
+        :param max_players: Maximum number of players allowed in rooms created without a size
+        """
+        for _ in range(ACCEPT_BATCH):
+            try:
+                client_sock, client_addr = self.server.accept()
+            except BlockingIOError:
+                return
+            except OSError as e:
+                if e.errno not in (errno.EMFILE, errno.ENFILE):
+                    return
+                self.shed()
+                continue
+            client_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.register(client_sock, client_addr)
+
+    def shed(self):
+        """
+        Out of file descriptors: free the spare one to accept and turn away a pending connection,
+        otherwise it stays in the backlog and the listener keeps waking the loop up
         """
-        client_sock, client_addr = self.server.accept()
+        print("Out of file descriptors, turning connections away")
+        self.spare.close()
+        try:
+            client_sock, _ = self.server.accept()
+            self.turn_away(client_sock, RejectReason.SERVER_FULL)
+        except OSError:
+            pass
+        self.spare = open(os.devnull, "rb")
+
+    def turn_away(self, sock: socket.socket, reason: RejectReason):
+        """
+        Reject a connection before it is registered
+        :param sock: Client socket
+        :param reason: Reject reason
+        """
+        sock.setblocking(False)
+        try:
+            sock.send(REJECT_FRAMES[reason])
+        except OSError:
+            pass
+        sock.close()
+        self.rejected.inc(1, REJECT_LABELS[reason])
+
+    def register(self, client_sock: socket.socket, client_addr: tuple) -> bool:
+        """
+        Register a client connection with a new session id, if the connection budget allows it
+        :param client_sock: Client socket
+        :param client_addr: Client address
+        :return: True if the connection was registered
+        """
+        if self.clients >= self.capacity:
+            print(f"Connection overflow: {client_addr} turned away, {self.clients} clients connected")
+            self.turn_away(client_sock, RejectReason.SERVER_FULL)
+            return False
         print(f"{client_addr} has connected")
-        if len(self.players) >= max_players:
-            print(f"Connection overflow. Max players: {max_players}")
-        else:
-            self.players[client_addr[1]] = {}
-            self.input_list.append(client_sock)
+        self.accepted.inc()
+        client_sock.setblocking(False)
+        connection = Connection(client_sock, client_addr, next(self.sessions))
+        connection.timer = self.timers.call_later(
+            HANDSHAKE_TIMEOUT, self.reject, connection, RejectReason.HANDSHAKE_TIMEOUT
+        )
+        self.selector.register(client_sock, selectors.EVENT_READ, data=connection)
+        self.clients += 1
+        return True
+
+    def notify(self, connection: Connection, msg_type: MessageType, message: dict):
+        """
+        Queue a control message (welcome, wait queue position...)
+        :param connection: Client connection
+        :param msg_type: Message type
+        :param message: Message
+        """
+        connection.queue(connection.stream.encode(msg_type, message))
+        self.outgoing.add(connection)
+        self.messages_out.inc(1, MESSAGE_LABELS[msg_type])
+
+    def reject(self, connection: Connection, reason: RejectReason):
+        """
+        Tell a registered client why it is turned away, then close its connection
+        :param connection: Client connection
+        :param reason: Reject reason
+        """
+        print(f"{connection.addr} rejected: {reason.name.lower()}")
+        self.rejected.inc(1, REJECT_LABELS[reason])
+        connection.queue(connection.stream.encode(MessageType.REJECT, {"reason": reason.value}))
+        try:
+            connection.flush()
+        except OSError:
+            pass
+        self.on_close(connection.sock)
+
+    def on_handoff(self, max_players: int):
+        """
+        Take over a client connection accepted by the front acceptor
+        :param max_players: Maximum number of players allowed in rooms created without a size
+        """
+        try:
+            client_sock, pending = receive_connection(self.handoff)
+        except ProtocolError as e:
+            print(f"Handoff dropped: {e}")
+            return
+        if client_sock is None:
+            print("Acceptor has stopped")
+            sys.exit(1)
+        try:
+            client_addr = client_sock.getpeername()
+        except OSError:
+            # Reset by the client while it was handed off
+            client_sock.close()
+            return
+        if not self.register(client_sock, client_addr):
+            return
+        if pending:
+            self.on_recv(client_sock, pending, max_players)
 
     def on_close(self, conn: socket.socket):
         """
         Client disconnect handling
         :param conn: Client socket connection
         """
-        client_addr = conn.getpeername()
-        print(f"{client_addr} has disconnected")
-        del self.players[client_addr[1]]
-        self.input_list.remove(conn)
+        connection = self.selector.unregister(conn).data
+        self.outgoing.discard(connection)
+        self.clients -= 1
+        for timer in (connection.timer, connection.heartbeat):
+            if timer:
+                timer.cancel()
+        print(f"{connection.addr} has disconnected")
+        self.closed.inc()
+        room = connection.room or connection.waiting
+        if room and room.simulation and connection.room is room and not connection.spectating and RECONNECT_GRACE:
+            timer = self.timers.call_later(RECONNECT_GRACE, self.on_grace_expired, room, connection.token)
+            room.suspend(connection, timer)
+        elif room:
+            waited = connection.waiting is room
+            room.leave(connection)
+            if room.is_empty():
+                self.close_room(room)
+            else:
+                self.admit(room, waited)
+        conn.close()
+
+    def open_room(self, room_id: int, max_players: int) -> Room:
+        """
+        Create a room, its simulation ticks on its own timer
+        :param room_id: Room id
+        :param max_players: Maximum number of players allowed
+        :return: Room object
+        """
+        room = self.rooms[room_id] = Room(room_id, max_players, self.tick_rate, self.record)
+        if self.tick_rate:
+            room.next_tick = time.monotonic()
+            room.timer = self.timers.call_at(room.next_tick, self.on_room_tick, room)
+        return room
+
+    def close_room(self, room: Room):
+        """
+        Stop and delete a room, once everyone has left
+        :param room: Room object
+        """
+        if room.timer:
+            room.timer.cancel()
+        room.close()
+        del self.rooms[room.room_id]
+
+    def admit(self, room: Room, moved: bool = False):
+        """
+        Welcome the waiting players a slot freed up for, and tell the others their new position
+        :param room: Room object
+        :param moved: Has the wait queue changed already (a waiting player left) ?
+        """
+        admitted = room.admit()
+        for connection in admitted:
+            self.welcome(connection)
+        if admitted or moved:
+            for position, connection in enumerate(room.waiting, 1):
+                self.notify(connection, MessageType.QUEUED, {"position": position})
+
+    def welcome(self, connection: Connection):
+        """
+        Tell a player or spectator its session id once it is in a room, and a player the secret token
+        it resumes the session with (the session id is the public player id, every client of the room knows it)
+        :param connection: Client connection
+        """
+        if not connection.token and not connection.spectating:
+            connection.token = secrets.token_hex(RESUME_TOKEN_SIZE)
+        self.notify(
+            connection,
+            MessageType.WELCOME,
+            {"session": connection.player_id, "room": connection.room.room_id, "token": connection.token},
+        )
+
+    def join_room(self, connection: Connection, room_id: int, max_players: int, token: str = "") -> bool:
+        """
+        Add player to a room, creating it if needed, or to its bounded wait queue when the room is full
+        :param connection: Client connection
+        :param room_id: Room id
+        :param max_players: Maximum number of players allowed if the room is created
+        :param token: Resume token of a player that disconnected, its slot is held for RECONNECT_GRACE seconds
+        :return: False if the player was rejected (and disconnected)
+        """
+        room = self.rooms.get(room_id) or self.open_room(room_id, max_players)
+        if token and room.resume(connection, token):
+            print(f"{connection.addr} resumed session {connection.player_id}")
+            self.welcome(connection)
+            return True
+        if not room.is_full():
+            room.join(connection)
+            self.welcome(connection)
+            return True
+        if len(room.waiting) >= ROOM_QUEUE_SIZE:
+            print(f"Connection overflow in room {room_id}. Max players: {room.max_players}, queue full")
+            self.reject(connection, RejectReason.QUEUE_FULL)
+            return False
+        self.notify(connection, MessageType.QUEUED, {"position": room.wait(connection)})
+        connection.heartbeat = self.timers.call_later(HEARTBEAT_INTERVAL, self.on_heartbeat, connection)
+        return True
+
+    def watch_room(self, connection: Connection, room_id: int, max_players: int, token: str = "") -> bool:
+        """
+        Add spectator to a room, creating it if needed (the server must simulate the matches)
+        :param connection: Client connection
+        :param room_id: Room id
+        :param max_players: Maximum number of players allowed if the room is created
+        :param token: Ignored (spectators have no slot to resume)
+        :return: False if the spectator was rejected (and disconnected)
+        """
+        if not self.tick_rate:
+            print(f"{connection.addr} can't spectate, matches are simulated by the clients")
+            self.reject(connection, RejectReason.NO_SPECTATING)
+            return False
+        room = self.rooms.get(room_id) or self.open_room(room_id, max_players)
+        room.watch(connection)
+        self.welcome(connection)
+        return True
 
     def on_recv(self, conn: socket.socket, data: bytes, max_players: int):
         """
         Handle data received
         :param conn: Client socket connection
         :param data: Incoming message
-        :param max_players: Maximum number of players allowed
+        :param max_players: Maximum number of players allowed in rooms created without a size
+        """
+        connection = self.selector.get_key(conn).data
+        connection.last_seen = time.monotonic()
+        connection.bytes_in += len(data)
+        self.bytes_in.inc(len(data))
+        started = time.perf_counter()
+        try:
+            messages = connection.stream.feed(data)
+        except ProtocolError as e:
+            print(f"{connection.addr} sent invalid data: {e}")
+            self.invalid.inc()
+            self.on_close(conn)
+            return
+        self.decode_time.observe(time.perf_counter() - started, CODEC_LABELS[connection.stream.codec])
+        for msg_type, message in messages:
+            self.messages_in.inc(1, MESSAGE_LABELS[msg_type])
+            if not connection.greeted:
+                connection.greeted = True
+                connection.timer.cancel()
+                connection.timer = self.timers.call_later(IDLE_TIMEOUT, self.on_idle, connection)
+                room_id, room_size, spectate, token = DEFAULT_ROOM, max_players, False, ""
+                if msg_type == MessageType.JOIN:
+                    room_id = message["room"]
+                    room_size = min(message["max_players"], MAX_PLAYERS) or max_players
+                    spectate = message.get("spectate", False)
+                    token = message.get("token", "")
+                    connection.deltas = DeltaEncoder() if message.get("delta") and not spectate else None
+                join = self.watch_room if spectate else self.join_room
+                if not join(connection, room_id, room_size, token):
+                    return
+            if connection.spectating or connection.waiting:
+                continue
+            if msg_type == MessageType.STATE:
+                connection.room.update_player(connection.player_id, message)
+            elif msg_type == MessageType.INPUT and message["seq"] > connection.input_seq:
+                connection.input_seq = message["seq"]
+                connection.room.apply_input(connection.player_id, message)
+            elif msg_type == MessageType.ACK and connection.deltas:
+                connection.deltas.ack(message["seq"])
+        if connection.room is None or connection.spectating:
+            return
+        if not self.tick_rate and any(msg_type == MessageType.STATE for msg_type, _ in messages):
+            self.send_state(connection, MessageType.WORLD, connection.room.world())
+
+    def send_state(self, connection: Connection, msg_type: MessageType, message: dict, flat: dict = None):
+        """
+        Queue a world/snapshot message, as a delta against the last acknowledged one if the client asked for deltas.
+        Over the send high-water mark, the state frames still waiting are dropped first, this one supersedes them.
+        A message the client stream can not encode disconnects that client only.
+        :param connection: Client connection
+        :param msg_type: Message type
+        :param message: Message
+        :param flat: Already flattened message
         """
+        if connection.queued > SEND_HIGH_WATER:
+            self.stale.inc(connection.drop_stale())
+        if connection.deltas:
+            message = connection.deltas.encode(msg_type, flat if flat is not None else flatten(message))
+            msg_type = MessageType.DELTA
+        started = time.perf_counter()
         try:
-            player_id = conn.getpeername()[1]
-            self.players[player_id] = json.loads(data.decode("utf-8"))
-            data = {"max_players": max_players, "players": self.players}
-            conn.send(json.dumps(data).encode("utf-8"))
-        except json.decoder.JSONDecodeError:
-            print("Invalid json data")
+            frame = connection.stream.encode(msg_type, message)
+        except ProtocolError as e:
+            print(f"{connection.addr} state not sent: {e}")
+            self.on_close(connection.sock)
+            return
+        self.encode_time.observe(time.perf_counter() - started, CODEC_LABELS[connection.stream.codec])
+        self.messages_out.inc(1, MESSAGE_LABELS[msg_type])
+        connection.queue(frame, replaceable=True)
+        self.outgoing.add(connection)
+
+    def on_room_tick(self, room: Room):
+        """
+        Room tick timer: run the due simulation ticks of the room, broadcast its snapshot to its players
+        and spectators, and schedule the next tick (rooms tick on their own phase, not all at once)
+        :param room: Room object
+        """
+        now = time.monotonic()
+        ticks = 0
+        while room.next_tick <= now and ticks < MAX_CATCH_UP_TICKS:
+            room.next_tick += self.interval
+            ticks += 1
+        if room.next_tick <= now:
+            room.next_tick = now + self.interval
+        room.timer = self.timers.call_at(room.next_tick, self.on_room_tick, room)
+        if not ticks:
+            return
+        started = time.perf_counter()
+        snapshot = room.step(ticks)
+        flat = None
+        for connection in list(room.connections.values()):
+            if connection.deltas and flat is None:
+                flat = flatten(snapshot)
+            self.send_state(connection, MessageType.SNAPSHOT, snapshot, flat)
+        if room.spectators:
+            self.broadcast(room, snapshot)
+        self.tick_time.observe(time.perf_counter() - started)
+
+    def broadcast(self, room: Room, snapshot: dict):
+        """
+        Fan a room snapshot out to its spectators: encoded once per codec, the same bytes are queued for every
+        spectator, slow ones skip frames. A snapshot a shared stream can not encode disconnects its spectators only.
+        :param room: Room object
+        :param snapshot: Room snapshot
+        """
+        for codec, spectators in list(room.spectators.items()):
+            keyframe = not all(connection.synced for connection in spectators.values())
+            started = time.perf_counter()
+            try:
+                frame, key = room.broadcasts[codec].encode(MessageType.SNAPSHOT, snapshot, keyframe)
+            except ProtocolError as e:
+                print(f"Room {room.room_id} {codec.name.lower()} spectators dropped: {e}")
+                for connection in list(spectators.values()):
+                    self.on_close(connection.sock)
+                continue
+            self.encode_time.observe(time.perf_counter() - started, CODEC_LABELS[codec])
+            delivered = 0
+            for connection in spectators.values():
+                if connection.offer(frame, key):
+                    delivered += 1
+                    self.outgoing.add(connection)
+            self.dropped.inc(len(spectators) - delivered)
+            self.messages_out.inc(delivered, MESSAGE_LABELS[MessageType.SNAPSHOT])
+
+
+def run_worker(
+    handoff: socket.socket,
+    tick_rate: int,
+    max_players: int,
+    metrics_port: int = 0,
+    record: str = "",
+    shard: tuple = (0, 1),
+    inherited: tuple = (),
+):
+    """
+    Worker process entry point
+    :param handoff: Unix socket connected to the acceptor
+    :param tick_rate: Server simulation ticks per second
+    :param max_players: Maximum number of players allowed in rooms created without a size
+    :param metrics_port: Local metrics port of this worker (0 disables it)
+    :param record: Directory the simulated matches are recorded to ("" doesn't record)
+    :param shard: (worker index, worker count)
+    :param inherited: Acceptor ends of the channels, forked with the worker, closed so it sees the acceptor stop
+    """
+    for channel in inherited:
+        channel.close()
+    try:
+        GameServer(SERVER_IP, SERVER_PORT, tick_rate, handoff, metrics_port, record, shard).run(max_players)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_sharded(
+    workers: int, tick_rate: int, max_players: int, metrics_port: int = 0, port: int = SERVER_PORT, record: str = ""
+):
+    """
+    Spread rooms over worker processes behind a front acceptor
+    :param workers: Number of worker processes
+    :param tick_rate: Server simulation ticks per second
+    :param max_players: Maximum number of players allowed in rooms created without a size
+    :param metrics_port: Metrics port of the first worker, the others use the following ports (0 disables them)
+    :param port: Server port
+    :param record: Directory the simulated matches are recorded to ("" doesn't record)
+    """
+    channels = []
+    for worker in range(workers):
+        acceptor_end, worker_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        channels.append(acceptor_end)
+        worker_metrics = metrics_port + worker if metrics_port else 0
+        multiprocessing.Process(
+            target=run_worker,
+            args=(worker_end, tick_rate, max_players, worker_metrics, record, (worker, workers), tuple(channels)),
+            daemon=True,
+        ).start()
+        worker_end.close()
+    Acceptor(SERVER_IP, port, channels).run()
 
 
 if __name__ == "__main__":
-    server = GameServer(SERVER_IP, SERVER_PORT)
+    parser = argparse.ArgumentParser(description="Pong game server")
+    parser.add_argument(
+        "--tick-rate",
+        type=int,
+        default=0,
+        help="Run the simulation on the server at this many ticks per second (e.g. 60 or 120)",
+    )
+    parser.add_argument(
+        "--max-players",
+        help="Number of players in rooms created without a size (asked for when missing)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes rooms are sharded over (e.g. one per core)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=SERVER_PORT,
+        help="Server port (defaults to SERVER_PORT from app/config.py)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=0,
+        help="Serve metrics in Prometheus text format on this local port (workers use the following ports)",
+    )
+    parser.add_argument(
+        "--record",
+        default="",
+        help="Record the server simulated matches to replay logs in this directory (needs --tick-rate)",
+    )
+    args = parser.parse_args()
     try:
-        no_of_players = input("Enter number of players:")
+        no_of_players = args.max_players or input("Enter number of players:")
         if not no_of_players.isdigit():
             print("Invalid Input")
             sys.exit(1)
         if 1 <= int(no_of_players) <= 4:
             print("Server listening...")
-            server.run(int(no_of_players))
+            if args.workers > 1:
+                run_sharded(args.workers, args.tick_rate, int(no_of_players), args.metrics_port, args.port, args.record)
+            else:
+                GameServer(
+                    SERVER_IP, args.port, args.tick_rate, metrics_port=args.metrics_port, record=args.record
+                ).run(int(no_of_players))
         else:
             print("Invalid no of players")
             sys.exit(1)